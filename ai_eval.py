@@ -0,0 +1,168 @@
+"""Offline-Auswertung der KI-Antworten.
+
+Spielt historische Ticket-Gründe (Transkript-Index und pending_training) gegen
+einen Snapshot von ai_training.json ab und misst Trefferquote, Präzision gegen
+gelabelte Paare sowie die Latenz des Matchings. Mit --semantic wird der
+Vektorindex des Bots (ai_index/<guild>.*) samt der beim Training gemerkten
+Beispiel-Anfragen verwendet.
+
+Beispiel:
+    python ai_eval.py --guild 1449811998136336558 --training ai_training.json \\
+        --labels labels.jsonl --compare ai_training.neu.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import main
+
+
+def load_snapshot(path: str) -> dict:
+    """Lädt einen ai_training.json-Snapshot."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def load_reasons(snapshot: dict, guild_id: str, transcript_dir: str) -> list:
+    """Sammelt Ticket-Gründe aus dem Transkript-Index und den offenen Trainings-Anfragen."""
+    reasons = []
+    index_path = os.path.join(transcript_dir, "index.jsonl")
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    if entry.get("ticket_reason"):
+                        reasons.append(entry["ticket_reason"])
+
+    pending = dict(snapshot.get("pending_training", {}))
+    pending.update(snapshot.get("servers", {}).get(guild_id, {}).get("pending_training", {}))
+    reasons.extend(entry["reason"] for entry in pending.values() if entry.get("reason"))
+    return reasons
+
+def load_labels(path: str) -> list:
+    """Lädt gelabelte Paare (JSONL mit "reason" und "expected" = Keyword-Schlüssel oder null)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def build_matcher(snapshot: dict, guild_id: str, semantic: bool, index_dir: str = main.AI_INDEX_DIR):
+    """Erstellt die Matching-Funktion wie in get_ai_response, aber für einen Snapshot."""
+    keywords = snapshot.get("servers", {}).get(guild_id, {}).get("keywords", {})
+    index = None
+    if semantic:
+        if main.load_numpy() is None:
+            sys.exit("numpy ist nicht installiert, --semantic nicht möglich.")
+        # Index des Bots kopieren, damit er dieselben Beispiele (Keywords und die beim Training
+        # gemerkten Anfragen des Clusters) enthält, ohne dass die Auswertung ihn verändert
+        main.AI_INDEX_DIR = tempfile.mkdtemp()
+        for extension in (".npy", ".json"):
+            source = os.path.join(index_dir, f"{guild_id}{extension}")
+            if os.path.exists(source):
+                shutil.copy(source, main.AI_INDEX_DIR)
+        index = main.SemanticIndex(guild_id)
+        # Keywords, die der Index noch nicht kennt (z.B. neu im Vergleichs-Snapshot), wie beim Aufbau ergänzen
+        missing = [keyword_str for keyword_str in keywords if keyword_str not in set(index.keys)]
+        if missing:
+            index.append(missing, missing)
+
+    def match(reason: str):
+        keyword_str = main.match_ai_keywords(keywords, reason)
+        if keyword_str is None and index is not None:
+            for candidate, score in index.search(reason, 1):
+                if score >= main.SEMANTIC_THRESHOLD and candidate in keywords:
+                    keyword_str = candidate
+        return keyword_str
+
+    return match
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+def evaluate(match, reasons: list, labels: list, repeat: int) -> dict:
+    """Misst Trefferquote, Präzision und Latenz eines Matchers."""
+    latencies = []
+    results = {}
+    for reason in reasons + [label["reason"] for label in labels]:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results[reason] = match(reason)
+            latencies.append((time.perf_counter() - start) * 1_000_000)
+
+    hits = sum(1 for reason in reasons if results[reason] is not None)
+    answered = [label for label in labels if results[label["reason"]] is not None]
+    correct = sum(1 for label in answered if results[label["reason"]] == label.get("expected"))
+    exact = sum(1 for label in labels if results[label["reason"]] == label.get("expected"))
+
+    return {
+        "results": results,
+        "reasons": len(reasons),
+        "hit_rate": hits / len(reasons) if reasons else 0.0,
+        "labels": len(labels),
+        "precision": correct / len(answered) if answered else 0.0,
+        "accuracy": exact / len(labels) if labels else 0.0,
+        "p50_us": percentile(latencies, 50) if latencies else 0.0,
+        "p99_us": percentile(latencies, 99) if latencies else 0.0,
+    }
+
+def print_report(name: str, report: dict):
+    print(f"── {name}")
+    print(f"   Gründe:        {report['reasons']}")
+    print(f"   Trefferquote:  {report['hit_rate']:.1%}")
+    if report["labels"]:
+        print(f"   Präzision:     {report['precision']:.1%} ({report['labels']} Labels)")
+        print(f"   Genauigkeit:   {report['accuracy']:.1%}")
+    print(f"   Latenz p50:    {report['p50_us']:.1f} µs")
+    print(f"   Latenz p99:    {report['p99_us']:.1f} µs")
+
+def print_diff(before: dict, after: dict, limit: int = 20):
+    """Zeigt, welche Gründe durch den zweiten Snapshot anders beantwortet werden."""
+    gained, lost, changed = [], [], []
+    for reason, old in before["results"].items():
+        new = after["results"].get(reason)
+        if old == new:
+            continue
+        if old is None:
+            gained.append((reason, new))
+        elif new is None:
+            lost.append((reason, old))
+        else:
+            changed.append((reason, f"{old} → {new}"))
+
+    print(f"── Unterschiede: {len(gained)} neue Treffer, {len(lost)} verlorene Treffer, {len(changed)} geänderte Antworten")
+    for label, items in (("+", gained), ("-", lost), ("~", changed)):
+        for reason, key in items[:limit]:
+            print(f"   {label} {reason[:70]!r}: {key}")
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Offline-Auswertung der KI-Antworten")
+    parser.add_argument("--guild", required=True, help="Server-ID, deren Keywords ausgewertet werden")
+    parser.add_argument("--training", default=main.AI_TRAINING_FILE, help="Snapshot von ai_training.json")
+    parser.add_argument("--compare", help="Zweiter Snapshot zum Vergleich")
+    parser.add_argument("--transcripts", help="Transkript-Verzeichnis mit index.jsonl (Standard: transcripts/<guild>)")
+    parser.add_argument("--labels", help="JSONL mit gelabelten Paaren")
+    parser.add_argument("--semantic", action="store_true", help="Semantische Suche als zweite Stufe aktivieren")
+    parser.add_argument("--index-dir", default=main.AI_INDEX_DIR, help="Verzeichnis des semantischen Index des Bots")
+    parser.add_argument("--repeat", type=int, default=5, help="Wiederholungen pro Grund für die Latenzmessung")
+    args = parser.parse_args()
+
+    snapshot = load_snapshot(args.training)
+    reasons = load_reasons(snapshot, args.guild, args.transcripts or f"transcripts/{args.guild}")
+    labels = load_labels(args.labels) if args.labels else []
+    if not reasons and not labels:
+        sys.exit("Keine Ticket-Gründe oder Labels gefunden.")
+
+    report = evaluate(build_matcher(snapshot, args.guild, args.semantic, args.index_dir), reasons, labels, args.repeat)
+    print_report(args.training, report)
+
+    if args.compare:
+        other = evaluate(build_matcher(load_snapshot(args.compare), args.guild, args.semantic, args.index_dir), reasons, labels, args.repeat)
+        print_report(args.compare, other)
+        print_diff(report, other)
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,213 @@
+"""Micro-Benchmarks für die Hilfsfunktionen im Interaktionspfad.
+
+Erzeugt synthetische Server-Konfigurationen, Keyword-Sets, Rollenlisten und
+Nachrichtenverläufe in mehreren Größen und misst get_ai_response,
+get_server_config, get_color, is_staff, check_permission und
+format_transcript_records. Die Ergebnisse werden mit einer JSON-Baseline
+verglichen; liegt ein Fall um mehr als die Toleranz darüber, endet der Lauf
+mit Exit-Code 1.
+
+Beispiel:
+    python bench.py --save                    # Baseline schreiben
+    python bench.py --tolerance 0.25          # gegen Baseline prüfen
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import main
+
+DEFAULT_SCALES = [10, 1000, 100000]
+DEFAULT_BASELINE = "bench_baseline.json"
+MIN_RUN_TIME = 0.2
+
+
+def guild_id_for(i: int) -> int:
+    return 1000000000000000000 + i
+
+def build_guild_configs(n: int) -> dict:
+    """Baut n Server-Konfigurationen im Format von get_server_config."""
+    servers = {}
+    for i in range(n):
+        servers[str(guild_id_for(i))] = {
+            "panels": {"support": {"label": "Support", "emoji": "🎫", "category_id": i, "staff_role_id": i, "enabled": True}},
+            "multipanels": {},
+            "log_channel_id": i,
+            "staff_role_id": i,
+            "ai_training_channel_id": 0,
+            "ai_semantic": 0,
+            "ticket_counter": i,
+            "embed_colors": {"default": 0x2b2d31, "success": 0x2ecc71, "error": 0xe74c3c, "warning": 0xf1c40f, "info": 0x3498db}
+        }
+    return {"servers": servers}
+
+def build_keywords(n: int, rng: random.Random) -> dict:
+    """Baut n Keyword-Einträge mit je drei Begriffen, wie sie /ai_train anlegt."""
+    keywords = {}
+    for i in range(n):
+        terms = ", ".join(f"begriff{i}x{j}{rng.randint(0, 999)}" for j in range(3))
+        keywords[terms] = f"Antwort {i}"
+    return keywords
+
+def build_permissions(n: int, guild_id: int) -> dict:
+    """Baut n User-Berechtigungen für einen Server."""
+    users = {str(2000000000000000000 + i): ["panel_send", "ticket_bulk_close"] for i in range(n)}
+    return {"servers": {str(guild_id): {"users": users}}}
+
+def build_member(n: int, staff_role_id: int):
+    """Member-Ersatz mit n Rollen; die Staff-Rolle steht am Ende (schlechtester Fall für is_staff)."""
+    roles = [SimpleNamespace(id=3000000000000000000 + i) for i in range(n - 1)] + [SimpleNamespace(id=staff_role_id)]
+    return SimpleNamespace(id=1, roles=roles, guild_permissions=SimpleNamespace(administrator=False))
+
+def build_records(n: int) -> list:
+    """Baut n Transkript-Einträge im Format von message_to_record."""
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            "id": i,
+            "author": f"user{i % 50}",
+            "author_id": i % 50,
+            "content": f"Nachricht Nummer {i} mit etwas Text" if i % 7 else "",
+            "created_at": (start + timedelta(seconds=i)).isoformat(),
+            "edited": i % 11 == 0,
+            "deleted": i % 13 == 0
+        }
+        for i in range(n)
+    ]
+
+def measure(func, repeat: int) -> float:
+    """Gibt die beste Zeit pro Aufruf in Nanosekunden zurück (Schleifenzahl wie bei timeit automatisch)."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        func(loops)
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_RUN_TIME or loops >= 1 << 20:
+            break
+        loops *= 10 if elapsed < MIN_RUN_TIME / 10 else 2
+
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        func(loops)
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best * 1e9
+
+def build_cases(scale: int, seed: int) -> dict:
+    """Setzt die globalen Daten von main auf synthetische Daten der Größe scale und gibt die Messfälle zurück."""
+    rng = random.Random(seed)
+    main.config = build_guild_configs(scale)
+    guild_id = guild_id_for(scale - 1)
+
+    keywords = build_keywords(scale, rng)
+    main.ai_training = {"servers": {str(guild_id): {"keywords": keywords, "pending_training": {}}}}
+    last_keyword = next(reversed(keywords)).split(",")[0].strip()
+    hit_message = f"Hallo, ich habe ein Problem mit {last_keyword} seit gestern."
+    miss_message = "Hallo, ich habe ein Problem, das niemand kennt."
+
+    main.permissions = build_permissions(scale, guild_id)
+    predicate = main.check_permission("panel_send")(lambda: None).__discord_app_commands_checks__[0]
+    interaction = SimpleNamespace(
+        guild=SimpleNamespace(id=guild_id),
+        user=SimpleNamespace(id=2000000000000000000 + scale - 1, guild_permissions=SimpleNamespace(administrator=False))
+    )
+    member = build_member(scale, staff_role_id=4242)
+    records = build_records(scale)
+    loop = asyncio.new_event_loop()
+
+    def repeat_call(call):
+        def run(loops):
+            for _ in range(loops):
+                call()
+        return run
+
+    async def run_predicate(loops):
+        for _ in range(loops):
+            await predicate(interaction)
+
+    return {
+        "get_ai_response_hit": repeat_call(lambda: main.get_ai_response(guild_id, hit_message)),
+        "get_ai_response_miss": repeat_call(lambda: main.get_ai_response(guild_id, miss_message)),
+        "get_server_config": repeat_call(lambda: main.get_server_config(guild_id)),
+        "get_color": repeat_call(lambda: main.get_color(guild_id, "success")),
+        "is_staff": repeat_call(lambda: main.is_staff(member, 4242)),
+        "check_permission": lambda loops: loop.run_until_complete(run_predicate(loops)),
+        "format_transcript_records": repeat_call(lambda: main.format_transcript_records(records)),
+    }, loop
+
+def run_benchmarks(scales: list, repeat: int, seed: int, only: list) -> dict:
+    results = {}
+    for scale in scales:
+        cases, loop = build_cases(scale, seed)
+        for name, func in cases.items():
+            if only and name not in only:
+                continue
+            key = f"{name}[{scale}]"
+            results[key] = measure(func, repeat)
+            print(f"{key:<40} {format_ns(results[key]):>12}")
+        loop.close()
+    return results
+
+def format_ns(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} µs"
+    return f"{ns:.0f} ns"
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Vergleicht mit der Baseline und gibt die Fälle zurück, die langsamer als erlaubt sind."""
+    regressions = []
+    print(f"\n{'Fall':<40} {'Baseline':>12} {'Aktuell':>12} {'Änderung':>10}")
+    for key, value in results.items():
+        if key not in baseline:
+            print(f"{key:<40} {'-':>12} {format_ns(value):>12} {'neu':>10}")
+            continue
+        change = value / baseline[key] - 1
+        marker = " ❌" if change > tolerance else ""
+        print(f"{key:<40} {format_ns(baseline[key]):>12} {format_ns(value):>12} {change:>+9.1%}{marker}")
+        if change > tolerance:
+            regressions.append(key)
+    return regressions
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Micro-Benchmarks für die Hilfsfunktionen im Interaktionspfad.")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)), help="Kommagetrennte Datengrößen")
+    parser.add_argument("--repeat", type=int, default=5, help="Wiederholungen pro Fall (die beste zählt)")
+    parser.add_argument("--only", default="", help="Nur diese Fälle messen (kommagetrennt)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Pfad der JSON-Baseline")
+    parser.add_argument("--save", action="store_true", help="Ergebnisse als neue Baseline speichern")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Erlaubte Verlangsamung (0.3 = 30%%)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    only = [s.strip() for s in args.only.split(",") if s.strip()]
+    results = run_benchmarks(scales, args.repeat, args.seed, only)
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({"created_at": datetime.now().isoformat(), "python": sys.version.split()[0], "results_ns": results}, f, indent=4)
+        print(f"\nBaseline gespeichert: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\nKeine Baseline unter {args.baseline} gefunden, mit --save anlegen.")
+        return
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)["results_ns"]
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} Fall/Fälle langsamer als {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\nKeine Regressionen.")
+
+if __name__ == "__main__":
+    main_cli()
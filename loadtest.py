@@ -0,0 +1,588 @@
+"""Offline-Lasttest für Ticket-Erstellung und -Schließung.
+
+Ersetzt die Discord-REST-API durch einen lokalen aiohttp-Server mit einstellbarer
+Latenz und 429-Antworten. Gateway-Events (CHANNEL_CREATE, MESSAGE_CREATE, ...) werden
+direkt in den Bot-State gespielt, Interaktionen für Panel-Button und Ticket-Modal
+werden synthetisch erzeugt und laufen durch den normalen discord.py-Dispatch.
+
+Gemessen werden Durchsatz, p50/p99-Latenz, REST-Aufrufe pro Route und die
+Verzögerung der Event-Loop. Alle Dateien landen in einem temporären Verzeichnis.
+
+Beispiel:
+    python loadtest.py --tickets 200 --concurrency 50 --latency 40 --rate-limit 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import count
+
+from aiohttp import web
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DISCORD_EPOCH = 1420070400000
+
+BOT_ID = 900000000000000001
+GUILD_ID = 900000000000000100
+STAFF_ROLE_ID = 900000000000000101
+CATEGORY_ID = 900000000000000102
+PANEL_CHANNEL_ID = 900000000000000103
+LOG_CHANNEL_ID = 900000000000000104
+TRAINING_CHANNEL_ID = 900000000000000105
+STAFF_ID = 900000000000000106
+USER_ID_BASE = 910000000000000000
+CATEGORY_CHANNEL_LIMIT = 50
+
+REASONS = [
+    "Ich habe mein Passwort vergessen und komme nicht mehr in meinen Account.",
+    "Meine Zahlung wurde abgebucht, aber ich habe den Rang nicht bekommen.",
+    "Ein Spieler beleidigt mich seit gestern im Voice-Chat.",
+    "Der Bot reagiert nicht mehr auf meine Befehle im Support-Kanal.",
+    "Wie kann ich mich als Supporter bewerben und wo finde ich die Regeln?",
+]
+
+KEYWORDS = {
+    "passwort": "Setze dein Passwort über die Webseite unter Konto > Sicherheit zurück.",
+    "zahlung": "Zahlungen werden innerhalb von 24 Stunden zugeordnet, bitte halte deine Rechnung bereit.",
+}
+
+
+def snowflake_factory():
+    """Erzeugt fortlaufende Snowflakes mit aktuellem Zeitstempel."""
+    sequence = count()
+
+    def next_id() -> int:
+        return ((int(time.time() * 1000) - DISCORD_EPOCH) << 22) | (next(sequence) & 0x3FFFFF)
+
+    return next_id
+
+def iso_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def percentile(values: list, pct: float) -> float:
+    """Gibt das Perzentil einer Messreihe zurück (0 bei leerer Reihe)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+def json_response(data, status: int = 200, headers: dict = None) -> web.Response:
+    """JSON-Antwort ohne charset im Content-Type, wie sie discord.py von Discord erwartet."""
+    return web.Response(body=json.dumps(data).encode(), status=status, headers={**(headers or {}), "Content-Type": "application/json"})
+
+def user_payload(user_id: int, name: str, bot: bool = False) -> dict:
+    return {"id": str(user_id), "username": name, "discriminator": "0", "global_name": None, "avatar": None, "bot": bot}
+
+def member_payload(user: dict, roles: list) -> dict:
+    return {"user": user, "roles": [str(r) for r in roles], "joined_at": iso_now(), "deaf": False, "mute": False, "flags": 0}
+
+def role_payload(role_id: int, name: str, position: int, permissions: int = 0) -> dict:
+    return {
+        "id": str(role_id), "name": name, "position": position, "permissions": str(permissions),
+        "color": 0, "hoist": False, "managed": False, "mentionable": True, "flags": 0
+    }
+
+def channel_payload(channel_id: int, name: str, channel_type: int = 0, parent_id: int = None, **extra) -> dict:
+    payload = {
+        "id": str(channel_id), "type": channel_type, "guild_id": str(GUILD_ID), "name": name,
+        "position": 0, "permission_overwrites": [], "parent_id": str(parent_id) if parent_id else None, "nsfw": False
+    }
+    payload.update(extra)
+    return payload
+
+def guild_payload(user_count: int) -> dict:
+    """Baut einen GUILD_CREATE-Payload mit Kategorie, Log-/Trainings-Kanal, Staff und Usern."""
+    members = [
+        member_payload(user_payload(BOT_ID, "Custom Tickets", bot=True), []),
+        member_payload(user_payload(STAFF_ID, "staff"), [STAFF_ROLE_ID]),
+    ]
+    members.extend(member_payload(user_payload(USER_ID_BASE + i, f"user{i}"), []) for i in range(user_count))
+    return {
+        "id": str(GUILD_ID),
+        "name": "Lasttest",
+        "owner_id": str(STAFF_ID),
+        "features": [],
+        "emojis": [],
+        "stickers": [],
+        "preferred_locale": "de",
+        "member_count": len(members),
+        "roles": [
+            role_payload(GUILD_ID, "@everyone", 0, permissions=0),
+            role_payload(STAFF_ROLE_ID, "Staff", 1),
+        ],
+        "channels": [
+            channel_payload(CATEGORY_ID, "Tickets", channel_type=4),
+            channel_payload(PANEL_CHANNEL_ID, "support"),
+            channel_payload(LOG_CHANNEL_ID, "ticket-logs"),
+            channel_payload(TRAINING_CHANNEL_ID, "ki-training"),
+        ],
+        "members": members,
+    }
+
+
+class FakeDiscord:
+    """aiohttp-Nachbildung der Discord-REST-API mit Latenz, 429-Antworten und Gateway-Echo."""
+
+    def __init__(self, state, latency: float, jitter: float, rate_limit: float, retry_after: float, seed: int):
+        self.state = state
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.next_id = snowflake_factory()
+        self.calls = Counter()
+        self.rate_limited = 0
+        self.channels = {}
+        self.messages = {}
+        self.callbacks = {}
+        self.waiters = {}
+        self.runner = None
+        self.base_url = None
+
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self.middleware], client_max_size=16 * 1024 * 1024)
+        app.router.add_get("/api/v10/users/@me", self.get_me)
+        app.router.add_post("/api/v10/users/@me/channels", self.create_dm)
+        app.router.add_post("/api/v10/guilds/{guild_id}/channels", self.create_channel)
+        app.router.add_patch("/api/v10/channels/{channel_id}", self.edit_channel)
+        app.router.add_delete("/api/v10/channels/{channel_id}", self.delete_channel)
+        app.router.add_route("*", "/api/v10/channels/{channel_id}/permissions/{target_id}", self.no_content)
+        app.router.add_get("/api/v10/channels/{channel_id}/messages", self.history)
+        app.router.add_post("/api/v10/channels/{channel_id}/messages", self.send_message)
+        app.router.add_patch("/api/v10/channels/{channel_id}/messages/{message_id}", self.edit_message)
+        app.router.add_delete("/api/v10/channels/{channel_id}/messages/{message_id}", self.no_content)
+        app.router.add_post("/api/v10/interactions/{interaction_id}/{token}/callback", self.interaction_callback)
+        app.router.add_post("/api/v10/webhooks/{application_id}/{token}", self.followup)
+        app.router.add_route("*", "/api/v10/webhooks/{application_id}/{token}/messages/{message_id}", self.followup)
+        app.router.add_route("*", "/api/v10/{tail:.*}", self.fallback)
+        return app
+
+    async def start(self):
+        self.runner = web.AppRunner(self.build_app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}/api/v10"
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        self.calls[f"{request.method} {route.replace('/api/v10', '')}"] += 1
+
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self.rate_limit and self.random.random() < self.rate_limit:
+            self.rate_limited += 1
+            return json_response(
+                {"message": "You are being rate limited.", "retry_after": self.retry_after, "global": False},
+                status=429,
+                headers={"Via": "1.1 google", "X-RateLimit-Scope": "user"}
+            )
+        return await handler(request)
+
+    async def read_payload(self, request: web.Request) -> dict:
+        """Liest JSON- oder Multipart-Bodies (Dateien werden verworfen, nur payload_json zählt)."""
+        if request.content_type.startswith("multipart/"):
+            form = await request.post()
+            return json.loads(form.get("payload_json") or "{}")
+        if request.can_read_body:
+            return await request.json()
+        return {}
+
+    def build_message(self, channel_id: int, payload: dict) -> dict:
+        return {
+            "id": str(self.next_id()),
+            "channel_id": str(channel_id),
+            "author": user_payload(BOT_ID, "Custom Tickets", bot=True),
+            "content": payload.get("content") or "",
+            "embeds": payload.get("embeds") or [],
+            "components": payload.get("components") or [],
+            "attachments": [],
+            "mentions": [],
+            "mention_roles": [],
+            "mention_everyone": False,
+            "pinned": False,
+            "tts": False,
+            "type": 0,
+            "flags": payload.get("flags", 0),
+            "timestamp": iso_now(),
+            "edited_timestamp": None,
+        }
+
+    def wait_for(self, token: str, kind: str) -> asyncio.Future:
+        """Gibt ein Future zurück, das beim nächsten Callback bzw. Followup dieser Interaktion erfüllt wird."""
+        future = asyncio.get_running_loop().create_future()
+        self.waiters[(token, kind)] = future
+        return future
+
+    def resolve(self, token: str, kind: str, payload: dict):
+        future = self.waiters.pop((token, kind), None)
+        if future and not future.done():
+            future.set_result(payload)
+
+    async def get_me(self, request: web.Request):
+        return json_response(user_payload(BOT_ID, "Custom Tickets", bot=True))
+
+    async def create_dm(self, request: web.Request):
+        payload = await self.read_payload(request)
+        channel = {"id": str(self.next_id()), "type": 1, "recipients": [user_payload(int(payload["recipient_id"]), "dm")]}
+        self.channels[channel["id"]] = channel
+        return json_response(channel)
+
+    async def create_channel(self, request: web.Request):
+        payload = await self.read_payload(request)
+        parent_id = payload.get("parent_id")
+        if parent_id and sum(channel.get("parent_id") == str(parent_id) for channel in self.channels.values()) >= CATEGORY_CHANNEL_LIMIT:
+            return json_response({"message": "Invalid Form Body", "code": 50035, "errors": {"parent_id": {"_errors": [{"code": "CHANNEL_PARENT_MAX_CHANNELS", "message": "Maximum number of channels in category reached (50)"}]}}}, status=400)
+        channel = channel_payload(
+            self.next_id(), payload["name"], payload.get("type", 0), payload.get("parent_id"),
+            topic=payload.get("topic"), permission_overwrites=payload.get("permission_overwrites", [])
+        )
+        self.channels[channel["id"]] = channel
+        self.state.parse_channel_create(channel)
+        return json_response(channel)
+
+    async def edit_channel(self, request: web.Request):
+        channel = self.channels.get(request.match_info["channel_id"])
+        if channel is None:
+            return json_response({"message": "Unknown Channel", "code": 10003}, status=404)
+        channel.update(await self.read_payload(request))
+        return json_response(channel)
+
+    async def delete_channel(self, request: web.Request):
+        channel = self.channels.pop(request.match_info["channel_id"], None)
+        if channel is None:
+            return json_response({"message": "Unknown Channel", "code": 10003}, status=404)
+        self.messages.pop(channel["id"], None)
+        self.state.parse_channel_delete(channel)
+        return json_response(channel)
+
+    async def history(self, request: web.Request):
+        messages = self.messages.get(request.match_info["channel_id"], [])
+        limit = int(request.query.get("limit", 50))
+        after = int(request.query.get("after", 0))
+        before = int(request.query.get("before", 0)) or float("inf")
+        selected = [m for m in messages if after < int(m["id"]) < before]
+        if "after" in request.query:
+            return json_response(selected[:limit])
+        return json_response(list(reversed(selected))[:limit])
+
+    async def send_message(self, request: web.Request):
+        channel_id = request.match_info["channel_id"]
+        message = self.build_message(int(channel_id), await self.read_payload(request))
+        self.messages.setdefault(channel_id, []).append(message)
+        channel = self.channels.get(channel_id)
+        if channel is not None and channel.get("type") != 1:
+            self.state.parse_message_create(dict(message, guild_id=str(GUILD_ID)))
+        return json_response(message)
+
+    async def edit_message(self, request: web.Request):
+        payload = await self.read_payload(request)
+        for message in self.messages.get(request.match_info["channel_id"], []):
+            if message["id"] == request.match_info["message_id"]:
+                message.update({k: v for k, v in payload.items() if k in ("content", "embeds", "components")})
+                message["edited_timestamp"] = iso_now()
+                return json_response(message)
+        return json_response({"message": "Unknown Message", "code": 10008}, status=404)
+
+    async def interaction_callback(self, request: web.Request):
+        payload = await self.read_payload(request)
+        token = request.match_info["token"]
+        self.callbacks.setdefault(token, []).append(payload)
+        self.resolve(token, "callback", payload)
+        return json_response({"interaction": {"id": request.match_info["interaction_id"], "type": payload.get("type", 0)}})
+
+    async def followup(self, request: web.Request):
+        payload = await self.read_payload(request)
+        token = request.match_info["token"]
+        message = self.build_message(PANEL_CHANNEL_ID, payload)
+        self.resolve(token, "followup", payload)
+        return json_response(message)
+
+    async def no_content(self, request: web.Request):
+        return web.Response(status=204)
+
+    async def fallback(self, request: web.Request):
+        return json_response({})
+
+
+class LoopLagMonitor:
+    """Misst, wie weit ein 10-ms-Timer verspätet aufwacht (Blockaden der Event-Loop)."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples = []
+        self.task = None
+
+    async def run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(time.perf_counter() - start - self.interval)
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+
+
+class LoadTest:
+    """Treibt parallele Ticket-Erstellungen und -Schließungen gegen den Fake-Server."""
+
+    def __init__(self, bot_module, fake: FakeDiscord, timeout: float):
+        self.main = bot_module
+        self.bot = bot_module.bot
+        self.fake = fake
+        self.timeout = timeout
+        self.next_id = snowflake_factory()
+        self.panel_message = None
+
+    def configure_guild(self):
+        """Legt Panel, Log- und Trainings-Kanal sowie KI-Keywords für die Test-Guild an."""
+        server_config = self.main.get_server_config(GUILD_ID)
+        server_config.update({
+            "staff_role_id": STAFF_ROLE_ID,
+            "log_channel_id": LOG_CHANNEL_ID,
+            "ai_training_channel_id": TRAINING_CHANNEL_ID,
+            "panels": {
+                "support": {
+                    "label": "Support",
+                    "emoji": "🎫",
+                    "description": "Allgemeiner Support",
+                    "category_id": CATEGORY_ID,
+                    "staff_role_id": STAFF_ROLE_ID,
+                    "enabled": True
+                }
+            }
+        })
+        self.main.ai_training.setdefault("servers", {})[str(GUILD_ID)] = {"keywords": dict(KEYWORDS), "pending_training": {}}
+
+    async def post_panel(self):
+        embed, view = self.main.render_panel_message(GUILD_ID, "panel", "support")
+        channel = self.bot.get_channel(PANEL_CHANNEL_ID)
+        message = await channel.send(embed=embed, view=view)
+        self.panel_message = self.fake.messages[str(PANEL_CHANNEL_ID)][-1]
+        return message
+
+    def interaction_payload(self, interaction_type: int, user_id: int, channel_id: int, data: dict, message: dict = None) -> dict:
+        user = user_payload(user_id, f"user{user_id - USER_ID_BASE}")
+        payload = {
+            "id": str(self.next_id()),
+            "application_id": str(BOT_ID),
+            "type": interaction_type,
+            "token": f"token-{self.next_id()}",
+            "version": 1,
+            "guild_id": str(GUILD_ID),
+            "channel_id": str(channel_id),
+            "channel": {"id": str(channel_id), "type": 0},
+            "member": dict(member_payload(user, []), permissions="0"),
+            "app_permissions": "0",
+            "locale": "de",
+            "guild_locale": "de",
+            "entitlements": [],
+            "authorizing_integration_owners": {},
+            "data": data,
+        }
+        if message is not None:
+            payload["message"] = message
+        return payload
+
+    async def open_ticket(self, user_id: int, reason: str) -> bool:
+        """Klickt den Panel-Button und schickt das Modal ab, wie es ein User tun würde."""
+        button = self.panel_message["components"][0]["components"][0]
+        click = self.interaction_payload(3, user_id, PANEL_CHANNEL_ID, {"custom_id": button["custom_id"], "component_type": 2}, self.panel_message)
+        callback = self.fake.wait_for(click["token"], "callback")
+        self.bot._connection.parse_interaction_create(click)
+        modal = (await asyncio.wait_for(callback, self.timeout))["data"]
+        # discord.py registriert das Modal erst, nachdem die Callback-Antwort gelesen wurde
+        modals = self.bot._connection._view_store._modals
+        while modal["custom_id"] not in modals:
+            await asyncio.sleep(0.001)
+
+        text_input = modal["components"][0]["components"][0]
+        submit = self.interaction_payload(5, user_id, PANEL_CHANNEL_ID, {
+            "custom_id": modal["custom_id"],
+            "components": [{"type": 1, "components": [{"type": 4, "custom_id": text_input["custom_id"], "value": reason}]}]
+        })
+        followup = self.fake.wait_for(submit["token"], "followup")
+        self.bot._connection.parse_interaction_create(submit)
+        result = await asyncio.wait_for(followup, self.timeout)
+        return "Ticket wurde erstellt" in (result.get("content") or "")
+
+    async def close_ticket(self, channel_id: int) -> bool:
+        """Schließt ein Ticket über TicketControlView.close_ticket (ohne die 5 s Wartezeit der Bestätigung)."""
+        ticket_data = self.main.get_open_ticket(GUILD_ID, channel_id)
+        channel = self.bot.get_channel(channel_id)
+        closer = self.bot.get_guild(GUILD_ID).get_member(STAFF_ID)
+        view = self.main.TicketControlView.from_ticket_data(GUILD_ID, ticket_data)
+        await asyncio.wait_for(view.close_ticket(channel, closer, "Lasttest"), self.timeout)
+        return self.main.get_open_ticket(GUILD_ID, channel_id) is None
+
+    async def wait_close_job(self, channel_id: int) -> bool:
+        """Wartet, bis der Close-Job des Tickets abgearbeitet und der Kanal gelöscht ist."""
+        job_id = f"close_{channel_id}"
+        deadline = time.perf_counter() + self.timeout
+        while job_id in self.main.close_jobs:
+            if self.main.close_jobs[job_id]["status"] == "failed" or time.perf_counter() > deadline:
+                return False
+            await asyncio.sleep(0.005)
+        return str(channel_id) not in self.fake.channels
+
+    async def run_phase(self, name: str, jobs: list, concurrency: int) -> dict:
+        """Führt die Jobs mit begrenzter Parallelität aus und sammelt Latenzen, Fehler und REST-Aufrufe."""
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies, errors = [], Counter()
+        calls_before = Counter(self.fake.calls)
+        limited_before = self.fake.rate_limited
+        monitor = LoopLagMonitor()
+
+        async def timed(job):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    ok = await job()
+                except Exception as e:
+                    errors[type(e).__name__] += 1
+                    return
+                latencies.append(time.perf_counter() - start)
+                if not ok:
+                    errors["Fehlgeschlagen"] += 1
+
+        monitor.start()
+        start = time.perf_counter()
+        await asyncio.gather(*(timed(job) for job in jobs))
+        duration = time.perf_counter() - start
+        await monitor.stop()
+
+        calls = Counter(self.fake.calls)
+        calls.subtract(calls_before)
+        return {
+            "phase": name,
+            "operations": len(jobs),
+            "errors": dict(errors),
+            "duration_s": round(duration, 3),
+            "throughput_per_s": round(len(jobs) / duration, 2) if duration else 0.0,
+            "latency_p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+            "latency_p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "rest_calls": sum(calls.values()),
+            "rest_calls_per_op": round(sum(calls.values()) / len(jobs), 2) if jobs else 0.0,
+            "rest_routes": {route: n for route, n in calls.most_common() if n},
+            "rate_limited": self.fake.rate_limited - limited_before,
+            "loop_lag_p99_ms": round(percentile(monitor.samples, 0.99) * 1000, 2),
+            "loop_lag_max_ms": round(max(monitor.samples, default=0.0) * 1000, 2),
+        }
+
+
+def print_report(result: dict):
+    print(f"\n=== {result['phase']} ===")
+    if "flows" in result:
+        for row in result["flows"]:
+            per_run = f"{row['per_run']:.2f}" if row["per_run"] is not None else "-"
+            budget = row["budget"] if row["budget"] is not None else "-"
+            marker = "  ⚠️ über Budget" if row["over_budget"] else ""
+            print(f"{row['flow']:<22} {row['runs']:>5} Läufe  {per_run:>6} Aufrufe/Lauf  Budget {budget}{marker}")
+        return
+    print(f"Operationen:        {result['operations']} in {result['duration_s']}s ({result['throughput_per_s']}/s)")
+    print(f"Fehler:             {result['errors'] or 'keine'}")
+    print(f"Latenz p50/p99:     {result['latency_p50_ms']} ms / {result['latency_p99_ms']} ms")
+    print(f"REST-Aufrufe:       {result['rest_calls']} ({result['rest_calls_per_op']} pro Operation, {result['rate_limited']}x 429)")
+    print(f"Event-Loop-Lag:     p99 {result['loop_lag_p99_ms']} ms, max {result['loop_lag_max_ms']} ms")
+    for route, n in result["rest_routes"].items():
+        print(f"  {n:6d}  {route}")
+
+async def run(args) -> list:
+    # main erst im temporären Arbeitsverzeichnis importieren, damit Konfiguration,
+    # Transkripte und Trainingsdaten nicht die echten Dateien überschreiben
+    workdir = tempfile.mkdtemp(prefix="tickets-loadtest-")
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_DIR)
+    import discord
+    import main as bot_module
+
+    bot = bot_module.bot
+    fake = FakeDiscord(bot._connection, args.latency / 1000, args.jitter / 1000, args.rate_limit, args.retry_after, args.seed)
+    await fake.start()
+    discord.http.Route.BASE = fake.base_url
+
+    data = await bot.http.static_login("loadtest")
+    bot._connection.user = discord.ClientUser(state=bot._connection, data=data)
+    bot._connection.application_id = BOT_ID
+    await bot._async_setup_hook()
+    await bot_module.setup_persistent_views()
+    bot_module.start_close_job_workers()
+
+    bot._connection._add_guild(discord.Guild(data=guild_payload(args.tickets), state=bot._connection))
+    for channel in guild_payload(0)["channels"]:
+        fake.channels[channel["id"]] = channel
+
+    test = LoadTest(bot_module, fake, args.timeout)
+    test.configure_guild()
+    await test.post_panel()
+    print(f"Arbeitsverzeichnis: {workdir}")
+
+    rng = random.Random(args.seed)
+    opens = [
+        (lambda uid=USER_ID_BASE + i, reason=rng.choice(REASONS): test.open_ticket(uid, reason))
+        for i in range(args.tickets)
+    ]
+    results = [await test.run_phase("Tickets öffnen", opens, args.concurrency)]
+
+    await bot_module.flush_transcript_buffers()
+    open_channels = [int(cid) for cid in bot_module.get_server_config(GUILD_ID).get("open_tickets", {})]
+    closes = [(lambda cid=cid: test.close_ticket(cid)) for cid in open_channels]
+    results.append(await test.run_phase("Tickets schließen", closes, args.concurrency))
+    # Die Close-Jobs laufen schon während der Schließ-Phase; gemessen wird die Restzeit bis zur Löschung
+    waits = [(lambda cid=cid: test.wait_close_job(cid)) for cid in open_channels]
+    results.append(await test.run_phase("Close-Jobs abarbeiten", waits, len(waits) or 1))
+
+    results.append({"phase": "REST-Budget", "flows": [
+        {k: v for k, v in row.items() if k != "routes"} for row in bot_module.rest_budget_report()
+    ]})
+
+    await bot.http.close()
+    await fake.stop()
+    return results
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Offline-Lasttest für Ticket-Erstellung und -Schließung.")
+    parser.add_argument("--tickets", type=int, default=50, help="Anzahl Tickets (je ein eigener User)")
+    parser.add_argument("--concurrency", type=int, default=0, help="Maximal parallele Operationen (Standard: alle)")
+    parser.add_argument("--latency", type=float, default=30.0, help="Basis-Latenz pro REST-Aufruf in ms")
+    parser.add_argument("--jitter", type=float, default=20.0, help="Zusätzliche zufällige Latenz in ms")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Anteil der Anfragen, die mit 429 beantwortet werden (0-1)")
+    parser.add_argument("--retry-after", type=float, default=0.05, help="retry_after der 429-Antworten in Sekunden")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout pro Operation in Sekunden")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Ergebnis zusätzlich als JSON in diese Datei schreiben")
+    args = parser.parse_args()
+    args.concurrency = args.concurrency or args.tickets
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    results = asyncio.run(run(args))
+    for result in results:
+        print_report(result)
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main_cli()
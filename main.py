@@ -1,21 +1,87 @@
+import builtins
+import os
+import time
+
+# --- Startup-Profiler ---
+# Mit TICKETS_PROFILE_STARTUP=1 wird die Importzeit je Top-Level-Modul gemessen
+STARTUP_TIME = time.perf_counter()
+PROFILE_STARTUP = os.environ.get("TICKETS_PROFILE_STARTUP") == "1"
+import_timings = {}
+_original_import = builtins.__import__
+_import_depth = 0
+
+def _profiled_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """Misst nur äußere Importe, verschachtelte zählen zum aufrufenden Modul."""
+    global _import_depth
+    if _import_depth or level:
+        return _original_import(name, globals, locals, fromlist, level)
+    _import_depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _import_depth -= 1
+        root = name.split(".")[0]
+        import_timings[root] = import_timings.get(root, 0) + time.perf_counter() - start
+
+if PROFILE_STARTUP:
+    builtins.__import__ = _profiled_import
+
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands, ui
 import asyncio
-import os
+import hashlib
+import heapq
+import hmac
+import html
+import io
 import json
+import random
+import re
+import signal
+import sys
+import threading
+import traceback
+from collections import OrderedDict, deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
 from datetime import datetime
+from functools import wraps
 from typing import Optional, Dict, List
-from aiohttp import web
-from discord.types.embed import EmbedField
+from aiohttp import web, ClientSession, ClientTimeout
+
+# --- Startup-Messung ---
+startup_phases: List[tuple] = []
+
+def mark_startup_phase(name: str, always: bool = False):
+    """Merkt die seit dem Prozessstart vergangene Zeit für eine Startphase; ausgegeben nur mit TICKETS_PROFILE_STARTUP=1."""
+    elapsed = time.perf_counter() - STARTUP_TIME
+    startup_phases.append((name, elapsed))
+    if PROFILE_STARTUP or always:
+        print(f"⏱️ {name}: {elapsed:.2f}s")
+
+def print_import_profile():
+    """Gibt die gemessenen Importzeiten aus und entfernt den Import-Hook."""
+    builtins.__import__ = _original_import
+    print("📦 Importzeiten:")
+    for name, seconds in sorted(import_timings.items(), key=lambda item: -item[1]):
+        print(f"   ├─ {name}: {seconds * 1000:.1f} ms")
+
+mark_startup_phase("Importe geladen")
 
 # --- Health Check Server ---
+# Mit TICKETS_ADMIN_TOKEN werden zusätzlich die Admin-Endpunkte (/admin/...) freigeschaltet
+ADMIN_TOKEN = os.environ.get("TICKETS_ADMIN_TOKEN", "")
+
 async def handle_health(request):
     return web.Response(text="Custom Tickets Bot läuft erfolgreich!", content_type="text/plain")
 
 async def start_health_server():
     app = web.Application()
     app.router.add_get("/", handle_health)
+    if ADMIN_TOKEN:
+        add_admin_routes(app)
     runner = web.AppRunner(app)
     await runner.setup()
     port = int(os.environ.get("PORT", 5000))
@@ -27,6 +93,8 @@ async def start_health_server():
 CONFIG_FILE = "ticket_config.json"
 AI_TRAINING_FILE = "ai_training.json"
 PERMISSIONS_FILE = "permissions.json"
+JOBS_FILE = "jobs.json"
+CLOSE_JOBS_FILE = "close_jobs.jsonl"
 
 def load_config():
     """Lädt die Konfiguration aus der JSON-Datei."""
@@ -37,10 +105,28 @@ def load_config():
         "servers": {}
     }
 
-def save_config(config):
-    """Speichert die Konfiguration in der JSON-Datei."""
-    with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(config, f, indent=4, ensure_ascii=False)
+config_file_lock = threading.Lock()
+config_generation = 0
+config_written_generation = 0
+
+def save_config(config, generation: Optional[int] = None):
+    """Speichert die Konfiguration atomar in der JSON-Datei; ein älterer Stand überschreibt nie einen neueren.
+
+    Ohne generation wird der aktuelle Stand direkt geschrieben, mit generation ein
+    Snapshot von flush_config (im Worker-Thread).
+    """
+    global config_generation, config_written_generation
+    if generation is None:
+        config_generation += 1
+        generation = config_generation
+    with config_file_lock:
+        if generation < config_written_generation:
+            return
+        tmp_path = CONFIG_FILE + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, CONFIG_FILE)
+        config_written_generation = generation
 
 def load_ai_training():
     """Lädt AI Training Daten."""
@@ -66,15 +152,273 @@ def save_permissions(data):
     with open(PERMISSIONS_FILE, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
 
+def load_jobs():
+    """Lädt den Zustand der Hintergrund-Jobs."""
+    if os.path.exists(JOBS_FILE):
+        with open(JOBS_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {"jobs": {}}
+
+def save_jobs(data):
+    """Speichert den Zustand der Hintergrund-Jobs."""
+    with open(JOBS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+
+def load_close_jobs(legacy: dict) -> dict:
+    """Spielt das Close-Job-Journal ab (put überschreibt, remove löscht) und schreibt es bei Bedarf kompakt neu."""
+    close_jobs = dict(legacy)
+    lines = 0
+    if os.path.exists(CLOSE_JOBS_FILE):
+        with open(CLOSE_JOBS_FILE, 'r', encoding='utf-8') as f:
+            for line in f:
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Beim Absturz halb geschriebene letzte Zeile
+                    continue
+                if entry["op"] == "put":
+                    close_jobs[entry["job"]["id"]] = entry["job"]
+                else:
+                    close_jobs.pop(entry["id"], None)
+    # Nur neu schreiben, wenn sich Zeilen zusammenfassen lassen oder alte Jobs übernommen wurden
+    if legacy or lines > len(close_jobs):
+        compact_close_jobs(close_jobs)
+    return close_jobs
+
+def compact_close_jobs(close_jobs: dict):
+    """Schreibt das Journal mit einem Eintrag pro offenem Job neu."""
+    tmp_path = CLOSE_JOBS_FILE + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps({"op": "put", "job": job}, ensure_ascii=False) + "\n" for job in close_jobs.values())
+    os.replace(tmp_path, CLOSE_JOBS_FILE)
+
 # Konfiguration laden
 config = load_config()
-save_config(config)
 ai_training = load_ai_training()
 permissions = load_permissions()
+jobs = load_jobs()
+# Close-Jobs lagen früher in jobs.json und werden ins Journal übernommen
+legacy_close_jobs = jobs.pop("close_jobs", {})
+close_jobs = load_close_jobs(legacy_close_jobs)
+if legacy_close_jobs:
+    save_jobs(jobs)
+
+# --- Guild-Speicher ---
+# Inaktive Server werden nach LRU aus dem Speicher in guild_store/<id>.json ausgelagert und
+# beim nächsten Zugriff nachgeladen; Daten entfernter Server werden nach einer Frist archiviert
+GUILD_STORE_DIR = "guild_store"
+GUILD_ARCHIVE_DIR = f"{GUILD_STORE_DIR}/archive"
+GUILD_CACHE_CAPACITY = int(os.environ.get("TICKETS_GUILD_CACHE", "1000"))
+GUILD_ARCHIVE_GRACE = float(os.environ.get("TICKETS_GUILD_GRACE_DAYS", "30")) * 86400
+MEMORY_REPORT_LIMIT = 20
+guild_lru: OrderedDict = OrderedDict((guild_id_str, True) for guild_id_str in config["servers"])
+evicted_guilds: set = set()
+
+def get_guild_store_path(guild_id_str: str) -> str:
+    return f"{GUILD_STORE_DIR}/{guild_id_str}.json"
+
+def write_json_atomic(path: str, data: dict):
+    """Schreibt JSON über eine temporäre Datei, damit bei einem Absturz keine halbe Datei bleibt."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def load_evicted_guilds():
+    """Sucht ausgelagerte Server; liegt ein Server noch in der Hauptdatei, gilt dieser Stand."""
+    if not os.path.isdir(GUILD_STORE_DIR):
+        return
+    for filename in os.listdir(GUILD_STORE_DIR):
+        guild_id_str = filename[:-len(".json")]
+        if not filename.endswith(".json") or not guild_id_str.isdigit() or guild_id_str in config["servers"]:
+            continue
+        evicted_guilds.add(guild_id_str)
+        # Reste eines beim Auslagern unterbrochenen Speicherns, die Kopie im Store ist aktuell
+        permissions["servers"].pop(guild_id_str, None)
+        ai_training["servers"].pop(guild_id_str, None)
+
+load_evicted_guilds()
+
+def touch_guild(guild_id_str: str):
+    """Markiert einen Server als benutzt und lädt ihn bei Bedarf aus dem Guild-Speicher nach."""
+    try:
+        guild_lru.move_to_end(guild_id_str)
+    except KeyError:
+        if guild_id_str in evicted_guilds:
+            restore_guild(guild_id_str)
+        guild_lru[guild_id_str] = True
+
+def restore_guild(guild_id_str: str):
+    """Lädt einen ausgelagerten Server zurück. Die Store-Datei bleibt, bis sie beim nächsten Auslagern ersetzt wird."""
+    with open(get_guild_store_path(guild_id_str), 'r', encoding='utf-8') as f:
+        stored = json.load(f)
+    evicted_guilds.discard(guild_id_str)
+    if stored.get("config") is not None:
+        config["servers"][guild_id_str] = stored["config"]
+    if stored.get("permissions") is not None:
+        permissions["servers"][guild_id_str] = stored["permissions"]
+    if stored.get("ai_training") is not None:
+        ai_training["servers"][guild_id_str] = stored["ai_training"]
+    print(f"📥 Server {guild_id_str} aus dem Guild-Speicher geladen")
+
+def guild_is_pinned(guild_id_str: str) -> bool:
+    """Server mit offenen Tickets, Trainings-Anfragen oder laufenden Jobs bleiben im Speicher."""
+    if config["servers"].get(guild_id_str, {}).get("open_tickets"):
+        return True
+    server_training = ai_training["servers"].get(guild_id_str, {})
+    if server_training.get("pending_training") or server_training.get("training_clusters"):
+        return True
+    guild_id = int(guild_id_str)
+    return any(job["guild_id"] == guild_id and job["status"] == "running" for job in jobs["jobs"].values()) \
+        or any(job["guild_id"] == guild_id for job in close_jobs.values())
+
+def pop_guild_state(guild_id_str: str) -> dict:
+    """Entfernt alle residenten Daten eines Servers und gibt sie zurück."""
+    training_indexes.pop(guild_id_str, None)
+    semantic_indexes.pop(guild_id_str, None)
+    for panel_key, panel_data in config["servers"].get(guild_id_str, {}).get("panels", {}).items():
+        for category_id in [panel_data.get("category_id", 0)] + panel_data.get("overflow_category_ids", []):
+            category_channel_ids.pop(category_id, None)
+        category_overflow_locks.pop((int(guild_id_str), panel_key), None)
+    return {
+        "guild_id": guild_id_str,
+        "config": config["servers"].pop(guild_id_str, None),
+        "permissions": permissions["servers"].pop(guild_id_str, None),
+        "ai_training": ai_training["servers"].pop(guild_id_str, None)
+    }
+
+def save_guild_files(ai_changed: bool):
+    save_config(config)
+    save_permissions(permissions)
+    if ai_changed:
+        mark_ai_training_dirty()
+
+def evict_inactive_guilds() -> int:
+    """Lagert die am längsten unbenutzten Server aus, bis die Kapazität eingehalten wird."""
+    excess = len(guild_lru) - GUILD_CACHE_CAPACITY
+    if excess <= 0:
+        return 0
+    os.makedirs(GUILD_STORE_DIR, exist_ok=True)
+    evicted = []
+    for guild_id_str in list(guild_lru):
+        if len(evicted) >= excess:
+            break
+        if guild_is_pinned(guild_id_str) or guild_id_str in config.get("removed_guilds", {}):
+            continue
+        write_json_atomic(get_guild_store_path(guild_id_str), pop_guild_state(guild_id_str))
+        del guild_lru[guild_id_str]
+        evicted_guilds.add(guild_id_str)
+        evicted.append(guild_id_str)
+    if evicted:
+        save_guild_files(ai_changed=True)
+    return len(evicted)
+
+def mark_guild_removed(guild_id: int):
+    """Merkt einen entfernten Server für die spätere Archivierung vor."""
+    config.setdefault("removed_guilds", {}).setdefault(str(guild_id), datetime.now().timestamp())
+    save_config(config)
+
+def unmark_guild_removed(guild_id: int):
+    if config.get("removed_guilds", {}).pop(str(guild_id), None) is not None:
+        save_config(config)
+
+def archive_removed_guilds() -> int:
+    """Archiviert die Daten von Servern, die länger als die Frist entfernt sind."""
+    now = datetime.now().timestamp()
+    removed = config.get("removed_guilds", {})
+    expired = [guild_id_str for guild_id_str, removed_at in removed.items() if now - removed_at >= GUILD_ARCHIVE_GRACE]
+    if not expired:
+        return 0
+    os.makedirs(GUILD_ARCHIVE_DIR, exist_ok=True)
+    for guild_id_str in expired:
+        archive_path = f"{GUILD_ARCHIVE_DIR}/{guild_id_str}-{int(now)}.json"
+        if guild_id_str in evicted_guilds:
+            os.replace(get_guild_store_path(guild_id_str), archive_path)
+            evicted_guilds.discard(guild_id_str)
+        else:
+            write_json_atomic(archive_path, dict(pop_guild_state(guild_id_str), removed_at=removed[guild_id_str]))
+            if os.path.exists(get_guild_store_path(guild_id_str)):
+                os.remove(get_guild_store_path(guild_id_str))
+        guild_lru.pop(guild_id_str, None)
+        del removed[guild_id_str]
+        print(f"📦 Daten des entfernten Servers {guild_id_str} archiviert: {archive_path}")
+    save_guild_files(ai_changed=True)
+    return len(expired)
+
+def deep_sizeof(obj, seen: set = None) -> int:
+    """Ungefährer Speicherbedarf eines verschachtelten Objekts (dict/list/set/str/Zahlen) in Bytes."""
+    if obj is None:
+        return 0
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+def guild_memory_usage(guild_id_str: str) -> Dict[str, int]:
+    """Speicherbedarf eines residenten Servers je Bereich in Bytes."""
+    usage = {
+        "config": deep_sizeof(config["servers"].get(guild_id_str)),
+        "permissions": deep_sizeof(permissions["servers"].get(guild_id_str)),
+        "ai_training": deep_sizeof(ai_training["servers"].get(guild_id_str)),
+        "training_index": deep_sizeof(training_indexes.get(guild_id_str)),
+        "semantic_index": deep_sizeof(getattr(semantic_indexes.get(guild_id_str), "keys", None))
+    }
+    usage["total"] = sum(usage.values())
+    return usage
+
+def process_rss_bytes() -> Optional[int]:
+    """Aktueller Resident Set Size des Prozesses (nur unter Linux verfügbar)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def memory_report(limit: int = MEMORY_REPORT_LIMIT) -> dict:
+    """Speicherbericht über alle residenten Server, die größten zuerst."""
+    resident = set(config["servers"]) | set(permissions["servers"]) | set(ai_training["servers"])
+    usages = {guild_id_str: guild_memory_usage(guild_id_str) for guild_id_str in resident}
+    largest = sorted(usages.items(), key=lambda item: -item[1]["total"])[:limit]
+    return {
+        "process_rss_bytes": process_rss_bytes(),
+        "resident_guilds": len(resident),
+        "evicted_guilds": len(evicted_guilds),
+        "removed_guilds": len(config.get("removed_guilds", {})),
+        "capacity": GUILD_CACHE_CAPACITY,
+        "resident_bytes": sum(usage["total"] for usage in usages.values()),
+        "guilds": [dict(usage, guild_id=guild_id_str) for guild_id_str, usage in largest]
+    }
+
+async def handle_memory(request: web.Request):
+    """GET /admin/memory?limit=N - Speicherbedarf pro Server (nur mit Admin-Token)."""
+    limit = request.query.get("limit", "")
+    limit = min(int(limit), 1000) if limit.isdigit() else MEMORY_REPORT_LIMIT
+    return web.json_response(memory_report(limit))
+
+@tasks.loop(minutes=10)
+async def guild_state_janitor():
+    """Archiviert entfernte Server nach Ablauf der Frist und lagert inaktive Server aus."""
+    try:
+        archived = archive_removed_guilds()
+        evicted = evict_inactive_guilds()
+        if archived or evicted:
+            print(f"🧹 Guild-Speicher: {archived} archiviert, {evicted} ausgelagert, {len(guild_lru)} resident")
+    except Exception as e:
+        print(f"<:4934error:1459953806870708388> Fehler beim Aufräumen des Guild-Speichers: {e}")
+mark_startup_phase("Konfiguration geladen")
 
 def get_server_config(guild_id: int):
     """Gibt die Konfiguration für einen bestimmten Server zurück."""
     guild_id_str = str(guild_id)
+    touch_guild(guild_id_str)
     if guild_id_str not in config["servers"]:
         config["servers"][guild_id_str] = {
             "panels": {},
@@ -94,6 +438,10 @@ def get_server_config(guild_id: int):
         save_config(config)
     return config["servers"][guild_id_str]
 
+def get_transcript_dir(guild_id: int) -> str:
+    """Gibt das Transkript-Verzeichnis eines Servers zurück."""
+    return get_server_config(guild_id).get("transcript_path") or f"transcripts/{guild_id}"
+
 def get_color(guild_id: int, color_name: str):
     """Gibt eine Embed-Farbe für den Server zurück."""
     server_config = get_server_config(guild_id)
@@ -114,6 +462,8 @@ def check_permission(command_name: str):
         if interaction.user.guild_permissions.administrator:
             return True
 
+        touch_guild(guild_id_str)
+
         if guild_id_str in permissions["servers"]:
             server_perms = permissions["servers"][guild_id_str]
             user_perms = server_perms.get("users", {}).get(user_id_str, [])
@@ -145,6 +495,15 @@ async def log_action(guild: discord.Guild, message: str, color_name: str = "info
         pass
 
 # --- AI Helper Functions ---
+def match_ai_keywords(keywords: dict, message: str) -> Optional[str]:
+    """Gibt den ersten Keyword-Schlüssel zurück, dessen Keywords in der Nachricht vorkommen."""
+    message_lower = message.lower()
+    for keyword_str in keywords:
+        keyword_list = [k.strip().lower() for k in keyword_str.split(",")]
+        if any(k in message_lower for k in keyword_list):
+            return keyword_str
+    return None
+
 def get_ai_response(guild_id: int, message: str):
     """Sucht nach einer passenden Antwort in den AI-Keywords."""
     guild_id_str = str(guild_id)
@@ -152,56 +511,1285 @@ def get_ai_response(guild_id: int, message: str):
         return None
 
     keywords = ai_training["servers"][guild_id_str].get("keywords", {})
-    message_lower = message.lower()
-
-    for keyword_str, response in keywords.items():
-        keyword_list = [k.strip().lower() for k in keyword_str.split(",")]
-        if any(k in message_lower for k in keyword_list):
-            return response
+    keyword_str = match_ai_keywords(keywords, message)
+    if keyword_str is not None:
+        return keywords[keyword_str]
+
+    # Zweite Stufe: semantische Suche über trainierte Anfragen
+    if get_server_config(guild_id).get("ai_semantic", 0):
+        index = get_semantic_index(guild_id_str)
+        if index:
+            for keyword_str, score in index.search(message, 1):
+                if score >= SEMANTIC_THRESHOLD and keyword_str in keywords:
+                    return keywords[keyword_str]
     return None
 
-async def request_ai_training(channel: discord.TextChannel, reason: str, ticket_id: int, creator: discord.Member):
-    """Sendet eine Anfrage für KI-Training in den Admin-Kanal."""
-    server_config = get_server_config(channel.guild.id)
-    ai_channel_id = server_config.get("ai_training_channel_id", 0)
-    if not ai_channel_id:
-        return
-
-    ai_channel = channel.guild.get_channel(ai_channel_id)
-    if not ai_channel:
+# --- KI-Training-Warteschlange ---
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+TRAINING_SIMILARITY = 0.5
+TRAINING_EDIT_DELAY = 5
+MINHASH_PRIME = (1 << 61) - 1
+_minhash_random = random.Random(0x7417)
+MINHASH_COEFFICIENTS = [(_minhash_random.randrange(1, MINHASH_PRIME), _minhash_random.randrange(0, MINHASH_PRIME)) for _ in range(MINHASH_PERMUTATIONS)]
+TOKEN_PATTERN = re.compile(r"\w+")
+
+training_indexes: Dict[str, dict] = {}
+pending_training_edits: Dict[str, asyncio.Task] = {}
+ai_training_dirty = False
+ai_training_save_lock = asyncio.Lock()
+
+def normalize_tokens(text: str) -> List[str]:
+    """Zerlegt einen Text in normalisierte Tokens (klein, ohne Satzzeichen)."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+def minhash_signature(text: str) -> List[int]:
+    """Berechnet die MinHash-Signatur aus Wort-Uni- und Bigrammen eines Textes."""
+    tokens = normalize_tokens(text)
+    shingles = set(tokens) | {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+    if not shingles:
+        return [MINHASH_PRIME] * MINHASH_PERMUTATIONS
+    hashes = [int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big") for shingle in shingles]
+    return [min((a * h + b) % MINHASH_PRIME for h in hashes) for a, b in MINHASH_COEFFICIENTS]
+
+def signature_similarity(a: List[int], b: List[int]) -> float:
+    """Schätzt die Jaccard-Ähnlichkeit zweier Signaturen."""
+    return sum(x == y for x, y in zip(a, b)) / MINHASH_PERMUTATIONS
+
+def signature_bands(signature: List[int]) -> List[tuple]:
+    """Teilt eine Signatur in LSH-Bänder auf."""
+    rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+    return [(band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(MINHASH_BANDS)]
+
+def get_training_index(guild_id_str: str) -> dict:
+    """Gibt den LSH-Index der offenen Trainings-Cluster eines Servers zurück (lazy aufgebaut)."""
+    if guild_id_str not in training_indexes:
+        index = {"buckets": {}, "signatures": {}}
+        clusters = ai_training["servers"].get(guild_id_str, {}).get("training_clusters", {})
+        for cluster_id, cluster in clusters.items():
+            # Cluster ohne Nachricht (Senden fehlgeschlagen) sieht kein Teammitglied, nichts mehr zuordnen
+            if cluster.get("message_id"):
+                add_to_training_index(index, cluster_id, minhash_signature(cluster["reason"]))
+        training_indexes[guild_id_str] = index
+    return training_indexes[guild_id_str]
+
+def add_to_training_index(index: dict, cluster_id: str, signature: List[int]):
+    index["signatures"][cluster_id] = signature
+    for band in signature_bands(signature):
+        index["buckets"].setdefault(band, set()).add(cluster_id)
+
+def remove_from_training_index(guild_id_str: str, cluster_id: str):
+    index = training_indexes.get(guild_id_str)
+    if not index:
         return
-
-    staff_role = channel.guild.get_role(server_config.get("staff_role_id", 0))
+    signature = index["signatures"].pop(cluster_id, None)
+    if signature:
+        for band in signature_bands(signature):
+            index["buckets"].get(band, set()).discard(cluster_id)
+
+def find_training_cluster(guild_id_str: str, signature: List[int]) -> Optional[str]:
+    """Sucht den ähnlichsten offenen Cluster über die LSH-Buckets."""
+    index = get_training_index(guild_id_str)
+    candidates = set()
+    for band in signature_bands(signature):
+        candidates |= index["buckets"].get(band, set())
+
+    best_id, best_score = None, TRAINING_SIMILARITY
+    for cluster_id in candidates:
+        score = signature_similarity(signature, index["signatures"][cluster_id])
+        if score >= best_score:
+            best_id, best_score = cluster_id, score
+    return best_id
+
+training_message_index: Optional[Dict[int, str]] = None
+
+def get_training_message_index() -> Dict[int, str]:
+    """Gibt den Index Nachrichten-ID -> Cluster-ID aller offenen Trainings-Anfragen zurück."""
+    global training_message_index
+    if training_message_index is None:
+        training_message_index = {
+            cluster["message_id"]: cluster_id
+            for server_training in ai_training["servers"].values()
+            for cluster_id, cluster in server_training.get("training_clusters", {}).items()
+            if cluster.get("message_id")
+        }
+    return training_message_index
+
+LEGACY_TRAINING_PATTERN = re.compile(r"\*\*Ticket:\*\* <#(?P<channel_id>\d+)>.*?\*\*Grund:\*\*\n```(?P<reason>.*)```", re.S)
+
+def find_legacy_training(guild_id: int, message: discord.Message) -> str:
+    """Ordnet eine alte Trainings-Nachricht ohne Cluster-ID über Kanal und Grund im Embed ihrer Anfrage zu."""
+    match = LEGACY_TRAINING_PATTERN.search(message.embeds[0].description or "") if message.embeds else None
+    if not match:
+        return ""
+    server_training = ai_training["servers"].get(str(guild_id), {})
+    channel_id = int(match["channel_id"])
+    candidates = [
+        training_id for training_id, entry in server_training.get("pending_training", {}).items()
+        if entry.get("channel_id") == channel_id and entry.get("reason") == match["reason"]
+    ]
+    if not candidates:
+        return ""
+    # Wurde die Anfrage inzwischen einem Cluster zugeordnet, gilt der Cluster
+    for cluster_id, cluster in server_training.get("training_clusters", {}).items():
+        if candidates[0] in cluster.get("entries", []):
+            return cluster_id
+    return candidates[0]
+
+def mark_ai_training_dirty():
+    """Merkt Änderungen an den Trainingsdaten für das nächste gesammelte Speichern vor."""
+    global ai_training_dirty
+    ai_training_dirty = True
+
+async def flush_ai_training():
+    """Speichert die Trainingsdaten, falls sich etwas geändert hat (nie zwei Schreibvorgänge gleichzeitig)."""
+    global ai_training_dirty
+    async with ai_training_save_lock:
+        if not ai_training_dirty:
+            return
+        ai_training_dirty = False
+        snapshot = json.loads(json.dumps(ai_training))
+        try:
+            await asyncio.to_thread(save_ai_training, snapshot)
+        except Exception:
+            # Änderungen beim nächsten Durchlauf erneut schreiben
+            ai_training_dirty = True
+            raise
+
+def build_training_embed(guild: discord.Guild, cluster: dict) -> discord.Embed:
+    """Erstellt das Embed einer Trainings-Anfrage inklusive Trefferzahl."""
+    pending = ai_training["servers"].get(str(guild.id), {}).get("pending_training", {})
+    entries = [pending[training_id] for training_id in cluster["entries"] if training_id in pending]
+    first = entries[0] if entries else {}
 
     embed = discord.Embed(
         title="KI-Training benötigt!",
-        description=f"Ein neues Ticket wurde erstellt, aber die KI konnte keine passende Antwort finden.\n\n**Ticket:** <#{channel.id}>\n**Ersteller:** {creator.mention}\n**Grund:**\n```{reason}```",
-        color=get_color(channel.guild.id, "warning"),
+        description=f"Ein neues Ticket wurde erstellt, aber die KI konnte keine passende Antwort finden.\n\n**Ticket:** <#{first.get('channel_id', 0)}>\n**Ersteller:** <@{first.get('creator_id', 0)}>\n**Grund:**\n```{cluster['reason']}```",
+        color=get_color(guild.id, "warning"),
         timestamp=datetime.now()
     )
+    if len(entries) > 1:
+        recent = ", ".join(f"<#{entry['channel_id']}>" for entry in entries[-5:])
+        embed.add_field(name=f"Ähnliche Anfragen ({len(entries)})", value=f"Zuletzt: {recent}", inline=False)
     embed.add_field(name="Aktion erforderlich", value="Nutze die Buttons unten, um der KI beizubringen, wie sie auf ähnliche Anfragen reagieren soll.", inline=False)
 
     bot_avatar = bot.user.display_avatar.url if bot.user and bot.user.display_avatar else None
     embed.set_footer(text="© Custom Tickets by Custom Discord Development", icon_url=bot_avatar)
+    return embed
+
+def schedule_training_edit(guild: discord.Guild, cluster_id: str):
+    """Fasst mehrere Treffer kurz hintereinander zu einer Nachrichtenbearbeitung zusammen."""
+    if cluster_id not in pending_training_edits:
+        pending_training_edits[cluster_id] = asyncio.create_task(edit_training_message_later(guild, cluster_id))
+
+async def edit_training_message_later(guild: discord.Guild, cluster_id: str):
+    await asyncio.sleep(TRAINING_EDIT_DELAY)
+    pending_training_edits.pop(cluster_id, None)
+    cluster = ai_training["servers"].get(str(guild.id), {}).get("training_clusters", {}).get(cluster_id)
+    if not cluster or not cluster.get("message_id"):
+        return
+    ai_channel = guild.get_channel(cluster["channel_id"])
+    if not ai_channel:
+        return
+    try:
+        await queue_message_edit(ai_channel.get_partial_message(cluster["message_id"]), embed=build_training_embed(guild, cluster))
+    except Exception as e:
+        print(f"Fehler beim Aktualisieren der Trainings-Anfrage {cluster_id}: {e}")
+
+def resolve_training_cluster(guild_id: int, cluster_id: str) -> List[str]:
+    """Entfernt einen Cluster samt aller zugehörigen offenen Anfragen und gibt deren IDs zurück."""
+    guild_id_str = str(guild_id)
+    server_training = ai_training["servers"].get(guild_id_str, {})
+    pending = server_training.get("pending_training", {})
+    cluster = server_training.get("training_clusters", {}).pop(cluster_id, None)
+    remove_from_training_index(guild_id_str, cluster_id)
+    if cluster and cluster.get("message_id"):
+        get_training_message_index().pop(cluster["message_id"], None)
+
+    # Einzelne Anfragen aus der Zeit vor den Clustern
+    training_ids = cluster["entries"] if cluster else [cluster_id]
+    resolved = [training_id for training_id in training_ids if pending.pop(training_id, None) is not None]
+    mark_ai_training_dirty()
+    return resolved
+
+TRAINING_MAX_AGE_DAYS = 14
+TRAINING_MAX_PENDING = 100
+TRAINING_EDIT_BATCH = 5
+TRAINING_EDIT_BATCH_DELAY = 2
+
+def get_training_created_at(training_id: str, entry: dict) -> float:
+    """Zeitpunkt einer Anfrage; ältere Einträge tragen ihn nur in der ID (train_<ticket>_<ts>)."""
+    if "created_at" in entry:
+        return entry["created_at"]
+    try:
+        return float(training_id.rsplit("_", 1)[1])
+    except (IndexError, ValueError):
+        return 0
+
+async def compact_pending_training(guild: discord.Guild) -> Dict[str, int]:
+    """Entfernt abgelaufene Trainings-Anfragen eines Servers und deaktiviert deren Nachrichten."""
+    guild_id_str = str(guild.id)
+    server_training = ai_training["servers"].get(guild_id_str, {})
+    pending = server_training.get("pending_training", {})
+    clusters = server_training.get("training_clusters", {})
+    open_tickets = get_server_config(guild.id).get("open_tickets", {})
+    now = datetime.now().timestamp()
+    max_age = TRAINING_MAX_AGE_DAYS * 86400
+
+    expired = []
+    remaining = []
+    for training_id, entry in pending.items():
+        created_at = get_training_created_at(training_id, entry)
+        channel_id = entry.get("channel_id", 0)
+        ticket_closed = str(channel_id) not in open_tickets and not guild.get_channel(channel_id)
+        if now - created_at > max_age or ticket_closed:
+            expired.append(training_id)
+        else:
+            remaining.append((created_at, training_id))
+
+    remaining.sort()
+    compacted = [training_id for _, training_id in remaining[:max(len(remaining) - TRAINING_MAX_PENDING, 0)]]
+
+    removed = set(expired) | set(compacted)
+    if not removed:
+        return {"expired": 0, "compacted": 0, "messages": 0}
+
+    # Anfragen aus der Zeit vor den Clustern haben eine eigene Nachricht ohne gespeicherte ID
+    clustered = {training_id for cluster in clusters.values() for training_id in cluster["entries"]}
+    legacy_removed = [(training_id, pending[training_id]) for training_id in removed if training_id not in clustered and training_id in pending]
+    for training_id in removed:
+        pending.pop(training_id, None)
+
+    closed_messages = []
+    for cluster_id, cluster in list(clusters.items()):
+        entries = [training_id for training_id in cluster["entries"] if training_id not in removed]
+        if len(entries) == len(cluster["entries"]):
+            continue
+        cluster["entries"] = entries
+        if entries:
+            schedule_training_edit(guild, cluster_id)
+        else:
+            del clusters[cluster_id]
+            remove_from_training_index(guild_id_str, cluster_id)
+            if cluster.get("message_id"):
+                get_training_message_index().pop(cluster["message_id"], None)
+                closed_messages.append(cluster)
+    mark_ai_training_dirty()
+
+    async def disable_message(cluster: dict):
+        channel = guild.get_channel(cluster["channel_id"])
+        if not channel:
+            return
+        embed = discord.Embed(
+            title="<:8649cooldown:1459953871572046133> KI-Training abgelaufen",
+            description=f"**Grund:**\n```{cluster['reason']}```",
+            color=get_color(guild.id, "default")
+        )
+        try:
+            await queue_message_edit(channel.get_partial_message(cluster["message_id"]), embed=embed, view=None)
+        except Exception as e:
+            print(f"Fehler beim Deaktivieren der Trainings-Anfrage: {e}")
+
+    # Alte Nachrichten über Zeitpunkt, Kanal und Grund im Trainings-Kanal suchen
+    ai_channel = guild.get_channel(get_server_config(guild.id).get("ai_training_channel_id", 0))
+    if ai_channel and legacy_removed:
+        for training_id, entry in legacy_removed:
+            message = await find_legacy_training_message(ai_channel, training_id, entry)
+            if message:
+                closed_messages.append({"channel_id": ai_channel.id, "message_id": message.id, "reason": entry.get("reason", "")})
+
+    for start in range(0, len(closed_messages), TRAINING_EDIT_BATCH):
+        if start:
+            await asyncio.sleep(TRAINING_EDIT_BATCH_DELAY)
+        await asyncio.gather(*(disable_message(cluster) for cluster in closed_messages[start:start + TRAINING_EDIT_BATCH]))
+
+    return {"expired": len(expired), "compacted": len(compacted), "messages": len(closed_messages)}
+
+LEGACY_TRAINING_SEARCH_WINDOW = 300
+LEGACY_TRAINING_SEARCH_LIMIT = 50
+
+async def find_legacy_training_message(channel: discord.TextChannel, training_id: str, entry: dict) -> Optional[discord.Message]:
+    """Sucht die Nachricht einer Anfrage ohne Cluster in den Minuten nach ihrer Erstellung."""
+    created_at = get_training_created_at(training_id, entry)
+    if not created_at:
+        return None
+    try:
+        async for message in channel.history(
+            limit=LEGACY_TRAINING_SEARCH_LIMIT,
+            after=datetime.fromtimestamp(created_at - 5),
+            before=datetime.fromtimestamp(created_at + LEGACY_TRAINING_SEARCH_WINDOW),
+            oldest_first=True
+        ):
+            if message.author != bot.user or not message.components or not message.embeds:
+                continue
+            match = LEGACY_TRAINING_PATTERN.search(message.embeds[0].description or "")
+            if match and int(match["channel_id"]) == entry.get("channel_id") and match["reason"] == entry.get("reason"):
+                return message
+    except discord.HTTPException as e:
+        print(f"Fehler beim Suchen der Trainings-Nachricht {training_id}: {e}")
+    return None
+
+async def request_ai_training(channel: discord.TextChannel, reason: str, ticket_id: int, creator: discord.Member):
+    """Sendet eine Anfrage für KI-Training in den Admin-Kanal oder zählt sie zu einer ähnlichen hinzu."""
+    server_config = get_server_config(channel.guild.id)
+    ai_channel_id = server_config.get("ai_training_channel_id", 0)
+    if not ai_channel_id:
+        return
+
+    ai_channel = channel.guild.get_channel(ai_channel_id)
+    if not ai_channel:
+        return
 
     training_id = f"train_{ticket_id}_{int(datetime.now().timestamp())}"
     guild_id_str = str(channel.guild.id)
 
     if guild_id_str not in ai_training["servers"]:
         ai_training["servers"][guild_id_str] = {"keywords": {}, "pending_training": {}}
-
-    ai_training["servers"][guild_id_str].setdefault("pending_training", {})[training_id] = {
+    server_training = ai_training["servers"][guild_id_str]
+    clusters = server_training.setdefault("training_clusters", {})
+
+    signature = minhash_signature(reason)
+    cluster_id = find_training_cluster(guild_id_str, signature)
+    is_new_cluster = cluster_id is None
+    if is_new_cluster:
+        cluster_id = training_id
+        clusters[cluster_id] = {"reason": reason, "entries": [], "channel_id": ai_channel.id, "message_id": None}
+        add_to_training_index(get_training_index(guild_id_str), cluster_id, signature)
+
+    clusters[cluster_id]["entries"].append(training_id)
+    server_training.setdefault("pending_training", {})[training_id] = {
         "reason": reason,
         "ticket_id": ticket_id,
-        "channel_id": channel.id
+        "channel_id": channel.id,
+        "creator_id": creator.id,
+        "cluster_id": cluster_id,
+        "created_at": datetime.now().timestamp()
     }
-    save_ai_training(ai_training)
+    mark_ai_training_dirty()
 
-    await ai_channel.send(
-        content=staff_role.mention if staff_role else "@Staff",
-        embed=embed,
-        view=AITrainingView(training_id, reason, channel.guild.id)
-    )
+    if not is_new_cluster:
+        schedule_training_edit(channel.guild, cluster_id)
+        return
+
+    # Der Cluster existiert schon während des Sendens, damit parallele ähnliche Anfragen ihn finden
+    staff_role = channel.guild.get_role(server_config.get("staff_role_id", 0))
+    try:
+        message = await ai_channel.send(
+            content=staff_role.mention if staff_role else "@Staff",
+            embed=build_training_embed(channel.guild, clusters[cluster_id]),
+            view=AITrainingView(cluster_id)
+        )
+    except discord.HTTPException as e:
+        # Ohne Nachricht würde der Cluster alle weiteren ähnlichen Anfragen unsichtbar schlucken
+        resolve_training_cluster(channel.guild.id, cluster_id)
+        print(f"Fehler beim Senden der Trainings-Anfrage {cluster_id}: {e}")
+        return
+    clusters[cluster_id]["message_id"] = message.id
+    get_training_message_index()[message.id] = cluster_id
+    mark_ai_training_dirty()
+
+# --- Semantische KI-Suche ---
+AI_INDEX_DIR = "ai_index"
+EMBEDDING_DIM = 512
+SEMANTIC_THRESHOLD = 0.45
+semantic_indexes: Dict[str, "SemanticIndex"] = {}
+semantic_index_builds: Dict[str, asyncio.Task] = {}
+
+def load_numpy():
+    """Importiert numpy erst bei Bedarf; ohne numpy bleibt die semantische Suche aus."""
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+def embed_text(text: str):
+    """Vektorisiert einen Text über gehashte Zeichen-3/4-Gramme (L2-normalisiert)."""
+    np = load_numpy()
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for token in normalize_tokens(text):
+        padded = f" {token} "
+        for n in (3, 4):
+            for i in range(len(padded) - n + 1):
+                h = int.from_bytes(hashlib.blake2b(padded[i:i + n].encode(), digest_size=8).digest(), "big")
+                vector[h % EMBEDDING_DIM] += 1.0 if h >> 63 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class SemanticIndex:
+    """Memory-mapped Vektorindex trainierter Anfragen eines Servers."""
+
+    def __init__(self, guild_id_str: str):
+        self.matrix_path = f"{AI_INDEX_DIR}/{guild_id_str}.npy"
+        self.meta_path = f"{AI_INDEX_DIR}/{guild_id_str}.json"
+        self.keys: List[str] = []
+        self.text_hashes: List[str] = []
+        self.matrix = None
+        self.lock = threading.Lock()
+        if os.path.exists(self.meta_path) and os.path.exists(self.matrix_path):
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            self.keys = meta["keys"]
+            # Ältere Indizes ohne Text-Hashes bestehen nur aus den Keywords selbst
+            self.text_hashes = meta.get("text_hashes") or [self.hash_text(key) for key in self.keys]
+            self.matrix = load_numpy().load(self.matrix_path, mmap_mode="r+")
+        self.entries = set(zip(self.text_hashes, self.keys))
+
+    def __len__(self):
+        return len(self.keys)
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+    def append(self, texts: List[str], keys: List[str]):
+        """Hängt neue Zeilen an, bereits enthaltene (Text, Schlüssel)-Paare werden übersprungen.
+
+        Die Datei wächst bei Bedarf mit doppelter Kapazität.
+        """
+        pairs = list(dict.fromkeys((self.hash_text(text), key) for text, key in zip(texts, keys)))
+        wanted = [i for i, pair in enumerate(pairs) if pair not in self.entries]
+        if not wanted:
+            return
+        text_by_hash = {self.hash_text(text): text for text in texts}
+        np = load_numpy()
+        vectors = np.stack([embed_text(text_by_hash[pairs[i][0]]) for i in wanted])
+        with self.lock:
+            # Gleichzeitige Aufrufe können dieselben Paare eingetragen haben
+            keep = [j for j, i in enumerate(wanted) if pairs[i] not in self.entries]
+            if keep:
+                self._append_vectors(np, vectors[keep], [pairs[wanted[j]] for j in keep])
+
+    def _append_vectors(self, np, vectors, pairs: List[tuple]):
+        """Schreibt Vektoren samt (Text-Hash, Schlüssel); nur unter self.lock aufrufen."""
+        count = len(self.keys)
+        capacity = self.matrix.shape[0] if self.matrix is not None else 0
+        if count + len(vectors) > capacity:
+            os.makedirs(AI_INDEX_DIR, exist_ok=True)
+            new_capacity = max(64, capacity * 2, count + len(vectors))
+            tmp_path = self.matrix_path + ".tmp"
+            grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(new_capacity, EMBEDDING_DIM))
+            if count:
+                grown[:count] = self.matrix[:count]
+            grown.flush()
+            del grown
+            os.replace(tmp_path, self.matrix_path)
+            self.matrix = np.load(self.matrix_path, mmap_mode="r+")
+
+        self.matrix[count:count + len(vectors)] = vectors
+        self.matrix.flush()
+        self.text_hashes.extend(text_hash for text_hash, _ in pairs)
+        self.keys.extend(key for _, key in pairs)
+        self.entries.update(pairs)
+        write_json_atomic(self.meta_path, {"dim": EMBEDDING_DIM, "keys": self.keys, "text_hashes": self.text_hashes})
+
+    def search(self, text: str, k: int = 3) -> List[tuple]:
+        """Gibt die k ähnlichsten Einträge als (Keyword-Schlüssel, Kosinus) zurück."""
+        with self.lock:
+            keys, matrix = list(self.keys), self.matrix
+        if not keys:
+            return []
+        np = load_numpy()
+        scores = matrix[:len(keys)] @ embed_text(text)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return [(keys[i], float(scores[i])) for i in top[np.argsort(-scores[top])]]
+
+def load_semantic_index(guild_id_str: str, keywords: List[str]) -> SemanticIndex:
+    """Lädt den Vektorindex eines Servers und baut ihn beim ersten Mal aus den Keywords auf (blockierend)."""
+    index = SemanticIndex(guild_id_str)
+    if not len(index) and keywords:
+        index.append(keywords, keywords)
+    return index
+
+async def build_semantic_index(guild_id_str: str) -> SemanticIndex:
+    """Lädt bzw. baut den Vektorindex im Worker-Thread und legt ihn danach resident ab."""
+    try:
+        keywords = list(ai_training["servers"].get(guild_id_str, {}).get("keywords", {}))
+        index = await asyncio.to_thread(load_semantic_index, guild_id_str, keywords)
+        semantic_indexes[guild_id_str] = index
+        return index
+    finally:
+        semantic_index_builds.pop(guild_id_str, None)
+
+def get_semantic_index(guild_id_str: str) -> Optional[SemanticIndex]:
+    """Gibt den Vektorindex zurück; fehlt er noch, wird er im Hintergrund geladen und bis dahin None geliefert."""
+    if guild_id_str in semantic_indexes:
+        return semantic_indexes[guild_id_str]
+    if load_numpy() is not None and guild_id_str not in semantic_index_builds:
+        semantic_index_builds[guild_id_str] = asyncio.create_task(build_semantic_index(guild_id_str))
+    return None
+
+async def add_semantic_examples(guild_id_str: str, examples: List[str], keyword_str: str):
+    """Hängt trainierte Beispiel-Anfragen im Hintergrund an den Vektorindex eines Servers an."""
+    try:
+        index = await ensure_semantic_index(guild_id_str)
+        if index:
+            await asyncio.to_thread(index.append, examples, [keyword_str] * len(examples))
+    except Exception as e:
+        print(f"Fehler beim Erweitern des semantischen Index {guild_id_str}: {e}")
+
+async def ensure_semantic_index(guild_id_str: str) -> Optional[SemanticIndex]:
+    """Wartet, bis der Vektorindex eines Servers geladen ist."""
+    if guild_id_str in semantic_indexes:
+        return semantic_indexes[guild_id_str]
+    get_semantic_index(guild_id_str)
+    build = semantic_index_builds.get(guild_id_str)
+    return await asyncio.shield(build) if build else semantic_indexes.get(guild_id_str)
+
+# --- Gesammeltes Speichern der Konfiguration ---
+# Häufige Änderungen (Ticket-Registry, Zähler, Claims) schreiben nicht sofort die ganze
+# Konfiguration, sondern setzen ein Flag; config_saver speichert gesammelt im Worker-Thread
+CONFIG_SAVE_INTERVAL = 5
+config_dirty = False
+config_save_lock = asyncio.Lock()
+
+def mark_config_dirty():
+    """Merkt Änderungen an der Konfiguration für das nächste gesammelte Speichern vor."""
+    global config_dirty
+    config_dirty = True
+
+async def flush_config():
+    """Speichert die Konfiguration, falls sich etwas geändert hat (nie zwei Schreibvorgänge gleichzeitig)."""
+    global config_dirty, config_generation
+    async with config_save_lock:
+        if not config_dirty:
+            return
+        config_dirty = False
+        config_generation += 1
+        snapshot = json.loads(json.dumps(config))
+        try:
+            await asyncio.to_thread(save_config, snapshot, config_generation)
+        except Exception:
+            # Änderungen beim nächsten Durchlauf erneut schreiben
+            config_dirty = True
+            raise
+
+# --- Ticket-Registry ---
+def register_open_ticket(guild_id: int, channel_id: int, ticket_data: dict):
+    """Trägt ein offenes Ticket in die Registry des Servers ein."""
+    server_config = get_server_config(guild_id)
+    server_config.setdefault("open_tickets", {})[str(channel_id)] = ticket_data
+    mark_config_dirty()
+
+def get_open_ticket(guild_id: int, channel_id: int) -> Optional[dict]:
+    """Gibt die Registry-Daten eines offenen Tickets zurück."""
+    return get_server_config(guild_id).get("open_tickets", {}).get(str(channel_id))
+
+def unregister_open_ticket(guild_id: int, channel_id: int):
+    """Entfernt ein Ticket aus der Registry und der Warteschlange."""
+    server_config = get_server_config(guild_id)
+    if server_config.get("open_tickets", {}).pop(str(channel_id), None) is not None:
+        mark_config_dirty()
+    queue = ticket_queues.get(guild_id)
+    if queue:
+        queue.discard(channel_id)
+    inactivity_tracker.forget(channel_id)
+
+# --- Ticket-Warteschlange ---
+class TicketQueue:
+    """Prioritätswarteschlange der offenen, nicht geclaimten Tickets eines Servers.
+
+    Sortiert nach Panel-Priorität (absteigend) und Alter. Entfernte Einträge
+    werden lazy übersprungen, daher kosten Einfügen und Entfernen O(log n).
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._deadlines = []
+        self._entries = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def push(self, channel_id: int, priority: int, created_at: float, sla_deadline: float = None):
+        self._entries[channel_id] = {"priority": priority, "created_at": created_at, "assigned": False}
+        heapq.heappush(self._heap, (-priority, created_at, channel_id))
+        if sla_deadline:
+            heapq.heappush(self._deadlines, (sla_deadline, channel_id))
+
+    def discard(self, channel_id: int):
+        self._entries.pop(channel_id, None)
+
+    def mark_assigned(self, channel_id: int):
+        entry = self._entries.get(channel_id)
+        if entry:
+            entry["assigned"] = True
+
+    def requeue(self, channel_id: int):
+        """Stellt ein übersprungenes Ticket für den nächsten Durchlauf zurück."""
+        entry = self._entries.get(channel_id)
+        if entry and entry["assigned"]:
+            entry["assigned"] = False
+            heapq.heappush(self._heap, (-entry["priority"], entry["created_at"], channel_id))
+
+    def peek_unassigned(self) -> Optional[int]:
+        """Gibt das wichtigste noch nicht zugewiesene Ticket zurück."""
+        while self._heap:
+            channel_id = self._heap[0][2]
+            entry = self._entries.get(channel_id)
+            if entry and not entry["assigned"]:
+                return channel_id
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_expired(self, now: float) -> List[int]:
+        """Entfernt und liefert alle Tickets, deren SLA-Frist abgelaufen ist."""
+        expired = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, channel_id = heapq.heappop(self._deadlines)
+            if channel_id in self._entries:
+                expired.append(channel_id)
+        return expired
+
+    def ordered(self) -> List[tuple]:
+        """Alle wartenden Tickets in Abarbeitungsreihenfolge (nur für Anzeigen)."""
+        return sorted(self._entries.items(), key=lambda item: (-item[1]["priority"], item[1]["created_at"]))
+
+ticket_queues: Dict[int, TicketQueue] = {}
+assign_cursors: Dict[tuple, int] = {}
+
+def enqueue_ticket(guild_id: int, channel_id: int, ticket_data: dict):
+    """Fügt ein ungeclaimtes Ticket in die Warteschlange des Servers ein."""
+    panel_data = get_server_config(guild_id).get("panels", {}).get(ticket_data.get("panel_key"), {})
+    sla_minutes = panel_data.get("sla_minutes", 0)
+    created_at = ticket_data.get("created_at", datetime.now().timestamp())
+    sla_deadline = created_at + sla_minutes * 60 if sla_minutes and not ticket_data.get("escalated") else None
+    queue = ticket_queues.setdefault(guild_id, TicketQueue())
+    queue.push(channel_id, panel_data.get("priority", 0), created_at, sla_deadline)
+    if ticket_data.get("assigned_to"):
+        queue.mark_assigned(channel_id)
+
+def rebuild_ticket_queues():
+    """Baut die Warteschlangen aus der Ticket-Registry neu auf (z.B. nach einem Neustart)."""
+    ticket_queues.clear()
+    for guild_id_str, server_config in config["servers"].items():
+        for channel_id_str, ticket_data in server_config.get("open_tickets", {}).items():
+            if not ticket_data.get("claimed_by"):
+                enqueue_ticket(int(guild_id_str), int(channel_id_str), ticket_data)
+
+def is_available(member: discord.Member) -> bool:
+    """Prüft, ob ein Teammitglied für eine Zuweisung erreichbar ist."""
+    if member.bot:
+        return False
+    # Ohne Presence-Intent liefert Discord für alle Mitglieder "offline"
+    if not bot.intents.presences:
+        return True
+    return member.status != discord.Status.offline
+
+def pick_staff_member(guild: discord.Guild, panel_key: str, staff_role: discord.Role, mode: str, loads: Dict[int, int]) -> Optional[discord.Member]:
+    """Wählt ein Teammitglied per Round-Robin oder nach geringster Auslastung."""
+    candidates = sorted((m for m in staff_role.members if is_available(m)), key=lambda m: m.id)
+    if not candidates:
+        return None
+
+    if mode == "least_loaded":
+        return min(candidates, key=lambda m: (loads.get(m.id, 0), m.id))
+
+    cursor = assign_cursors.get((guild.id, panel_key), 0)
+    assign_cursors[(guild.id, panel_key)] = cursor + 1
+    return candidates[cursor % len(candidates)]
+
+# --- Inaktivitäts-Timer ---
+class InactivityTracker:
+    """Min-Heap der nächsten Inaktivitätsprüfung aller offenen Tickets.
+
+    Nachrichten aktualisieren nur den Zeitstempel (O(1)); erst wenn ein Eintrag
+    fällig wird, prüft der Hintergrund-Task die tatsächliche Inaktivität und
+    plant bei neuer Aktivität einfach neu ein.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._due = {}
+        self.guilds = {}
+        self.last_activity = {}
+        self.warned_at = {}
+        self.close_failures = {}
+
+    def __len__(self):
+        return len(self._due)
+
+    def track(self, guild_id: int, channel_id: int, last_activity: float):
+        self.guilds[channel_id] = guild_id
+        self.last_activity[channel_id] = last_activity
+
+    def schedule(self, channel_id: int, due: float):
+        self._due[channel_id] = due
+        heapq.heappush(self._heap, (due, channel_id))
+
+    def touch(self, channel_id: int, timestamp: float):
+        if channel_id in self.last_activity:
+            self.last_activity[channel_id] = timestamp
+
+    def forget(self, channel_id: int):
+        for store in (self._due, self.guilds, self.last_activity, self.warned_at, self.close_failures):
+            store.pop(channel_id, None)
+
+    def pop_due(self, now: float) -> List[int]:
+        """Entfernt und liefert alle Kanäle, deren Prüfzeitpunkt erreicht ist."""
+        due_channels = []
+        while self._heap and self._heap[0][0] <= now:
+            due, channel_id = heapq.heappop(self._heap)
+            if self._due.get(channel_id) == due:
+                del self._due[channel_id]
+                due_channels.append(channel_id)
+        return due_channels
+
+inactivity_tracker = InactivityTracker()
+INACTIVITY_RETRY_BACKOFF = 60
+INACTIVITY_RETRY_MAX_BACKOFF = 3600
+
+def get_inactivity_limits(guild_id: int, panel_key: str) -> tuple:
+    """Gibt (Warnung, Schließen) in Sekunden für ein Panel zurück, 0 = deaktiviert."""
+    panel_data = get_server_config(guild_id).get("panels", {}).get(panel_key, {})
+    return panel_data.get("inactivity_warn_hours", 0) * 3600, panel_data.get("inactivity_close_hours", 0) * 3600
+
+def schedule_inactivity_check(guild_id: int, channel_id: int, panel_key: str):
+    """Plant die nächste Inaktivitätsprüfung eines Tickets ein."""
+    warn_after, close_after = get_inactivity_limits(guild_id, panel_key)
+    if not close_after:
+        inactivity_tracker.forget(channel_id)
+        return
+
+    last_activity = inactivity_tracker.last_activity.get(channel_id)
+    if last_activity is None:
+        return
+    warned_at = inactivity_tracker.warned_at.get(channel_id)
+    if warned_at and warned_at < last_activity:
+        del inactivity_tracker.warned_at[channel_id]
+        warned_at = None
+
+    if warn_after and warn_after < close_after and not warned_at:
+        inactivity_tracker.schedule(channel_id, last_activity + warn_after)
+    else:
+        inactivity_tracker.schedule(channel_id, last_activity + close_after)
+
+def rebuild_inactivity_tracker():
+    """Initialisiert die Timer aller offenen Tickets aus der Registry."""
+    for guild_id_str, server_config in config["servers"].items():
+        guild = bot.get_guild(int(guild_id_str))
+        for channel_id_str, ticket_data in server_config.get("open_tickets", {}).items():
+            channel_id = int(channel_id_str)
+            channel = guild.get_channel(channel_id) if guild else None
+            last_activity = ticket_data.get("created_at", datetime.now().timestamp())
+            if channel and channel.last_message_id:
+                last_activity = max(last_activity, discord.utils.snowflake_time(channel.last_message_id).timestamp())
+            inactivity_tracker.track(int(guild_id_str), channel_id, last_activity)
+            schedule_inactivity_check(int(guild_id_str), channel_id, ticket_data.get("panel_key"))
+
+# --- Live-Transkripte ---
+TRANSCRIPT_LOG_DIR = "transcripts/live"
+transcript_buffers: Dict[tuple, List[str]] = {}
+
+def get_transcript_log_path(guild_id: int, channel_id: int) -> str:
+    """Pfad des Append-only-Logs eines offenen Tickets."""
+    return f"{TRANSCRIPT_LOG_DIR}/{guild_id}/{channel_id}.jsonl"
+
+def uses_live_transcripts(guild_id: int) -> bool:
+    """Prüft, ob ein Server Nachrichten live mitschreibt (Standard) oder beim Schließen lädt."""
+    return get_server_config(guild_id).get("transcript_mode", "live") == "live"
+
+def message_to_record(message: discord.Message, op: str = "create") -> dict:
+    """Wandelt eine Discord-Nachricht in einen Transkript-Eintrag um."""
+    return {
+        "op": op,
+        "id": message.id,
+        "author_id": message.author.id,
+        "author": message.author.name,
+        "content": message.content,
+        "created_at": message.created_at.isoformat(),
+        "attachments": [
+            {"filename": a.filename, "url": a.url, "content_type": a.content_type, "size": a.size}
+            for a in message.attachments
+        ],
+        "embeds": [embed.to_dict() for embed in message.embeds]
+    }
+
+def append_transcript_record(guild_id: int, channel_id: int, record: dict):
+    """Puffert einen Eintrag für das Live-Log; geschrieben wird gesammelt."""
+    transcript_buffers.setdefault((guild_id, channel_id), []).append(json.dumps(record, ensure_ascii=False))
+
+def write_transcript_buffers(buffers: Dict[tuple, List[str]]):
+    """Hängt gepufferte Einträge an die Log-Dateien an (blockierend, im Worker ausführen)."""
+    for (guild_id, channel_id), lines in buffers.items():
+        path = get_transcript_log_path(guild_id, channel_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a+b") as f:
+            # Endet das Log nach einem Absturz mit einer halben Zeile, auf einer neuen Zeile beginnen
+            prefix = b""
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    prefix = b"\n"
+            f.write(prefix + ("\n".join(lines) + "\n").encode("utf-8"))
+
+async def flush_transcript_buffers(channel_id: int = None):
+    """Schreibt alle (oder die eines Kanals) gepufferten Einträge auf die Platte."""
+    if channel_id is None:
+        buffers = dict(transcript_buffers)
+        transcript_buffers.clear()
+    else:
+        buffers = {key: transcript_buffers.pop(key) for key in list(transcript_buffers) if key[1] == channel_id}
+    if buffers:
+        await asyncio.to_thread(write_transcript_buffers, buffers)
+
+def read_transcript_log(path: str) -> List[dict]:
+    """Liest ein Live-Log und faltet Bearbeitungen und Löschungen in die Nachrichten ein."""
+    messages = {}
+    blobs = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Beim Absturz halb geschriebene Zeile
+                continue
+            if record["op"] == "create":
+                messages.setdefault(record["id"], record)
+            elif record["op"] == "edit" and record["id"] in messages:
+                messages[record["id"]].update({k: v for k, v in record.items() if k not in ("op", "created_at")})
+                messages[record["id"]]["edited"] = True
+            elif record["op"] == "delete" and record["id"] in messages:
+                messages[record["id"]]["deleted"] = True
+            elif record["op"] == "blob":
+                blobs.setdefault(record["id"], {})[record["url"]] = record["blob"]
+    # Bereits gesicherte Anhänge nach dem Falten eintragen, damit Bearbeitungen sie nicht überschreiben
+    for message_id, urls in blobs.items():
+        for attachment in messages.get(message_id, {}).get("attachments", []):
+            if attachment["url"] in urls:
+                attachment["blob"] = urls[attachment["url"]]
+    return sorted(messages.values(), key=lambda record: record["id"])
+
+def read_last_logged_id(path: str) -> Optional[int]:
+    """Gibt die ID der letzten mitgeschriebenen Nachricht zurück."""
+    if not os.path.exists(path):
+        return None
+    last_id = None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record["op"] == "create":
+                last_id = max(last_id or 0, record["id"])
+    return last_id
+
+async def collect_transcript_records(channel: discord.TextChannel) -> List[dict]:
+    """Liefert die Nachrichten eines Tickets, bevorzugt aus dem Live-Log."""
+    path = get_transcript_log_path(channel.guild.id, channel.id)
+    await flush_transcript_buffers(channel.id)
+    if os.path.exists(path):
+        return await asyncio.to_thread(read_transcript_log, path)
+    return [message_to_record(message) async for message in channel.history(limit=None, oldest_first=True)]
+
+def format_transcript_records(records: List[dict]) -> str:
+    """Formatiert Transkript-Einträge als Text."""
+    lines = []
+    for record in records:
+        timestamp = datetime.fromisoformat(record["created_at"]).strftime('%Y-%m-%d %H:%M:%S')
+        content = record["content"] if record["content"] else "[Embed/Anhang]"
+        if record.get("edited"):
+            content += " (bearbeitet)"
+        if record.get("deleted"):
+            content += " (gelöscht)"
+        lines.append(f"[{timestamp}] {record['author']}: {content}\n")
+    return "".join(lines)
+
+def seal_transcript_log(guild_id: int, channel_id: int, transcript_file: str, index_entry: dict, records: List[dict] = None) -> Optional[str]:
+    """Versiegelt das Live-Log neben dem Transkript und trägt das Ticket in den Index ein.
+
+    Ohne Live-Log werden die übergebenen Einträge als Log geschrieben. Gibt den Pfad des Logs zurück.
+    """
+    path = get_transcript_log_path(guild_id, channel_id)
+    index_entry = dict(index_entry, transcript=transcript_file)
+    sealed_path = transcript_file[:-len(".txt")] + ".jsonl"
+    if os.path.exists(path):
+        os.replace(path, sealed_path)
+        index_entry["log"] = sealed_path
+    elif records is not None:
+        with open(sealed_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(dict(record, op="create"), ensure_ascii=False) + "\n" for record in records)
+        index_entry["log"] = sealed_path
+
+    with open(f"{os.path.dirname(transcript_file)}/index.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps(index_entry, ensure_ascii=False) + "\n")
+    return index_entry.get("log")
+
+# --- HTML-Transkripte ---
+BLOB_DIR = "transcripts/blobs"
+ATTACHMENT_DOWNLOAD_CONCURRENCY = 4
+ATTACHMENT_MAX_SIZE = 25 * 1024 * 1024
+
+def store_blob(data: bytes, filename: str) -> str:
+    """Legt einen Anhang inhaltsadressiert im Blob-Store ab und gibt den Pfad zurück."""
+    extension = os.path.splitext(filename)[1].lower()[:10]
+    path = f"{BLOB_DIR}/{hashlib.sha256(data).hexdigest()}{extension}"
+    if not os.path.exists(path):
+        os.makedirs(BLOB_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return path
+
+attachment_capture_semaphore = asyncio.Semaphore(ATTACHMENT_DOWNLOAD_CONCURRENCY)
+
+async def capture_attachments(guild_id: int, channel_id: int, message: discord.Message):
+    """Sichert Anhänge sofort beim Eintreffen, solange die CDN-URLs noch gültig sind."""
+    for attachment in message.attachments:
+        if attachment.size > ATTACHMENT_MAX_SIZE:
+            continue
+        async with attachment_capture_semaphore:
+            try:
+                data = await attachment.read()
+                blob = await asyncio.to_thread(store_blob, data, attachment.filename)
+            except Exception as e:
+                print(f"Fehler beim Sichern von {attachment.filename}: {e}")
+                continue
+        if get_open_ticket(guild_id, channel_id):
+            append_transcript_record(guild_id, channel_id, {"op": "blob", "id": message.id, "url": attachment.url, "blob": blob})
+
+async def download_attachments(records: List[dict]) -> Dict[str, str]:
+    """Lädt fehlende Anhänge mit begrenzter Parallelität herunter und gibt URL -> Blob-Pfad zurück (bereits gesicherte Blobs inklusive)."""
+    attachments = {}
+    blob_map = {}
+    for record in records:
+        for attachment in record.get("attachments", []):
+            if attachment.get("blob") and os.path.exists(attachment["blob"]):
+                blob_map[attachment["url"]] = attachment["blob"]
+            elif attachment.get("size", 0) <= ATTACHMENT_MAX_SIZE:
+                attachments.setdefault(attachment["url"], attachment["filename"])
+    attachments = {url: filename for url, filename in attachments.items() if url not in blob_map}
+    if not attachments:
+        return blob_map
+
+    semaphore = asyncio.Semaphore(ATTACHMENT_DOWNLOAD_CONCURRENCY)
+
+    async def fetch(session: ClientSession, url: str, filename: str):
+        async with semaphore:
+            try:
+                async with session.get(url) as response:
+                    if response.status != 200:
+                        return
+                    data = await response.read()
+                blob_map[url] = await asyncio.to_thread(store_blob, data, filename)
+            except Exception as e:
+                print(f"Fehler beim Herunterladen von {filename}: {e}")
+
+    async with ClientSession(timeout=ClientTimeout(total=60)) as session:
+        await asyncio.gather(*(fetch(session, url, filename) for url, filename in attachments.items()))
+    return blob_map
+
+def render_embed_html(embed: dict) -> str:
+    """Rendert ein Embed als HTML-Block."""
+    color = f"#{embed.get('color', 0x2b2d31):06x}"
+    parts = [f'<div class="embed" style="border-left-color:{color}">']
+    if embed.get("author", {}).get("name"):
+        parts.append(f'<div class="embed-author">{html.escape(embed["author"]["name"])}</div>')
+    if embed.get("title"):
+        parts.append(f'<div class="embed-title">{html.escape(embed["title"])}</div>')
+    if embed.get("description"):
+        parts.append(f'<div class="embed-description">{html.escape(embed["description"])}</div>')
+    for field in embed.get("fields", []):
+        parts.append(f'<div class="embed-field"><b>{html.escape(field["name"])}</b><br>{html.escape(field["value"])}</div>')
+    for key in ("image", "thumbnail"):
+        if embed.get(key, {}).get("url"):
+            parts.append(f'<img class="embed-{key}" src="{html.escape(embed[key]["url"])}">')
+    if embed.get("footer", {}).get("text"):
+        parts.append(f'<div class="embed-footer">{html.escape(embed["footer"]["text"])}</div>')
+    parts.append("</div>")
+    return "".join(parts)
+
+def render_transcript_html(out_path: str, title: str, header: Dict[str, str], records: List[dict], blob_map: Dict[str, str]):
+    """Schreibt ein HTML-Transkript Nachricht für Nachricht (blockierend, im Worker ausführen).
+
+    Geschrieben wird in eine temporäre Datei, die erst am Ende umbenannt wird, damit ein
+    abgebrochenes Rendern keine halbe Datei hinterlässt, die als fertig gilt.
+    """
+    out_dir = os.path.dirname(out_path)
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(f"""<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(title)}</title><style>
+body{{background:#313338;color:#dbdee1;font-family:sans-serif;margin:24px}}
+.message{{margin:10px 0}}.author{{font-weight:bold;color:#fff}}.time{{color:#949ba4;font-size:12px;margin-left:6px}}
+.content{{white-space:pre-wrap}}.deleted{{opacity:.5;text-decoration:line-through}}.edited{{color:#949ba4;font-size:11px}}
+.embed{{background:#2b2d31;border-left:4px solid;border-radius:4px;padding:8px 12px;margin:4px 0;max-width:520px;white-space:pre-wrap}}
+.embed-title{{font-weight:bold}}.embed-field{{margin-top:6px}}.embed-footer{{color:#949ba4;font-size:12px;margin-top:6px}}
+img{{max-width:400px;display:block;margin-top:4px}}
+</style></head><body><h2>{html.escape(title)}</h2>""")
+        for label, value in header.items():
+            f.write(f"<div><b>{html.escape(label)}:</b> {html.escape(str(value))}</div>")
+        f.write("<hr>")
+
+        for record in records:
+            timestamp = datetime.fromisoformat(record["created_at"]).strftime('%Y-%m-%d %H:%M:%S')
+            css_class = "message deleted" if record.get("deleted") else "message"
+            f.write(f'<div class="{css_class}"><span class="author">{html.escape(record["author"])}</span><span class="time">{timestamp}</span>')
+            if record.get("edited"):
+                f.write('<span class="edited"> (bearbeitet)</span>')
+            if record.get("content"):
+                f.write(f'<div class="content">{html.escape(record["content"])}</div>')
+            for embed in record.get("embeds", []):
+                f.write(render_embed_html(embed))
+            for attachment in record.get("attachments", []):
+                blob_path = blob_map.get(attachment["url"])
+                src = html.escape(os.path.relpath(blob_path, out_dir) if blob_path else attachment["url"])
+                if (attachment.get("content_type") or "").startswith("image/"):
+                    f.write(f'<a href="{src}"><img src="{src}" alt="{html.escape(attachment["filename"])}"></a>')
+                else:
+                    f.write(f'<div><a href="{src}">📎 {html.escape(attachment["filename"])}</a></div>')
+            f.write("</div>\n")
+        f.write("</body></html>")
+    os.replace(tmp_path, out_path)
+
+async def backfill_transcript_logs():
+    """Holt Nachrichten nach, die während einer Downtime nicht mitgeschrieben wurden."""
+    for guild_id_str, server_config in list(config["servers"].items()):
+        guild = bot.get_guild(int(guild_id_str))
+        if not guild or not uses_live_transcripts(guild.id):
+            continue
+        for channel_id_str in list(server_config.get("open_tickets", {})):
+            channel = guild.get_channel(int(channel_id_str))
+            if not channel:
+                continue
+            try:
+                last_id = await asyncio.to_thread(read_last_logged_id, get_transcript_log_path(guild.id, channel.id))
+                async for message in channel.history(limit=None, after=discord.Object(id=last_id) if last_id else None, oldest_first=True):
+                    append_transcript_record(guild.id, channel.id, message_to_record(message))
+            except Exception as e:
+                print(f"Fehler beim Nachholen des Transkripts für {channel.id}: {e}")
+    await flush_transcript_buffers()
+
+# --- REST-Budget ---
+# Zählt REST-Aufrufe pro Ablauf und bündelt vermeidbare Aufrufe
+MESSAGE_EDIT_WINDOW = 0.5
+REST_BUDGETS = {"ticket.create": 6, "ticket.claim": 3, "ticket.close": 1, "ticket.close_confirm": 2, "ticket.close_job": 4}
+current_flow: ContextVar = ContextVar("current_flow", default="sonstige")
+flow_runs: Dict[str, int] = {}
+rest_calls: Dict[str, Dict[str, int]] = {}
+pending_message_edits: Dict[int, tuple] = {}
+
+def count_rest_call(method: str, path: str):
+    """Zählt einen REST-Aufruf für den gerade laufenden Ablauf."""
+    calls = rest_calls.setdefault(current_flow.get(), {})
+    key = f"{method} {path}"
+    calls[key] = calls.get(key, 0) + 1
+
+def install_rest_budget(client: commands.Bot):
+    """Hängt die Zählung an den HTTP-Client und an den Webhook-Adapter (Interaktions-Antworten, Followups)."""
+    original_request = client.http.request
+
+    async def counted_request(route, **kwargs):
+        count_rest_call(route.method, route.path)
+        return await original_request(route, **kwargs)
+
+    client.http.request = counted_request
+
+    adapter_request = discord.webhook.async_.AsyncWebhookAdapter.request
+
+    async def counted_webhook_request(self, route, *args, **kwargs):
+        count_rest_call(route.method, route.path)
+        return await adapter_request(self, route, *args, **kwargs)
+
+    discord.webhook.async_.AsyncWebhookAdapter.request = counted_webhook_request
+
+def rest_budget_report() -> List[dict]:
+    """Durchschnittliche REST-Aufrufe pro Ablauf im Vergleich zum Budget."""
+    report = []
+    for flow, calls in sorted(rest_calls.items()):
+        runs = flow_runs.get(flow, 0)
+        total = sum(calls.values())
+        per_run = total / runs if runs else None
+        budget = REST_BUDGETS.get(flow)
+        report.append({
+            "flow": flow,
+            "runs": runs,
+            "calls": total,
+            "per_run": per_run,
+            "budget": budget,
+            "over_budget": budget is not None and per_run is not None and per_run > budget,
+            "routes": sorted(calls.items(), key=lambda item: -item[1])
+        })
+    return report
+
+def queue_message_edit(message, **fields) -> asyncio.Future:
+    """Fasst Bearbeitungen derselben Nachricht innerhalb von MESSAGE_EDIT_WINDOW zu einem edit zusammen.
+
+    Spätere Felder überschreiben frühere; alle Aufrufer erhalten das Ergebnis des gemeinsamen edit.
+    """
+    pending = pending_message_edits.get(message.id)
+    if pending:
+        pending[0].update(fields)
+        return pending[1]
+    future = asyncio.get_running_loop().create_future()
+    # Fehler gelten als abgeholt, auch wenn niemand auf das Ergebnis wartet
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    pending_message_edits[message.id] = (dict(fields), future)
+    asyncio.create_task(flush_message_edit(message))
+    return future
+
+async def flush_message_edit(message):
+    await asyncio.sleep(MESSAGE_EDIT_WINDOW)
+    fields, future = pending_message_edits.pop(message.id)
+    try:
+        future.set_result(await message.edit(**fields))
+    except Exception as e:
+        future.set_exception(e)
+
+async def apply_overwrites(channel: discord.abc.GuildChannel, changes: dict, reason: str = None):
+    """Setzt Berechtigungen für mehrere Ziele mit einem channel.edit statt je einem set_permissions.
+
+    None als Overwrite entfernt das Ziel.
+    """
+    if len(changes) == 1:
+        target, overwrite = next(iter(changes.items()))
+        await channel.set_permissions(target, overwrite=overwrite, reason=reason)
+        return
+    overwrites = dict(channel.overwrites)
+    for target, overwrite in changes.items():
+        if overwrite is None:
+            overwrites.pop(target, None)
+        else:
+            overwrites[target] = overwrite
+    await channel.edit(overwrites=overwrites, reason=reason)
+
+# --- Lifecycle-Tracing ---
+# Spans für Erstellen, Claimen und Schließen von Tickets im OTLP/JSON-Format.
+# TICKETS_TRACE_SAMPLE legt den Anteil aufgezeichneter Abläufe fest (0 = aus, 1 = alle)
+TRACE_SAMPLE_RATE = float(os.environ.get("TICKETS_TRACE_SAMPLE", 0))
+TRACE_FILE = os.environ.get("TICKETS_TRACE_FILE", "traces/spans.jsonl")
+TRACE_ENDPOINT = os.environ.get("TICKETS_TRACE_ENDPOINT")
+TRACE_SERVICE_NAME = "custom-tickets"
+finished_spans: List[dict] = []
+current_trace: ContextVar = ContextVar("current_trace", default=None)
+inflight_flows: Dict[object, tuple] = {}
+
+def otlp_attributes(attributes: dict) -> List[dict]:
+    """Wandelt Attribute in das OTLP-Format (Key/Value-Liste) um."""
+    result = []
+    for key, value in attributes.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            result.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            result.append({"key": key, "value": {"intValue": str(value)}})
+        else:
+            result.append({"key": key, "value": {"stringValue": str(value)}})
+    return result
+
+class Trace:
+    """Ein Ticket-Ablauf mit Root-Span; Teilschritte werden über trace_span angehängt."""
+
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.attributes = attributes
+        self.sampled = TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+        if self.sampled:
+            self.trace_id = os.urandom(16).hex()
+            self.span_id = os.urandom(8).hex()
+            self.start = time.time_ns()
+
+    def record(self, name: str, span_id: str, parent_id: Optional[str], start: int, attributes: dict, error: Optional[BaseException]):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": span_id,
+            "name": name,
+            "kind": 1,
+            "startTimeUnixNano": str(start),
+            "endTimeUnixNano": str(time.time_ns()),
+            "attributes": otlp_attributes(attributes),
+            "status": {"code": 2, "message": f"{type(error).__name__}: {error}"} if error else {"code": 1}
+        }
+        if parent_id:
+            span["parentSpanId"] = parent_id
+        finished_spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        start = time.time_ns()
+        try:
+            yield
+        except BaseException as e:
+            self.record(name, os.urandom(8).hex(), self.span_id, start, attributes, e)
+            raise
+        self.record(name, os.urandom(8).hex(), self.span_id, start, attributes, None)
+
+def traced(name: str, attributes_of):
+    """Decorator: zeichnet eine Coroutine als Root-Span auf; attributes_of liefert Attribute aus den Argumenten."""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            # Der Ablauf wird immer gezählt (REST-Budget), aufgezeichnet nur bei Sampling
+            flow_runs[name] = flow_runs.get(name, 0) + 1
+            flow_token = current_flow.set(name)
+            inflight_key = object()
+            inflight_flows[inflight_key] = (name, asyncio.current_task())
+            trace = Trace(name, attributes_of(*args) if TRACE_SAMPLE_RATE > 0 else {})
+            trace_token = current_trace.set(trace) if trace.sampled else None
+            error = None
+            try:
+                return await func(*args, **kwargs)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                current_flow.reset(flow_token)
+                inflight_flows.pop(inflight_key, None)
+                if trace_token is not None:
+                    current_trace.reset(trace_token)
+                    trace.record(name, trace.span_id, None, trace.start, trace.attributes, error)
+        return wrapper
+    return decorator
+
+def trace_span(name: str, **attributes):
+    """Span für einen Teilschritt des aktuellen Ablaufs (ohne aktiven Trace ein No-op)."""
+    trace = current_trace.get()
+    if trace is None:
+        return nullcontext()
+    return trace.span(name, **attributes)
+
+def trace_set(**attributes):
+    """Ergänzt Attribute am Root-Span des aktuellen Ablaufs, z.B. die Ticket-Nummer."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.attributes.update(attributes)
+
+def build_otlp_payload(spans: List[dict]) -> dict:
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": otlp_attributes({"service.name": TRACE_SERVICE_NAME})},
+            "scopeSpans": [{"scope": {"name": "tickets.lifecycle"}, "spans": spans}]
+        }]
+    }
+
+def write_spans(payload: dict):
+    os.makedirs(os.path.dirname(TRACE_FILE) or ".", exist_ok=True)
+    with open(TRACE_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+
+async def export_spans():
+    """Schreibt gesammelte Spans als OTLP/JSON-Zeile in die Datei oder schickt sie an einen Collector."""
+    if not finished_spans:
+        return
+    spans = finished_spans[:]
+    finished_spans.clear()
+    payload = build_otlp_payload(spans)
+    if TRACE_ENDPOINT:
+        try:
+            async with ClientSession(timeout=ClientTimeout(total=10)) as session:
+                async with session.post(TRACE_ENDPOINT, json=payload) as response:
+                    response.raise_for_status()
+            return
+        except Exception as e:
+            print(f"Fehler beim Senden der Spans, schreibe in Datei: {e}")
+    await asyncio.to_thread(write_spans, payload)
 
 # --- Modals ---
 
@@ -223,6 +1811,7 @@ class TicketReasonModal(ui.Modal):
         self.panel_data = panel_data
         self.guild_id = guild_id
 
+    @traced("ticket.create", lambda self, interaction: {"guild_id": interaction.guild.id, "panel": self.panel_key, "user_id": interaction.user.id})
     async def on_submit(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
@@ -231,27 +1820,35 @@ class TicketReasonModal(ui.Modal):
         reason = self.reason_input.value
         server_config = get_server_config(guild.id)
 
-        category = guild.get_channel(self.panel_data['category_id'])
-        if not category or not isinstance(category, discord.CategoryChannel):
+        staff_role_id = self.panel_data.get('staff_role_id', server_config.get('staff_role_id', 0))
+        staff_role = guild.get_role(staff_role_id)
+        if not staff_role:
             await interaction.followup.send(
-                f"<:4934error:1459953806870708388> Fehler: Kategorie nicht gefunden. Bitte kontaktiere einen Administrator.",
+                f"<:4934error:1459953806870708388> Fehler: Staff-Rolle nicht konfiguriert.",
                 ephemeral=True
             )
             return
 
-        staff_role_id = self.panel_data.get('staff_role_id', server_config.get('staff_role_id', 0))
-        staff_role = guild.get_role(staff_role_id)
-        if not staff_role:
+        # Kategorie mit freiem Platz wählen, bevor der Zähler erhöht wird
+        try:
+            with trace_span("category_lookup"):
+                category = await reserve_ticket_category(guild, self.panel_key, self.panel_data)
+        except discord.HTTPException as e:
+            print(f"Fehler beim Anlegen einer Überlauf-Kategorie: {e}")
+            category = None
+        if not category:
             await interaction.followup.send(
-                f"<:4934error:1459953806870708388> Fehler: Staff-Rolle nicht konfiguriert.",
+                f"<:4934error:1459953806870708388> Fehler: Keine Ticket-Kategorie mit freiem Platz gefunden. Bitte kontaktiere einen Administrator.",
                 ephemeral=True
             )
             return
+        trace_set(category_id=category.id, category_free=category_free_slots(category))
 
         # Ticket-Nummer aus Counter generieren
         server_config["ticket_counter"] = server_config.get("ticket_counter", 0) + 1
         ticket_number = server_config["ticket_counter"]
-        save_config(config)
+        trace_set(ticket_number=ticket_number)
+        mark_config_dirty()
 
         overwrites = {
             guild.default_role: discord.PermissionOverwrite(view_channel=False),
@@ -260,12 +1857,17 @@ class TicketReasonModal(ui.Modal):
             guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_channels=True)
         }
 
-        ticket_channel = await guild.create_text_channel(
-            name=f"{self.panel_key}-{ticket_number:04d}",
-            category=category,
-            overwrites=overwrites,
-            topic=f"Ticket von {user.name} | Typ: {self.panel_data['label']} | ID: {user.id}"
-        )
+        ticket_channel = None
+        try:
+            with trace_span("create_text_channel"):
+                ticket_channel = await guild.create_text_channel(
+                    name=f"{self.panel_key}-{ticket_number:04d}",
+                    category=category,
+                    overwrites=overwrites,
+                    topic=f"Ticket von {user.name} | Typ: {self.panel_data['label']} | ID: {user.id}"
+                )
+        finally:
+            release_ticket_category(category, ticket_channel)
 
         welcome_embed = discord.Embed(
             title=f"{self.panel_data.get('emoji', '🎫')} {self.panel_data['label']}",
@@ -282,36 +1884,59 @@ class TicketReasonModal(ui.Modal):
         welcome_embed.set_footer(text="© Custom Tickets by Custom Discord Development", icon_url=bot_avatar)
         welcome_embed.timestamp = datetime.now()
 
-        await ticket_channel.send(
-            content=f"{user.mention} {staff_role.mention}",
-            embed=welcome_embed,
-            view=TicketControlView(user.id, ticket_number, self.panel_key, staff_role_id, guild.id)
-        )
+        with trace_span("welcome_send"):
+            welcome_message = await ticket_channel.send(
+                content=f"{user.mention} {staff_role.mention}",
+                embed=welcome_embed,
+                view=TicketControlView(user.id, ticket_number, self.panel_key, staff_role_id, guild.id)
+            )
 
-        ai_response = get_ai_response(guild.id, reason)
+        ticket_data = {
+            "ticket_number": ticket_number,
+            "panel_key": self.panel_key,
+            "creator_id": user.id,
+            "staff_role_id": staff_role_id,
+            "control_message_id": welcome_message.id,
+            "created_at": datetime.now().timestamp(),
+            "claimed_by": None,
+            "assigned_to": None,
+            "reason": reason
+        }
+        register_open_ticket(guild.id, ticket_channel.id, ticket_data)
+        append_transcript_record(guild.id, ticket_channel.id, message_to_record(welcome_message))
+        enqueue_ticket(guild.id, ticket_channel.id, ticket_data)
+        inactivity_tracker.track(guild.id, ticket_channel.id, ticket_data["created_at"])
+        schedule_inactivity_check(guild.id, ticket_channel.id, self.panel_key)
+
+        with trace_span("ai_lookup"):
+            ai_response = get_ai_response(guild.id, reason)
         if ai_response:
             ai_embed = discord.Embed(
                 description=f"**KI-Support**\n{ai_response}",
                 color=get_color(guild.id, "info")
             )
-            await ticket_channel.send(embed=ai_embed)
+            with trace_span("ai_reply_send"):
+                await ticket_channel.send(embed=ai_embed)
         else:
-            await request_ai_training(ticket_channel, reason, ticket_number, user)
+            with trace_span("training_post"):
+                await request_ai_training(ticket_channel, reason, ticket_number, user)
 
-        await interaction.followup.send(
-            f"<:4569ok:1459953782556463250> Dein Ticket wurde erstellt: {ticket_channel.mention}",
-            ephemeral=True
-        )
+        with trace_span("followup_send"):
+            await interaction.followup.send(
+                f"<:4569ok:1459953782556463250> Dein Ticket wurde erstellt: {ticket_channel.mention}",
+                ephemeral=True
+            )
 
-        await log_action(
-            guild,
-            f"**Neues Ticket erstellt**\n"
-            f"**Ersteller:** {user.mention} (`{user.id}`)\n"
-            f"**Kanal:** {ticket_channel.mention}\n"
-            f"**Typ:** {self.panel_data['label']}\n"
-            f"**Grund:** {reason}...",
-            "success"
-        )
+        with trace_span("log_action"):
+            await log_action(
+                guild,
+                f"**Neues Ticket erstellt**\n"
+                f"**Ersteller:** {user.mention} (`{user.id}`)\n"
+                f"**Kanal:** {ticket_channel.mention}\n"
+                f"**Typ:** {self.panel_data['label']}\n"
+                f"**Grund:** {reason}...",
+                "success"
+            )
 
 class PanelCreateModal(ui.Modal):
     """Modal zum Erstellen eines neuen Panels."""
@@ -440,6 +2065,7 @@ class PanelDescriptionModal(ui.Modal):
         if self.panel_key in server_config.get("panels", {}):
             server_config["panels"][self.panel_key]["description"] = self.description_input.value
             save_config(config)
+            asyncio.create_task(refresh_posted_panels(interaction.guild, panel_id=self.panel_key))
 
             success_embed = discord.Embed(
                 title="<:4569ok:1459953782556463250> Panel fertiggestellt!",
@@ -450,6 +2076,69 @@ class PanelDescriptionModal(ui.Modal):
         else:
             await interaction.response.send_message("<:4934error:1459953806870708388> Fehler: Panel wurde nicht gefunden.", ephemeral=True)
 
+class PanelEditModal(ui.Modal):
+    """Modal zum Bearbeiten eines bestehenden Panels."""
+
+    def __init__(self, panel_key: str, panel_data: dict, guild_id: int):
+        super().__init__(title=f'Panel bearbeiten: {panel_key}'[:45])
+        self.panel_key = panel_key
+        self.guild_id = guild_id
+
+        self.label = ui.TextInput(label='Panel Name/Label', default=panel_data.get("label", ""), required=True, max_length=100)
+        self.emoji = ui.TextInput(label='Emoji', default=panel_data.get("emoji", "🎫"), required=True, max_length=10)
+        self.description_input = ui.TextInput(
+            label='Panel Beschreibung',
+            style=discord.TextStyle.paragraph,
+            default=panel_data.get("description", ""),
+            required=True,
+            max_length=1000
+        )
+        self.category_id = ui.TextInput(label='Kategorie ID', default=str(panel_data.get("category_id", "")), required=True, max_length=20)
+        self.staff_role_id = ui.TextInput(label='Staff Rollen ID für dieses Panel', default=str(panel_data.get("staff_role_id", "")), required=True, max_length=20)
+        for item in (self.label, self.emoji, self.description_input, self.category_id, self.staff_role_id):
+            self.add_item(item)
+
+    async def on_submit(self, interaction: discord.Interaction):
+        server_config = get_server_config(self.guild_id)
+        panel_data = server_config.get("panels", {}).get(self.panel_key)
+        if not panel_data:
+            await interaction.response.send_message("<:4934error:1459953806870708388> Fehler: Panel wurde nicht gefunden.", ephemeral=True)
+            return
+
+        try:
+            category_id = int(self.category_id.value)
+            staff_role_id = int(self.staff_role_id.value)
+        except ValueError:
+            await interaction.response.send_message("<:4934error:1459953806870708388> Ungültige Kategorie- oder Staff-Rollen-ID!", ephemeral=True)
+            return
+
+        category = interaction.guild.get_channel(category_id)
+        if not category or not isinstance(category, discord.CategoryChannel):
+            await interaction.response.send_message(f"<:4934error:1459953806870708388> Kategorie mit ID `{category_id}` nicht gefunden!", ephemeral=True)
+            return
+        if not interaction.guild.get_role(staff_role_id):
+            await interaction.response.send_message(f"<:4934error:1459953806870708388> Staff-Rolle mit ID `{staff_role_id}` nicht gefunden!", ephemeral=True)
+            return
+
+        panel_data.update({
+            "label": self.label.value,
+            "emoji": self.emoji.value,
+            "description": self.description_input.value,
+            "category_id": category_id,
+            "staff_role_id": staff_role_id
+        })
+        save_config(config)
+
+        await interaction.response.send_message(
+            f"<:4569ok:1459953782556463250> Panel `{self.panel_key}` wurde aktualisiert. Gesendete Panel-Nachrichten werden angepasst.",
+            ephemeral=True
+        )
+        updated, removed = await refresh_posted_panels(interaction.guild, panel_id=self.panel_key)
+        await interaction.followup.send(
+            f"<:4569ok:1459953782556463250> {updated} Panel-Nachricht(en) aktualisiert, {removed} nicht mehr vorhandene entfernt.",
+            ephemeral=True
+        )
+
 class CloseReasonModal(ui.Modal):
     """Modal für Close with Reason."""
 
@@ -499,9 +2188,9 @@ class AITrainingModal(ui.Modal):
         max_length=500
     )
 
-    def __init__(self, training_id: str, guild_id: int):
+    def __init__(self, cluster_id: str, guild_id: int):
         super().__init__(title='KI-Training')
-        self.training_id = training_id
+        self.cluster_id = cluster_id
         self.guild_id = guild_id
 
     async def on_submit(self, interaction: discord.Interaction):
@@ -514,11 +2203,15 @@ class AITrainingModal(ui.Modal):
 
         ai_training["servers"][guild_id_str]["keywords"][keywords] = response
 
-        # Entferne aus Pending
-        if guild_id_str in ai_training["servers"] and self.training_id in ai_training["servers"][guild_id_str].get("pending_training", {}):
-            del ai_training["servers"][guild_id_str]["pending_training"][self.training_id]
+        # Anfragen des Clusters als Beispiele für die semantische Suche merken
+        server_training = ai_training["servers"][guild_id_str]
+        cluster = server_training.get("training_clusters", {}).get(self.cluster_id, {})
+        pending = server_training.get("pending_training", {})
+        examples = [keywords] + [pending[t]["reason"] for t in cluster.get("entries", [self.cluster_id]) if t in pending]
 
-        save_ai_training(ai_training)
+        # Entferne alle ähnlichen Anfragen aus Pending; gespeichert wird gesammelt über ai_training_saver
+        resolved = resolve_training_cluster(self.guild_id, self.cluster_id)
+        mark_ai_training_dirty()
 
         # Update Admin Message
         embed = interaction.message.embeds[0]
@@ -526,9 +2219,15 @@ class AITrainingModal(ui.Modal):
         embed.title = "<:4569ok:1459953782556463250> KI-Training abgeschlossen"
         embed.add_field(name="Keywords", value=f"`{keywords}`", inline=False)
         embed.add_field(name="Antwort", value=response, inline=False)
+        if len(resolved) > 1:
+            embed.add_field(name="Gelöste Anfragen", value=f"`{len(resolved)}`", inline=False)
 
         await interaction.response.edit_message(embed=embed, view=None)
 
+        # Vektorindex erst nach der Antwort erweitern, der erste Aufbau kann länger als die Interaktionsfrist dauern
+        if get_server_config(self.guild_id).get("ai_semantic", 0):
+            asyncio.create_task(add_semantic_examples(guild_id_str, examples, keywords))
+
 # --- Views ---
 
 class TicketControlView(ui.View):
@@ -543,7 +2242,15 @@ class TicketControlView(ui.View):
         self.guild_id = guild_id
         self.claimed_by = None
 
+    @classmethod
+    def from_ticket_data(cls, guild_id: int, ticket_data: dict):
+        """Erstellt die View eines offenen Tickets aus der Registry."""
+        view = cls(ticket_data["creator_id"], ticket_data["ticket_number"], ticket_data["panel_key"], ticket_data["staff_role_id"], guild_id)
+        view.claimed_by = ticket_data.get("claimed_by")
+        return view
+
     @ui.button(label="Claim", emoji="✋", style=discord.ButtonStyle.success, custom_id="ticket_claim")
+    @traced("ticket.claim", lambda self, interaction, button: {"guild_id": self.guild_id, "panel": self.panel_key, "ticket_number": self.ticket_number, "user_id": interaction.user.id})
     async def claim_button(self, interaction: discord.Interaction, button: ui.Button):
         if not is_staff(interaction.user, self.staff_role_id):
             await interaction.response.send_message(
@@ -560,19 +2267,31 @@ class TicketControlView(ui.View):
             return
 
         self.claimed_by = interaction.user.id
+        ticket_data = get_open_ticket(self.guild_id, interaction.channel.id)
+        if ticket_data is not None:
+            ticket_data["claimed_by"] = interaction.user.id
+            mark_config_dirty()
+        queue = ticket_queues.get(self.guild_id)
+        if queue:
+            queue.discard(interaction.channel.id)
         button.disabled = True
         button.label = f"Claimed by {interaction.user.name}"
 
         # Permissions anpassen
-        await interaction.channel.set_permissions(interaction.user, view_channel=True, send_messages=True, manage_channels=True)
+        with trace_span("set_permissions"):
+            await apply_overwrites(interaction.channel, {
+                interaction.user: discord.PermissionOverwrite(view_channel=True, send_messages=True, manage_channels=True)
+            })
 
-        await interaction.response.edit_message(view=self)
+        with trace_span("edit_message"):
+            await interaction.response.edit_message(view=self)
 
         claim_embed = discord.Embed(
             description=f"<:8649warning:1459953895689162842> **{interaction.user.mention}** hat das Ticket übernommen!",
             color=get_color(self.guild_id, "success")
         )
-        await interaction.channel.send(embed=claim_embed)
+        with trace_span("claim_announce"):
+            await interaction.channel.send(embed=claim_embed)
 
     @ui.button(label="Close", emoji="🔒", style=discord.ButtonStyle.danger, custom_id="ticket_close")
     async def close_button(self, interaction: discord.Interaction, button: ui.Button):
@@ -606,30 +2325,52 @@ class TicketControlView(ui.View):
 
         await interaction.response.send_modal(CloseReasonModal(self))
 
+    @traced("ticket.close", lambda self, channel, closer, reason=None: {"guild_id": self.guild_id, "panel": self.panel_key, "ticket_number": self.ticket_number, "user_id": closer.id})
     async def close_ticket(self, channel: discord.TextChannel, closer: discord.Member, reason: str = None):
-        """Schließt das Ticket und erstellt Transkript."""
+        """Schließt das Ticket: Transkript sichern, Ticket austragen und die Nebenwirkungen als Close-Job einreihen.
+
+        HTML-Transkript, Log-Nachricht, DM an den Ersteller und das Löschen des Kanals
+        erledigt der Close-Job im Hintergrund mit Wiederholungen.
+        """
         guild = channel.guild
         opener = guild.get_member(self.creator_id)
         opener_mention = f"<@{self.creator_id}>" if not opener else opener.mention
 
         # Transkript erstellen
-        messages = [message async for message in channel.history(limit=None, oldest_first=True)]
+        with trace_span("collect_records"):
+            records = await collect_transcript_records(channel)
+        trace_set(records=len(records))
         transcript_content = f"TRANSKRIPT - TICKET {self.panel_key}-{self.ticket_number:04d}\n"
         transcript_content += f"Server: {guild.name}\n"
         transcript_content += f"Ersteller: {opener.name if opener else 'Unknown'} ({self.creator_id})\n"
         transcript_content += f"Geschlossen von: {closer.name} ({closer.id})\n"
         transcript_content += f"Grund: {reason if reason else 'Kein Grund angegeben.'}\n"
         transcript_content += "="*50 + "\n\n"
-
-        for msg in messages:
-            timestamp = msg.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            content = msg.content if msg.content else "[Embed/Anhang]"
-            transcript_content += f"[{timestamp}] {msg.author.name}: {content}\n"
-
-        os.makedirs("transcripts", exist_ok=True)
-        filename = f"transcripts/ticket-{self.panel_key}-{self.ticket_number}-{int(datetime.now().timestamp())}.txt"
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(transcript_content)
+        transcript_content += format_transcript_records(records)
+
+        transcript_dir = get_transcript_dir(self.guild_id)
+        os.makedirs(transcript_dir, exist_ok=True)
+        filename = f"{transcript_dir}/ticket-{self.panel_key}-{self.ticket_number}-{int(datetime.now().timestamp())}.txt"
+        with trace_span("write_transcript"):
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(transcript_content)
+
+        html_filename = filename[:-len(".txt")] + ".html"
+        ticket_data = get_open_ticket(self.guild_id, channel.id) or {}
+        with trace_span("seal_log"):
+            sealed_log = await asyncio.to_thread(seal_transcript_log, self.guild_id, channel.id, filename, {
+                "ticket_number": self.ticket_number,
+                "panel_key": self.panel_key,
+                "channel_id": channel.id,
+                "creator_id": self.creator_id,
+                "closer_id": closer.id,
+                "claimed_by": self.claimed_by,
+                "ticket_reason": ticket_data.get("reason"),
+                "close_reason": reason,
+                "created_at": ticket_data.get("created_at"),
+                "closed_at": datetime.now().timestamp(),
+                "html": html_filename
+            }, records)
 
         open_time = "Unbekannt"
         try:
@@ -690,24 +2431,27 @@ class TicketControlView(ui.View):
             icon_url=guild.me.display_avatar.url if guild.me.display_avatar else None
         )
 
-        log_channel = guild.get_channel(get_server_config(self.guild_id).get("log_channel_id", 0))
-        if log_channel:
-            try:
-                await log_channel.send(embed=close_embed)
-            except Exception as e:
-                print(f"<:4934error:1459953806870708388> Kritischer Fehler: {e}")
-                print(f"Fehler beim Senden des Close-Logs: {e}")
-
-        if opener:
-            try:
-                await opener.send(embed=close_embed)
-            except:
-                pass
-
-        try:
-            await channel.delete(reason=f"Ticket geschlossen von {closer.name}")
-        except Exception as e:
-            print(f"Fehler beim Löschen des Kanals: {e}")
+        with trace_span("unregister"):
+            unregister_open_ticket(self.guild_id, channel.id)
+
+        with trace_span("enqueue_close_job"):
+            enqueue_close_job({
+                "id": f"close_{channel.id}",
+                "guild_id": self.guild_id,
+                "channel_id": channel.id,
+                "records": sealed_log,
+                "html": html_filename,
+                "html_title": f"Transkript - Ticket {self.panel_key}-{self.ticket_number:04d}",
+                "html_header": {
+                    "Server": guild.name,
+                    "Ersteller": f"{opener.name if opener else 'Unknown'} ({self.creator_id})",
+                    "Geschlossen von": f"{closer.name} ({closer.id})",
+                    "Grund": reason if reason else "Kein Grund angegeben."
+                },
+                "embed": close_embed.to_dict(),
+                "opener_id": self.creator_id if opener else None,
+                "delete_reason": f"Ticket geschlossen von {closer.name}"
+            })
 
 class ConfirmCloseView(ui.View):
     """Bestätigungs-View für Close."""
@@ -718,13 +2462,19 @@ class ConfirmCloseView(ui.View):
         self.reason = reason
 
     @ui.button(label="Schließen", style=discord.ButtonStyle.danger)
+    @traced("ticket.close_confirm", lambda self, interaction, button: {"guild_id": interaction.guild.id, "ticket_number": self.ticket_view.ticket_number})
     async def confirm_button(self, interaction: discord.Interaction, button: ui.Button):
         for item in self.ticket_view.children:
             item.disabled = True
 
+        # Die Steuer-Nachricht steht in der Registry, ältere Tickets werden noch im Verlauf gesucht
+        ticket_data = get_open_ticket(interaction.guild.id, interaction.channel.id) or {}
         try:
-            original_msg = [msg async for msg in interaction.channel.history(limit=10) if msg.embeds and msg.author == interaction.guild.me][0]
-            await original_msg.edit(view=self.ticket_view)
+            if ticket_data.get("control_message_id"):
+                original_msg = interaction.channel.get_partial_message(ticket_data["control_message_id"])
+            else:
+                original_msg = [msg async for msg in interaction.channel.history(limit=10) if msg.embeds and msg.author == interaction.guild.me][0]
+            queue_message_edit(original_msg, view=self.ticket_view)
         except:
             pass
 
@@ -742,31 +2492,52 @@ class ConfirmCloseView(ui.View):
         await interaction.response.send_message("<:4934error:1459953806870708388> Aktion abgebrochen.", ephemeral=True)
         self.stop()
 
-class AITrainingView(ui.View):
-    """View für AI Training."""
+class AITrainingButton(ui.DynamicItem[ui.Button], template=r"ai_(?P<action>train|ignore)(?::(?P<cluster_id>\w+))?"):
+    """Trainings-Button - PERSISTENT über die Cluster-ID in der custom_id."""
+
+    def __init__(self, action: str, cluster_id: str):
+        super().__init__(ui.Button(
+            label="Trainieren" if action == "train" else "Ablehnen",
+            style=discord.ButtonStyle.primary if action == "train" else discord.ButtonStyle.danger,
+            custom_id=f"ai_{action}:{cluster_id}"
+        ))
+        self.action = action
+        self.cluster_id = cluster_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        cluster_id = match["cluster_id"]
+        if not cluster_id:
+            # Ältere Nachrichten mit statischer custom_id über den Nachrichten-Index auflösen,
+            # Nachrichten aus der Zeit vor den Clustern über Kanal und Grund im Embed
+            cluster_id = get_training_message_index().get(interaction.message.id) \
+                or find_legacy_training(interaction.guild.id, interaction.message)
+        return cls(match["action"], cluster_id)
 
-    def __init__(self, training_id: str, reason: str, guild_id: int):
-        super().__init__(timeout=None)
-        self.training_id = training_id
-        self.reason = reason
-        self.guild_id = guild_id
+    async def callback(self, interaction: discord.Interaction):
+        if not self.cluster_id:
+            await interaction.response.send_message("<:4934error:1459953806870708388> Diese Trainings-Anfrage ist nicht mehr verfügbar.", ephemeral=True)
+            return
 
-    @ui.button(label="Trainieren", style=discord.ButtonStyle.primary, custom_id="ai_train")
-    async def train_button(self, interaction: discord.Interaction, button: ui.Button):
-        await interaction.response.send_modal(AITrainingModal(self.training_id, self.guild_id))
+        if self.action == "train":
+            await interaction.response.send_modal(AITrainingModal(self.cluster_id, interaction.guild.id))
+            return
 
-    @ui.button(label="Ablehnen", style=discord.ButtonStyle.danger, custom_id="ai_ignore")
-    async def ignore_button(self, interaction: discord.Interaction, button: ui.Button):
-        guild_id_str = str(self.guild_id)
-        if guild_id_str in ai_training["servers"] and self.training_id in ai_training["servers"][guild_id_str].get("pending_training", {}):
-            del ai_training["servers"][guild_id_str]["pending_training"][self.training_id]
-            save_ai_training(ai_training)
+        resolve_training_cluster(interaction.guild.id, self.cluster_id)
 
         embed = interaction.message.embeds[0]
-        embed.color = get_color(self.guild_id, "error")
+        embed.color = get_color(interaction.guild.id, "error")
         embed.title = "<:4934error:1459953806870708388> KI-Training abgelehnt"
         await interaction.response.edit_message(embed=embed, view=None)
 
+class AITrainingView(ui.View):
+    """View für AI Training."""
+
+    def __init__(self, cluster_id: str):
+        super().__init__(timeout=None)
+        self.add_item(AITrainingButton("train", cluster_id))
+        self.add_item(AITrainingButton("ignore", cluster_id))
+
 class TicketPanelView(ui.View):
     """View für die Ticket-Panel Buttons - PERSISTENT."""
 
@@ -784,40 +2555,121 @@ class MultiTicketPanelView(ui.View):
             if panel.get("enabled", True):
                 self.add_item(TicketButton(key, panel, guild_id))
 
-class TicketButton(ui.Button):
-    """Individueller Ticket-Button - PERSISTENT."""
+class TicketButton(ui.DynamicItem[ui.Button], template=r"ticket_create_(?P<panel_key>.+)_(?P<guild_id>\d+)"):
+    """Individueller Ticket-Button - PERSISTENT über Panel und Server in der custom_id."""
 
     def __init__(self, panel_key: str, panel_data: dict, guild_id: int):
-        super().__init__(
+        super().__init__(ui.Button(
             label=panel_data.get('label', panel_key),
             emoji=panel_data.get('emoji', '🎫'),
             style=discord.ButtonStyle.secondary,
             custom_id=f"ticket_create_{panel_key}_{guild_id}"
-        )
+        ))
         self.panel_key = panel_key
-        self.panel_data = panel_data
         self.guild_id = guild_id
 
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        # Panel-Daten werden erst im Callback aus der Konfiguration gelesen
+        return cls(match["panel_key"], {}, int(match["guild_id"]))
+
     async def callback(self, interaction: discord.Interaction):
-        # Panel-Daten neu laden für den Fall, dass sie sich geändert haben
-        server_config = get_server_config(self.guild_id)
-        current_panel_data = server_config.get("panels", {}).get(self.panel_key)
+        await open_ticket_modal(interaction, self.guild_id, self.panel_key)
 
-        if not current_panel_data:
-            await interaction.response.send_message(
-                "<:4934error:1459953806870708388> Dieses Panel wurde gelöscht oder ist nicht mehr verfügbar.",
-                ephemeral=True
-            )
+async def open_ticket_modal(interaction: discord.Interaction, guild_id: int, panel_key: str):
+    """Öffnet das Ticket-Modal eines Panels; die Panel-Daten kommen frisch aus der Konfiguration."""
+    server_config = get_server_config(guild_id)
+    current_panel_data = server_config.get("panels", {}).get(panel_key)
+
+    if not current_panel_data:
+        await interaction.response.send_message(
+            "<:4934error:1459953806870708388> Dieses Panel wurde gelöscht oder ist nicht mehr verfügbar.",
+            ephemeral=True
+        )
+        return
+
+    if not current_panel_data.get("enabled", True):
+        await interaction.response.send_message(
+            "<:4934error:1459953806870708388> Dieses Panel ist derzeit deaktiviert.",
+            ephemeral=True
+        )
+        return
+
+    await interaction.response.send_modal(TicketReasonModal(panel_key, current_panel_data, guild_id))
+
+SELECT_PANELS_PER_PAGE = 23
+
+# custom_ids dürfen höchstens 100 Zeichen lang sein; lange Multipanel-IDs werden als Hash kodiert
+MAX_SELECT_REF_LENGTH = 40
+
+def encode_select_ref(ref: Optional[str]) -> str:
+    if not ref:
+        return ""
+    if len(ref) <= MAX_SELECT_REF_LENGTH and not ref.startswith("#"):
+        return ref
+    return "#" + hashlib.sha1(ref.encode()).hexdigest()[:16]
+
+def decode_select_ref(guild_id: int, token: str) -> Optional[str]:
+    if not token.startswith("#"):
+        return token or None
+    for multipanel_id in get_server_config(guild_id).get("multipanels", {}):
+        if encode_select_ref(multipanel_id) == token:
+            return multipanel_id
+    return None
+
+class TicketSelect(ui.DynamicItem[ui.Select], template=r"ticket_select:(?P<guild_id>\d+):(?P<page>\d+):(?P<kind>multipanel|setup):?(?P<ref>.*)"):
+    """Seitenweises Auswahlmenü für Multipanels - PERSISTENT über eine custom_id pro Nachricht."""
+
+    def __init__(self, guild_id: int, kind: str, ref: Optional[str], page: int = 0):
+        self.guild_id = guild_id
+        self.kind = kind
+        self.ref = ref or None
+        self.page = page
+        super().__init__(ui.Select(
+            placeholder="Wähle eine Kategorie aus, um ein Ticket zu erstellen...",
+            options=self.build_options(),
+            custom_id=f"ticket_select:{guild_id}:{page}:{kind}:{encode_select_ref(ref)}"
+        ))
+
+    def build_options(self) -> List[discord.SelectOption]:
+        payload = get_panel_payload(self.guild_id, self.kind, self.ref)
+        panels = list(payload["buttons"].items()) if payload else []
+        start = self.page * SELECT_PANELS_PER_PAGE
+        options = [
+            discord.SelectOption(label=data["label"][:100], value=pid, emoji=data["emoji"], description=data.get("description", "")[:100] or None)
+            for pid, data in panels[start:start + SELECT_PANELS_PER_PAGE]
+        ]
+        if self.page > 0:
+            options.append(discord.SelectOption(label="Vorherige Kategorien", value=f"__page:{self.page - 1}", emoji="◀️"))
+        if start + SELECT_PANELS_PER_PAGE < len(panels):
+            options.append(discord.SelectOption(label="Weitere Kategorien", value=f"__page:{self.page + 1}", emoji="▶️"))
+        return options or [discord.SelectOption(label="Keine Kategorien verfügbar", value="__none")]
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Select, match):
+        guild_id = int(match["guild_id"])
+        return cls(guild_id, match["kind"], decode_select_ref(guild_id, match["ref"]), int(match["page"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        value = self.item.values[0]
+        if value == "__none":
+            await interaction.response.send_message("<:4934error:1459953806870708388> Keine aktiven Panels verfügbar.", ephemeral=True)
             return
 
-        if not current_panel_data.get("enabled", True):
-            await interaction.response.send_message(
-                "<:4934error:1459953806870708388> Dieses Panel ist derzeit deaktiviert.",
-                ephemeral=True
-            )
+        if value.startswith("__page:"):
+            view = ui.View(timeout=None)
+            view.add_item(TicketSelect(self.guild_id, self.kind, self.ref, int(value.split(":", 1)[1])))
+            await interaction.response.send_message(view=view, ephemeral=True)
             return
 
-        await interaction.response.send_modal(TicketReasonModal(self.panel_key, current_panel_data, self.guild_id))
+        await open_ticket_modal(interaction, self.guild_id, value)
+
+class TicketSelectView(ui.View):
+    """View für Multipanels im Auswahlmenü-Modus - PERSISTENT."""
+
+    def __init__(self, guild_id: int, kind: str, ref: Optional[str]):
+        super().__init__(timeout=None)
+        self.add_item(TicketSelect(guild_id, kind, ref))
 
 # --- Bot Setup ---
 
@@ -826,32 +2678,172 @@ intents.message_content = True
 intents.members = True
 
 bot = commands.Bot(command_prefix="!", intents=intents)
+install_rest_budget(bot)
+
+persistent_views_registered = False
 
 async def setup_persistent_views():
-    """Registriert alle persistenten Views beim Bot-Start."""
+    """Registriert alle persistenten Buttons beim Bot-Start (nur einmal pro Prozess)."""
+    global persistent_views_registered
+    if persistent_views_registered:
+        return
     print("🔄 Registriere persistente Views...")
 
-    for guild_id_str, server_config in config["servers"].items():
-        guild_id = int(guild_id_str)
+    # Panel- und KI-Training-Buttons werden über ihre custom_id aufgelöst,
+    # unabhängig von der Anzahl der Panels und Server
+    bot.add_dynamic_items(TicketButton, TicketSelect, AITrainingButton)
+    persistent_views_registered = True
 
-        # Einzelne Panels registrieren
-        panels = server_config.get("panels", {})
-        for panel_id, panel_data in panels.items():
-            if panel_data.get("enabled", True):
-                view = TicketPanelView(panel_id, panel_data, guild_id)
-                bot.add_view(view)
-
-        # Multipanels registrieren
-        multipanels = server_config.get("multipanels", {})
-        for mp_id, panel_ids in multipanels.items():
-            active_panels = {pid: panels[pid] for pid in panel_ids if pid in panels and panels[pid].get("enabled", True)}
-            if active_panels:
-                view = MultiTicketPanelView(active_panels, guild_id)
-                bot.add_view(view)
-
-    # Ticket Control Views registrieren (für offene Tickets)
     print("✅ Persistente Views registriert!")
 
+# --- Panel-Rendering ---
+PANEL_RENDER_CACHE_SIZE = 256
+PANEL_EDIT_DELAY = 1.0
+# Discord erlaubt 4096 Zeichen Beschreibung; Platz für den Hinweis auf weitere Kategorien lassen
+PANEL_DESCRIPTION_LIMIT = 3900
+panel_render_cache: "OrderedDict[str, dict]" = OrderedDict()
+
+def get_panel_payload(guild_id: int, kind: str, ref: Optional[str]) -> Optional[dict]:
+    """Gibt Embed und Buttons einer Panel-Nachricht zurück, gecacht über einen Hash der Panel-Konfiguration.
+
+    kind ist "panel" (einzelnes Panel), "multipanel" oder "setup" (alle Panels).
+    """
+    server_config = get_server_config(guild_id)
+    panels = server_config.get("panels", {})
+    if kind == "panel":
+        panel_ids = [ref]
+    elif kind == "multipanel":
+        panel_ids = server_config.get("multipanels", {}).get(ref, [])
+    else:
+        panel_ids = list(panels)
+    active_panels = {pid: panels[pid] for pid in panel_ids if pid in panels and panels[pid].get("enabled", True)}
+    if not active_panels:
+        return None
+
+    bot_avatar = bot.user.display_avatar.url if bot.user and bot.user.display_avatar else None
+    color = get_color(guild_id, "default")
+    cache_key = hashlib.sha1(json.dumps([kind, ref, active_panels, color, bot_avatar], sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+    if cache_key in panel_render_cache:
+        panel_render_cache.move_to_end(cache_key)
+        return panel_render_cache[cache_key]
+
+    if kind == "panel":
+        panel_data = active_panels[ref]
+        embed = discord.Embed(
+            title=f"{panel_data.get('emoji', '🎫')} {panel_data['label']}",
+            description=panel_data.get('description', 'Klicke auf den Button unten, um ein Ticket zu erstellen.'),
+            color=color
+        )
+    elif kind == "multipanel":
+        # Beschreibungen der Panels sammeln, solange sie in das Embed-Limit passen
+        description = ""
+        for shown, p_data in enumerate(active_panels.values()):
+            part = f"**{p_data.get('emoji', '🎫')} {p_data['label']}**\n{p_data.get('description', 'Keine Beschreibung.')}"
+            candidate = f"{description}\n\n{part}" if description else part
+            if len(candidate) > PANEL_DESCRIPTION_LIMIT:
+                description += f"\n\n… und {len(active_panels) - shown} weitere Kategorien im Auswahlmenü."
+                break
+            description = candidate
+        embed = discord.Embed(title="Kontakt", description=description, color=color)
+    else:
+        embed = discord.Embed(
+            title="🎫 Ticket-System",
+            description="Wähle eine Kategorie aus, um ein Ticket zu erstellen.",
+            color=color
+        )
+    embed.set_footer(text="© Custom Tickets by Custom Discord Development", icon_url=bot_avatar)
+
+    payload = {
+        "embed": embed.to_dict(),
+        "buttons": {
+            pid: {"label": p_data["label"], "emoji": p_data.get("emoji", "🎫"), "description": p_data.get("description", "")}
+            for pid, p_data in active_panels.items()
+        }
+    }
+    panel_render_cache[cache_key] = payload
+    if len(panel_render_cache) > PANEL_RENDER_CACHE_SIZE:
+        panel_render_cache.popitem(last=False)
+    return payload
+
+MAX_PANEL_BUTTONS = 25
+
+def render_panel_message(guild_id: int, kind: str, ref: Optional[str], mode: str = "buttons") -> Optional[tuple]:
+    """Erstellt (Embed, View) einer Panel-Nachricht aus dem gecachten Payload.
+
+    Mehr als 25 Panels passen nicht in Buttons, dann wird immer das Auswahlmenü verwendet.
+    """
+    payload = get_panel_payload(guild_id, kind, ref)
+    if not payload:
+        return None
+    embed = discord.Embed.from_dict(payload["embed"])
+    if kind != "panel" and (mode == "select" or len(payload["buttons"]) > MAX_PANEL_BUTTONS):
+        return embed, TicketSelectView(guild_id, kind, ref)
+    return embed, MultiTicketPanelView(payload["buttons"], guild_id)
+
+def register_posted_panel(guild_id: int, message: discord.Message, kind: str, ref: Optional[str], mode: str = "buttons"):
+    """Merkt sich eine gesendete Panel-Nachricht, damit Änderungen sie aktualisieren können."""
+    server_config = get_server_config(guild_id)
+    server_config.setdefault("posted_panels", {})[str(message.id)] = {
+        "kind": kind,
+        "ref": ref,
+        "mode": mode,
+        "channel_id": message.channel.id
+    }
+    save_config(config)
+
+def posted_panel_shows(server_config: dict, posted: dict, panel_id: str) -> bool:
+    """Prüft, ob eine gesendete Panel-Nachricht ein bestimmtes Panel enthält."""
+    if posted["kind"] == "panel":
+        return posted["ref"] == panel_id
+    if posted["kind"] == "multipanel":
+        return panel_id in server_config.get("multipanels", {}).get(posted["ref"], [])
+    return True
+
+async def refresh_posted_panels(guild: discord.Guild, panel_id: str = None, multipanel_id: str = None, all_panels: bool = False):
+    """Aktualisiert alle gesendeten Panel-Nachrichten, die ein Panel oder Multipanel zeigen (oder alle)."""
+    server_config = get_server_config(guild.id)
+    posted_panels = server_config.get("posted_panels", {})
+    targets = [
+        (message_id, posted) for message_id, posted in posted_panels.items()
+        if all_panels
+        or (panel_id and posted_panel_shows(server_config, posted, panel_id))
+        or (multipanel_id and posted["kind"] == "multipanel" and posted["ref"] == multipanel_id)
+    ]
+
+    updated, removed = 0, 0
+    for message_id, posted in targets:
+        channel = guild.get_channel(posted["channel_id"])
+        if not channel:
+            posted_panels.pop(message_id, None)
+            removed += 1
+            continue
+
+        message = channel.get_partial_message(int(message_id))
+        rendered = render_panel_message(guild.id, posted["kind"], posted["ref"], posted.get("mode", "buttons"))
+        try:
+            if rendered:
+                await queue_message_edit(message, embed=rendered[0], view=rendered[1])
+                updated += 1
+            else:
+                # Panel gelöscht oder deaktiviert: Hinweis statt des alten Embeds, danach nicht mehr verfolgen
+                removed_embed = discord.Embed(
+                    description="<:8649warning:1459953895689162842> Dieses Panel wurde entfernt.",
+                    color=get_color(guild.id, "warning")
+                )
+                await queue_message_edit(message, embed=removed_embed, view=None)
+                posted_panels.pop(message_id, None)
+                removed += 1
+        except discord.NotFound:
+            posted_panels.pop(message_id, None)
+            removed += 1
+        except Exception as e:
+            print(f"Fehler beim Aktualisieren der Panel-Nachricht {message_id}: {e}")
+        await asyncio.sleep(PANEL_EDIT_DELAY)
+
+    if removed:
+        save_config(config)
+    return updated, removed
+
 @bot.tree.command(name="ticket_setup", description="🚀 Sendet das Ticket-Panel")
 @check_permission("ticket_setup")
 async def ticket_setup(interaction: discord.Interaction):
@@ -863,18 +2855,15 @@ async def ticket_setup(interaction: discord.Interaction):
         await interaction.response.send_message("<:4934error:1459953806870708388> Keine Panels konfiguriert! Nutze `/panel_create`.", ephemeral=True)
         return
 
-    embed = discord.Embed(
-        title="🎫 Ticket-System",
-        description="Wähle eine Kategorie aus, um ein Ticket zu erstellen.",
-        color=get_color(interaction.guild.id, "default")
-    )
-
-    bot_avatar = bot.user.display_avatar.url if bot.user and bot.user.display_avatar else None
-    embed.set_footer(text="© Custom Tickets by Custom Discord Development", icon_url=bot_avatar)
+    rendered = render_panel_message(interaction.guild.id, "setup", None)
+    if not rendered:
+        await interaction.response.send_message("<:4934error:1459953806870708388> Keine aktiven Panels konfiguriert!", ephemeral=True)
+        return
 
     # Multipanel View verwenden um alle Panels zu zeigen
-    view = MultiTicketPanelView(panels, interaction.guild.id)
-    await interaction.channel.send(embed=embed, view=view)
+    embed, view = rendered
+    message = await interaction.channel.send(embed=embed, view=view)
+    register_posted_panel(interaction.guild.id, message, "setup", None)
     await interaction.response.send_message("<:4569ok:1459953782556463250> Ticket-Panel wurde gesendet.", ephemeral=True)
 
 @bot.tree.command(name="panel_create", description="➕ Erstellt ein neues Ticket-Panel")
@@ -893,9 +2882,21 @@ async def panel_delete(interaction: discord.Interaction, panel_id: str):
         del server_config["panels"][panel_id]
         save_config(config)
         await interaction.response.send_message(f"<:4569ok:1459953782556463250> Panel `{panel_id}` wurde gelöscht.", ephemeral=True)
+        asyncio.create_task(refresh_posted_panels(interaction.guild, panel_id=panel_id))
     else:
         await interaction.response.send_message(f"<:4934error:1459953806870708388> Panel `{panel_id}` nicht gefunden.", ephemeral=True)
 
+@bot.tree.command(name="panel_edit", description="✏️ Bearbeitet ein Ticket-Panel")
+@app_commands.describe(panel_id="Die ID des zu bearbeitenden Panels")
+@check_permission("panel_edit")
+async def panel_edit(interaction: discord.Interaction, panel_id: str):
+    """Bearbeitet ein Panel und aktualisiert alle gesendeten Kopien."""
+    panel_data = get_server_config(interaction.guild.id).get("panels", {}).get(panel_id)
+    if not panel_data:
+        await interaction.response.send_message(f"<:4934error:1459953806870708388> Panel `{panel_id}` nicht gefunden.", ephemeral=True)
+        return
+    await interaction.response.send_modal(PanelEditModal(panel_id, panel_data, interaction.guild.id))
+
 @bot.tree.command(name="panel_list", description="📋 Listet alle konfigurierten Panels auf")
 @check_permission("panel_list")
 async def panel_list(interaction: discord.Interaction):
@@ -933,6 +2934,7 @@ async def panel_list(interaction: discord.Interaction):
     app_commands.Choice(name="Embed Farbe: Error", value="color_error"),
     app_commands.Choice(name="Embed Farbe: Warning", value="color_warning"),
     app_commands.Choice(name="Embed Farbe: Info", value="color_info"),
+    app_commands.Choice(name="KI Semantische Suche (0/1)", value="ai_semantic"),
 ])
 async def config_set(interaction: discord.Interaction, setting: str, value: str):
     """Setzt Konfigurationswerte."""
@@ -1027,37 +3029,80 @@ async def panel_send(interaction: discord.Interaction, panel_id: str):
         await interaction.response.send_message(f"<:4934error:1459953806870708388> Panel `{panel_id}` ist deaktiviert!", ephemeral=True)
         return
 
-    embed = discord.Embed(
-        title=f"{panel_data.get('emoji', '🎫')} {panel_data['label']}",
-        description=panel_data.get('description', 'Klicke auf den Button unten, um ein Ticket zu erstellen.'),
-        color=get_color(interaction.guild.id, "default")
-    )
-
-    bot_avatar = bot.user.display_avatar.url if bot.user and bot.user.display_avatar else None
-    embed.set_footer(text="© Custom Tickets by Custom Discord Development", icon_url=bot_avatar)
-
-    view = TicketPanelView(panel_id, panel_data, interaction.guild.id)
-    await interaction.channel.send(embed=embed, view=view)
+    embed, view = render_panel_message(interaction.guild.id, "panel", panel_id)
+    message = await interaction.channel.send(embed=embed, view=view)
+    register_posted_panel(interaction.guild.id, message, "panel", panel_id)
     await interaction.response.send_message(f"<:4569ok:1459953782556463250> Panel `{panel_id}` wurde gesendet.", ephemeral=True)
 
+MULTIPANEL_PICKER_SELECTS = 4
+
 class MultipanelSelect(ui.Select):
-    def __init__(self, panels: dict):
+    """Ein Auswahlmenü mit bis zu 25 Panels einer Seite; die Auswahl wird in der View gesammelt."""
+
+    def __init__(self, chunk: List[tuple], start: int, selected: set, row: int):
+        self.chunk_ids = [pid for pid, _ in chunk]
         options = [
-            discord.SelectOption(label=data["label"], value=pid, emoji=data.get("emoji", "🎫"))
-            for pid, data in panels.items()
+            discord.SelectOption(label=data["label"][:100], value=pid, emoji=data.get("emoji", "🎫"), default=pid in selected)
+            for pid, data in chunk
         ]
-        super().__init__(placeholder="Wähle die Panels für das Multipanel aus...", min_values=1, max_values=len(options), options=options)
+        super().__init__(
+            placeholder=f"Panels {start + 1}-{start + len(chunk)} auswählen...",
+            min_values=0, max_values=len(options), options=options, row=row
+        )
 
     async def callback(self, interaction: discord.Interaction):
-        self.view.selected_panels = self.values
-        await interaction.response.send_message(f"<:4569ok:1459953782556463250> {len(self.values)} Panels ausgewählt.", ephemeral=True)
-        self.view.stop()
+        self.view.selected.difference_update(self.chunk_ids)
+        self.view.selected.update(self.values)
+        self.view.render()
+        await interaction.response.edit_message(content=self.view.status_text(), view=self.view)
 
 class MultipanelCreateView(ui.View):
+    """Seitenweise Panel-Auswahl für /multipanel_create: bis zu 4 Menüs à 25 Panels pro Seite."""
+
     def __init__(self, panels: dict):
-        super().__init__(timeout=60)
+        super().__init__(timeout=180)
+        self.panels = list(panels.items())
+        self.selected = set()
         self.selected_panels = []
-        self.add_item(MultipanelSelect(panels))
+        self.page = 0
+        self.render()
+
+    @property
+    def per_page(self) -> int:
+        return MULTIPANEL_PICKER_SELECTS * SELECT_PANELS_PER_PAGE
+
+    def status_text(self) -> str:
+        pages = (len(self.panels) - 1) // self.per_page + 1
+        return f"Bitte wähle die Panels aus, die in diesem Multipanel enthalten sein sollen (Seite {self.page + 1}/{pages}, {len(self.selected)} ausgewählt):"
+
+    def render(self):
+        self.clear_items()
+        start = self.page * self.per_page
+        page_panels = self.panels[start:start + self.per_page]
+        for row, offset in enumerate(range(0, len(page_panels), SELECT_PANELS_PER_PAGE)):
+            self.add_item(MultipanelSelect(page_panels[offset:offset + SELECT_PANELS_PER_PAGE], start + offset, self.selected, row))
+
+        previous_button = ui.Button(emoji="◀️", style=discord.ButtonStyle.secondary, row=4, disabled=self.page == 0)
+        done_button = ui.Button(label="Fertig", style=discord.ButtonStyle.success, row=4)
+        next_button = ui.Button(emoji="▶️", style=discord.ButtonStyle.secondary, row=4, disabled=start + self.per_page >= len(self.panels))
+        previous_button.callback = lambda interaction: self.turn_page(interaction, -1)
+        next_button.callback = lambda interaction: self.turn_page(interaction, 1)
+        done_button.callback = self.finish
+        for button in (previous_button, done_button, next_button):
+            self.add_item(button)
+
+    async def turn_page(self, interaction: discord.Interaction, step: int):
+        self.page += step
+        self.render()
+        await interaction.response.edit_message(content=self.status_text(), view=self)
+
+    async def finish(self, interaction: discord.Interaction):
+        if not self.selected:
+            await interaction.response.send_message("<:4934error:1459953806870708388> Bitte wähle mindestens ein Panel aus.", ephemeral=True)
+            return
+        self.selected_panels = [pid for pid, _ in self.panels if pid in self.selected]
+        await interaction.response.edit_message(content=f"<:4569ok:1459953782556463250> {len(self.selected_panels)} Panels ausgewählt.", view=None)
+        self.stop()
 
 @bot.tree.command(name="multipanel_create", description="📚 Erstellt ein neues Multipanel")
 @app_commands.describe(multipanel_id="Eindeutige ID für das Multipanel")
@@ -1077,7 +3122,7 @@ async def multipanel_create(interaction: discord.Interaction, multipanel_id: str
         return
 
     view = MultipanelCreateView(panels)
-    await interaction.response.send_message("Bitte wähle die Panels aus, die in diesem Multipanel enthalten sein sollen:", view=view, ephemeral=True)
+    await interaction.response.send_message(view.status_text(), view=view, ephemeral=True)
 
     await view.wait()
     if not view.selected_panels:
@@ -1125,9 +3170,13 @@ async def multipanel_list(interaction: discord.Interaction):
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
 @bot.tree.command(name="multipanel_send", description="📤 Sendet ein Multipanel")
-@app_commands.describe(multipanel_id="Die ID des Multipanels")
+@app_commands.describe(multipanel_id="Die ID des Multipanels", mode="Darstellung der Panels (ab 25 Panels immer Auswahlmenü)")
+@app_commands.choices(mode=[
+    app_commands.Choice(name="Buttons", value="buttons"),
+    app_commands.Choice(name="Auswahlmenü", value="select"),
+])
 @check_permission("multipanel_send")
-async def multipanel_send(interaction: discord.Interaction, multipanel_id: str):
+async def multipanel_send(interaction: discord.Interaction, multipanel_id: str, mode: str = "buttons"):
     """Sendet ein Multipanel."""
     server_config = get_server_config(interaction.guild.id)
     multipanels = server_config.get("multipanels", {})
@@ -1145,23 +3194,9 @@ async def multipanel_send(interaction: discord.Interaction, multipanel_id: str):
         await interaction.response.send_message("<:4934error:1459953806870708388> Keine aktiven Panels in diesem Multipanel gefunden.", ephemeral=True)
         return
 
-    # Beschreibungen der Panels sammeln
-    desc_parts = []
-    for pid, p_data in active_panels.items():
-        desc_parts.append(f"**{p_data.get('emoji', '🎫')} {p_data['label']}**\n{p_data.get('description', 'Keine Beschreibung.')}")
-
-    description = "\n\n".join(desc_parts)
-
-    embed = discord.Embed(
-        title="Kontakt",
-        description=description,
-        color=get_color(interaction.guild.id, "default")
-    )
-    bot_avatar = bot.user.display_avatar.url if bot.user and bot.user.display_avatar else None
-    embed.set_footer(text="© Custom Tickets by Custom Discord Development", icon_url=bot_avatar)
-
-    view = MultiTicketPanelView(active_panels, interaction.guild.id)
-    await interaction.channel.send(embed=embed, view=view)
+    embed, view = render_panel_message(interaction.guild.id, "multipanel", multipanel_id, mode)
+    message = await interaction.channel.send(embed=embed, view=view)
+    register_posted_panel(interaction.guild.id, message, "multipanel", multipanel_id, mode)
     await interaction.response.send_message(f"<:4569ok:1459953782556463250> Multipanel `{multipanel_id}` gesendet.", ephemeral=True)
 
 @bot.tree.command(name="add", description="👤 Fügt einen User zum Ticket hinzu")
@@ -1228,6 +3263,14 @@ async def remove(interaction: discord.Interaction, user: discord.Member):
         "warning"
     )
 
+# Alle über /permission_grant vergebbaren Befehle ("all")
+PERMISSION_COMMANDS = [
+    "ticket_setup", "panel_create", "panel_edit", "panel_delete", "panel_list", "panel_send", "config_set", "config_show", "ai_keywords", "multipanel_create", "multipanel_list", "multipanel_delete", "multipanel_send",
+    "panel_queue", "queue_show", "panel_inactivity",
+    "ticket_bulk_close", "transcript_export", "training_compact", "debug_slow", "rest_budget",
+    "config_export", "config_import", "close_jobs"
+]
+
 @bot.tree.command(name="permission_grant", description="🔐 Gibt einem User Berechtigungen")
 @app_commands.checks.has_permissions(administrator=True)
 @app_commands.describe(user="Der User", command="Der Command Name (oder 'all')")
@@ -1235,6 +3278,7 @@ async def permission_grant(interaction: discord.Interaction, user: discord.Membe
     """Gibt einem User Berechtigungen."""
     guild_id_str = str(interaction.guild.id)
     user_id_str = str(user.id)
+    touch_guild(guild_id_str)
 
     if guild_id_str not in permissions["servers"]:
         permissions["servers"][guild_id_str] = {"users": {}}
@@ -1243,9 +3287,7 @@ async def permission_grant(interaction: discord.Interaction, user: discord.Membe
         permissions["servers"][guild_id_str]["users"][user_id_str] = []
 
     if command == "all":
-        permissions["servers"][guild_id_str]["users"][user_id_str] = [
-            "ticket_setup", "panel_create", "panel_delete", "panel_list", "panel_send", "config_set", "config_show", "ai_keywords", "multipanel_create", "multipanel_list", "multipanel_delete", "multipanel_send"
-        ]
+        permissions["servers"][guild_id_str]["users"][user_id_str] = list(PERMISSION_COMMANDS)
     elif command not in permissions["servers"][guild_id_str]["users"][user_id_str]:
         permissions["servers"][guild_id_str]["users"][user_id_str].append(command)
 
@@ -1259,6 +3301,7 @@ async def permission_revoke(interaction: discord.Interaction, user: discord.Memb
     """Entfernt Berechtigungen."""
     guild_id_str = str(interaction.guild.id)
     user_id_str = str(user.id)
+    touch_guild(guild_id_str)
 
     if guild_id_str in permissions["servers"] and user_id_str in permissions["servers"][guild_id_str]["users"]:
         if command == "all":
@@ -1276,6 +3319,7 @@ async def permission_revoke(interaction: discord.Interaction, user: discord.Memb
 async def permission_list(interaction: discord.Interaction):
     """Listet alle Berechtigungen auf."""
     guild_id_str = str(interaction.guild.id)
+    touch_guild(guild_id_str)
     if guild_id_str not in permissions["servers"] or not permissions["servers"][guild_id_str].get("users"):
         await interaction.response.send_message("<:4934error:1459953806870708388> Keine Berechtigungen konfiguriert!", ephemeral=True)
         return
@@ -1289,6 +3333,1533 @@ async def permission_list(interaction: discord.Interaction):
 
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
+# --- Konfigurations-Export/Import ---
+# Panels, Multipanels, Farben, Einstellungen und Berechtigungen eines Servers als versioniertes Dokument
+CONFIG_EXPORT_VERSION = 1
+CONFIG_EXPORT_SETTINGS = {
+    "log_channel_id": "channel",
+    "staff_role_id": "role",
+    "ai_training_channel_id": "channel",
+    "ai_semantic": "flag"
+}
+PANEL_FIELDS = {
+    "label": str,
+    "emoji": str,
+    "category_id": int,
+    "staff_role_id": int,
+    "description": str,
+    "enabled": bool,
+    "priority": int,
+    "assign_mode": str,
+    "sla_minutes": int,
+    "inactivity_warn_hours": int,
+    "inactivity_close_hours": int,
+    "overflow_category_ids": list
+}
+ASSIGN_MODES = ["off", "round_robin", "least_loaded"]
+MAX_IMPORT_ERRORS = 15
+
+def load_yaml():
+    """Importiert PyYAML erst bei Bedarf; ohne PyYAML gibt es nur JSON."""
+    try:
+        import yaml
+        return yaml
+    except ImportError:
+        return None
+
+def export_guild_config(guild_id: int) -> dict:
+    """Erstellt das Export-Dokument eines Servers (ohne offene Tickets, Zähler und gesendete Panels)."""
+    server_config = get_server_config(guild_id)
+    return {
+        "version": CONFIG_EXPORT_VERSION,
+        "guild_id": guild_id,
+        "exported_at": datetime.now().isoformat(),
+        "settings": {key: server_config[key] for key in CONFIG_EXPORT_SETTINGS if key in server_config},
+        "embed_colors": dict(server_config.get("embed_colors", {})),
+        "panels": {key: dict(panel) for key, panel in server_config.get("panels", {}).items()},
+        "multipanels": {key: list(panel_ids) for key, panel_ids in server_config.get("multipanels", {}).items()},
+        "permissions": {
+            user_id: list(commands)
+            for user_id, commands in permissions["servers"].get(str(guild_id), {}).get("users", {}).items() if commands
+        }
+    }
+
+def dump_config_document(document: dict, fmt: str) -> str:
+    """Serialisiert ein Export-Dokument als JSON oder YAML."""
+    if fmt == "yaml":
+        return load_yaml().safe_dump(document, allow_unicode=True, sort_keys=False)
+    return json.dumps(document, indent=4, ensure_ascii=False)
+
+def parse_config_document(text: str, filename: str = "") -> dict:
+    """Liest ein Export-Dokument; .yaml/.yml nur mit installiertem PyYAML."""
+    if filename.endswith((".yaml", ".yml")):
+        yaml = load_yaml()
+        if not yaml:
+            raise ValueError("YAML-Import benötigt PyYAML, bitte JSON verwenden.")
+        document = yaml.safe_load(text)
+    else:
+        document = json.loads(text)
+    if not isinstance(document, dict):
+        raise ValueError("Das Dokument muss ein Objekt sein.")
+    return document
+
+def parse_color(value) -> int:
+    """Akzeptiert Farben als Zahl oder als Hex-String (#rrggbb)."""
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, int):
+        return value
+    return int(str(value).lstrip("#"), 16)
+
+def validate_config_document(guild: discord.Guild, document: dict) -> tuple:
+    """Prüft ein Dokument in einem Durchgang gegen die Kanäle und Rollen des Servers.
+
+    Gibt (changes, errors) zurück. changes enthält nur die Abschnitte, die im Dokument
+    vorkommen; sie ersetzen beim Anwenden die bestehenden Abschnitte vollständig.
+    """
+    errors = []
+    changes = {}
+
+    version = document.get("version")
+    if not isinstance(version, int) or isinstance(version, bool) or not 1 <= version <= CONFIG_EXPORT_VERSION:
+        return {}, [f"Nicht unterstützte Version: {version!r} (erwartet 1-{CONFIG_EXPORT_VERSION})"]
+    wrong_type = [section for section in ("settings", "embed_colors", "panels", "multipanels", "permissions") if document.get(section) is not None and not isinstance(document[section], dict)]
+    if wrong_type:
+        return {}, [f"{section}: muss ein Objekt sein" for section in wrong_type]
+
+    def check_id(path: str, value, kind: str) -> Optional[int]:
+        if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).isdigit():
+            errors.append(f"{path}: ungültige ID {value!r}")
+            return None
+        value = int(value)
+        if value == 0:
+            return 0
+        if kind == "role" and not guild.get_role(value):
+            errors.append(f"{path}: Rolle {value} nicht gefunden")
+        elif kind == "category" and not isinstance(guild.get_channel(value), discord.CategoryChannel):
+            errors.append(f"{path}: Kategorie {value} nicht gefunden")
+        elif kind == "channel" and not isinstance(guild.get_channel(value), discord.TextChannel):
+            errors.append(f"{path}: Textkanal {value} nicht gefunden")
+        return value
+
+    if "settings" in document:
+        settings = {}
+        for key, value in (document["settings"] or {}).items():
+            kind = CONFIG_EXPORT_SETTINGS.get(key)
+            if not kind:
+                errors.append(f"settings.{key}: unbekannte Einstellung")
+            elif kind == "flag":
+                if value not in (0, 1):
+                    errors.append(f"settings.{key}: muss 0 oder 1 sein")
+                settings[key] = int(value) if value in (0, 1) else 0
+            else:
+                settings[key] = check_id(f"settings.{key}", value, kind)
+        changes["settings"] = settings
+
+    if "embed_colors" in document:
+        colors = {}
+        for name, value in (document["embed_colors"] or {}).items():
+            try:
+                colors[name] = parse_color(value)
+            except ValueError:
+                errors.append(f"embed_colors.{name}: ungültige Farbe {value!r}")
+        changes["embed_colors"] = colors
+
+    panels = None
+    if "panels" in document:
+        panels = {}
+        for raw_key, panel in (document["panels"] or {}).items():
+            key = str(raw_key).lower().replace(" ", "_")
+            path = f"panels.{key}"
+            if not isinstance(panel, dict):
+                errors.append(f"{path}: muss ein Objekt sein")
+                continue
+            for field in ("label", "category_id", "staff_role_id"):
+                if field not in panel:
+                    errors.append(f"{path}.{field}: fehlt")
+            clean = {"emoji": "🎫", "description": "Klicke auf den Button unten, um ein Ticket zu erstellen.", "enabled": True}
+            for field, value in panel.items():
+                expected = PANEL_FIELDS.get(field)
+                if not expected:
+                    errors.append(f"{path}.{field}: unbekanntes Feld")
+                elif field == "category_id":
+                    clean[field] = check_id(f"{path}.{field}", value, "category")
+                elif field == "staff_role_id":
+                    clean[field] = check_id(f"{path}.{field}", value, "role")
+                elif field == "overflow_category_ids" and isinstance(value, list):
+                    clean[field] = [check_id(f"{path}.{field}", item, "category") for item in value]
+                elif not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+                    errors.append(f"{path}.{field}: erwartet {expected.__name__}")
+                elif field == "assign_mode" and value not in ASSIGN_MODES:
+                    errors.append(f"{path}.{field}: erlaubt sind {', '.join(ASSIGN_MODES)}")
+                else:
+                    clean[field] = max(value, 0) if expected is int and field != "priority" else value
+            panels[key] = clean
+        changes["panels"] = panels
+
+    if "multipanels" in document:
+        known_panels = panels if panels is not None else get_server_config(guild.id).get("panels", {})
+        multipanels = {}
+        for raw_key, panel_ids in (document["multipanels"] or {}).items():
+            key = str(raw_key).lower().replace(" ", "_")
+            if not isinstance(panel_ids, list) or not panel_ids:
+                errors.append(f"multipanels.{key}: muss eine nicht leere Liste von Panel-IDs sein")
+                continue
+            missing = [str(panel_id) for panel_id in panel_ids if not isinstance(panel_id, str) or panel_id not in known_panels]
+            if missing:
+                errors.append(f"multipanels.{key}: unbekannte Panels {', '.join(missing)}")
+            multipanels[key] = [panel_id for panel_id in panel_ids if isinstance(panel_id, str) and panel_id in known_panels]
+        changes["multipanels"] = multipanels
+
+    if "permissions" in document:
+        users = {}
+        for user_id, commands in (document["permissions"] or {}).items():
+            if not str(user_id).isdigit():
+                errors.append(f"permissions.{user_id}: ungültige User-ID")
+                continue
+            if not isinstance(commands, list):
+                errors.append(f"permissions.{user_id}: muss eine Liste sein")
+                continue
+            unknown = [str(command) for command in commands if not isinstance(command, str) or command not in PERMISSION_COMMANDS]
+            if unknown:
+                errors.append(f"permissions.{user_id}: unbekannte Befehle {', '.join(unknown)}")
+            users[str(user_id)] = [command for command in commands if isinstance(command, str) and command in PERMISSION_COMMANDS]
+        changes["permissions"] = users
+
+    return changes, errors
+
+def apply_config_changes(guild_id: int, changes: dict):
+    """Übernimmt geprüfte Änderungen in den Speicher; gespeichert wird gesammelt vom Aufrufer."""
+    server_config = get_server_config(guild_id)
+    for key, value in changes.get("settings", {}).items():
+        server_config[key] = value
+    for section in ("embed_colors", "panels", "multipanels"):
+        if section in changes:
+            server_config[section] = changes[section]
+    if "permissions" in changes:
+        permissions["servers"].setdefault(str(guild_id), {})["users"] = changes["permissions"]
+
+def summarize_config_changes(changes: dict) -> str:
+    """Kurzfassung eines Imports für Antworten und Logs."""
+    parts = []
+    if "settings" in changes:
+        parts.append(f"{len(changes['settings'])} Einstellungen")
+    if "embed_colors" in changes:
+        parts.append(f"{len(changes['embed_colors'])} Farben")
+    if "panels" in changes:
+        parts.append(f"{len(changes['panels'])} Panels")
+    if "multipanels" in changes:
+        parts.append(f"{len(changes['multipanels'])} Multipanels")
+    if "permissions" in changes:
+        parts.append(f"{len(changes['permissions'])} Berechtigungen")
+    return ", ".join(parts) or "keine Abschnitte"
+
+def commit_config_import(guilds: List[discord.Guild], changes_by_guild: Dict[int, dict]):
+    """Wendet Importe für mehrere Server an und schreibt Konfiguration und Berechtigungen je einmal."""
+    for guild_id, changes in changes_by_guild.items():
+        apply_config_changes(guild_id, changes)
+    save_config(config)
+    if any("permissions" in changes for changes in changes_by_guild.values()):
+        save_permissions(permissions)
+    rebuild_ticket_queues()
+    rebuild_inactivity_tracker()
+    for guild in guilds:
+        asyncio.create_task(refresh_posted_panels(guild, all_panels=True))
+
+@bot.tree.command(name="config_export", description="📤 Exportiert die Server-Konfiguration als Datei")
+@app_commands.describe(format="Dateiformat")
+@app_commands.choices(format=[
+    app_commands.Choice(name="JSON", value="json"),
+    app_commands.Choice(name="YAML", value="yaml"),
+])
+@check_permission("config_export")
+async def config_export(interaction: discord.Interaction, format: str = "json"):
+    """Sendet Panels, Multipanels, Farben, Einstellungen und Berechtigungen als Datei."""
+    if format == "yaml" and not load_yaml():
+        await interaction.response.send_message("<:4934error:1459953806870708388> YAML-Export benötigt PyYAML, bitte JSON verwenden.", ephemeral=True)
+        return
+
+    content = dump_config_document(export_guild_config(interaction.guild.id), format)
+    file = discord.File(io.BytesIO(content.encode("utf-8")), filename=f"ticket-config-{interaction.guild.id}.{format}")
+    await interaction.response.send_message("<:4569ok:1459953782556463250> Konfiguration exportiert.", file=file, ephemeral=True)
+
+@bot.tree.command(name="config_import", description="📥 Importiert eine Server-Konfiguration aus einer Datei")
+@app_commands.describe(file="Export-Datei (JSON oder YAML)", dry_run="Nur prüfen, nichts übernehmen")
+@check_permission("config_import")
+async def config_import(interaction: discord.Interaction, file: discord.Attachment, dry_run: bool = False):
+    """Prüft eine Export-Datei gegen den Server und übernimmt sie in einem Schreibvorgang."""
+    try:
+        document = parse_config_document((await file.read()).decode("utf-8"), file.filename.lower())
+    except (ValueError, UnicodeDecodeError) as e:
+        await interaction.response.send_message(f"<:4934error:1459953806870708388> Datei konnte nicht gelesen werden: {e}", ephemeral=True)
+        return
+
+    # Berechtigungen vergibt sonst nur /permission_grant, und das nur für Administratoren
+    if "permissions" in document and not interaction.user.guild_permissions.administrator:
+        await interaction.response.send_message("<:4934error:1459953806870708388> Der Abschnitt `permissions` darf nur von Administratoren importiert werden.", ephemeral=True)
+        return
+
+    changes, errors = validate_config_document(interaction.guild, document)
+    if errors:
+        lines = "\n".join(f"• {error}" for error in errors[:MAX_IMPORT_ERRORS])
+        if len(errors) > MAX_IMPORT_ERRORS:
+            lines += f"\n… und {len(errors) - MAX_IMPORT_ERRORS} weitere"
+        embed = discord.Embed(title="<:4934error:1459953806870708388> Import abgelehnt", description=lines, color=get_color(interaction.guild.id, "error"))
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+        return
+
+    summary = summarize_config_changes(changes)
+    if dry_run:
+        await interaction.response.send_message(f"<:4569ok:1459953782556463250> Prüfung erfolgreich: {summary}. Nichts übernommen.", ephemeral=True)
+        return
+
+    commit_config_import([interaction.guild], {interaction.guild.id: changes})
+    await interaction.response.send_message(f"<:4569ok:1459953782556463250> Konfiguration importiert: {summary}.", ephemeral=True)
+    await log_action(interaction.guild, f"📥 **Konfiguration importiert**\n**Durch:** {interaction.user.mention}\n**Umfang:** {summary}", "warning")
+
+def admin_route(handler):
+    """Decorator: Admin-Endpunkte nur mit 'Authorization: Bearer <TICKETS_ADMIN_TOKEN>'."""
+    @wraps(handler)
+    async def wrapper(request: web.Request):
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode()):
+            return web.json_response({"error": "unauthorized"}, status=401)
+        return await handler(request)
+    return wrapper
+
+def admin_guild(guild_id: str) -> Optional[discord.Guild]:
+    return bot.get_guild(int(guild_id)) if guild_id.isdigit() else None
+
+@admin_route
+async def handle_admin_export(request: web.Request):
+    """GET /admin/guilds/{guild_id}/config"""
+    guild = admin_guild(request.match_info["guild_id"])
+    if not guild:
+        return web.json_response({"error": "guild not found"}, status=404)
+    return web.json_response(export_guild_config(guild.id), dumps=lambda data: json.dumps(data, ensure_ascii=False))
+
+@admin_route
+async def handle_admin_import(request: web.Request):
+    """POST /admin/config/import - {"guilds": {guild_id: Dokument}}, ?dry_run=1 prüft nur.
+
+    Alle Server werden zuerst geprüft; nur wenn keiner Fehler hat, wird alles in einem
+    Schreibvorgang übernommen.
+    """
+    try:
+        body = await request.json()
+    except ValueError:
+        return web.json_response({"error": "invalid json"}, status=400)
+    if not isinstance(body, dict) or not isinstance(body.get("guilds"), dict):
+        return web.json_response({"error": "expected {\"guilds\": {guild_id: document}}"}, status=400)
+
+    guilds, changes_by_guild, results = [], {}, {}
+    for guild_id, document in body["guilds"].items():
+        guild = admin_guild(str(guild_id))
+        if not guild:
+            results[str(guild_id)] = {"errors": ["Server nicht gefunden"]}
+            continue
+        changes, errors = validate_config_document(guild, document if isinstance(document, dict) else {})
+        results[str(guild_id)] = {"errors": errors, "summary": summarize_config_changes(changes)}
+        if not errors:
+            guilds.append(guild)
+            changes_by_guild[guild.id] = changes
+
+    ok = all(not result["errors"] for result in results.values())
+    applied = ok and request.query.get("dry_run") not in ("1", "true")
+    if applied:
+        commit_config_import(guilds, changes_by_guild)
+        print(f"📥 Admin-Import für {len(guilds)} Server übernommen")
+    return web.json_response({"applied": applied, "guilds": results}, status=200 if ok else 422, dumps=lambda data: json.dumps(data, ensure_ascii=False))
+
+def add_admin_routes(app: web.Application):
+    app.router.add_get("/admin/guilds/{guild_id}/config", handle_admin_export)
+    app.router.add_post("/admin/config/import", handle_admin_import)
+    app.router.add_get("/admin/memory", admin_route(handle_memory))
+    app.router.add_get("/admin/categories", admin_route(handle_categories))
+    print("🔑 Admin-Endpunkte aktiviert")
+
+# --- Kategorie-Kapazität ---
+# Discord erlaubt höchstens 50 Kanäle pro Kategorie. Pro Kategorie werden die Kanal-IDs im Speicher
+# mitgeführt (aus den Channel-Events), volle Panels weichen auf Überlauf-Kategorien aus
+CATEGORY_CHANNEL_LIMIT = 50
+category_channel_ids: Dict[int, set] = {}
+category_reservations: Dict[int, int] = {}
+category_overflow_locks: Dict[tuple, asyncio.Lock] = {}
+
+def get_category_channel_ids(category: discord.CategoryChannel) -> set:
+    """Kanal-IDs einer Kategorie; beim ersten Zugriff einmalig aus dem Cache gezählt."""
+    ids = category_channel_ids.get(category.id)
+    if ids is None:
+        ids = category_channel_ids[category.id] = {channel.id for channel in category.channels}
+    return ids
+
+def category_free_slots(category: discord.CategoryChannel) -> int:
+    """Freie Plätze einer Kategorie abzüglich gerade laufender Ticket-Erstellungen."""
+    return CATEGORY_CHANNEL_LIMIT - len(get_category_channel_ids(category)) - category_reservations.get(category.id, 0)
+
+def get_panel_categories(guild: discord.Guild, panel_data: dict) -> List[discord.CategoryChannel]:
+    """Haupt- und Überlauf-Kategorien eines Panels (gelöschte werden übersprungen)."""
+    categories = []
+    for category_id in [panel_data.get("category_id", 0)] + panel_data.get("overflow_category_ids", []):
+        category = guild.get_channel(category_id)
+        if isinstance(category, discord.CategoryChannel):
+            categories.append(category)
+    return categories
+
+def find_free_category(guild: discord.Guild, panel_data: dict) -> Optional[discord.CategoryChannel]:
+    for category in get_panel_categories(guild, panel_data):
+        if category_free_slots(category) > 0:
+            return category
+    return None
+
+async def reserve_ticket_category(guild: discord.Guild, panel_key: str, panel_data: dict) -> Optional[discord.CategoryChannel]:
+    """Wählt eine Kategorie mit freiem Platz und reserviert ihn; sind alle voll, wird eine Überlauf-Kategorie angelegt.
+
+    Gibt None zurück, wenn die Hauptkategorie fehlt. Die Reservierung muss mit
+    release_ticket_category wieder freigegeben werden.
+    """
+    base = guild.get_channel(panel_data.get("category_id", 0))
+    if not isinstance(base, discord.CategoryChannel):
+        return None
+
+    category = find_free_category(guild, panel_data)
+    if not category:
+        lock = category_overflow_locks.setdefault((guild.id, panel_key), asyncio.Lock())
+        async with lock:
+            # Ein paralleler Aufruf hat eventuell schon eine Überlauf-Kategorie angelegt
+            category = find_free_category(guild, panel_data)
+            if not category:
+                overflow_ids = panel_data.setdefault("overflow_category_ids", [])
+                category = await guild.create_category(
+                    name=f"{base.name} {len(overflow_ids) + 2}",
+                    overwrites=base.overwrites,
+                    reason=f"Kategorie für Panel {panel_key} ist voll"
+                )
+                category_channel_ids[category.id] = set()
+                overflow_ids.append(category.id)
+                save_config(config)
+                print(f"📂 Überlauf-Kategorie {category.name} für Panel {panel_key} in {guild.name} angelegt")
+
+    category_reservations[category.id] = category_reservations.get(category.id, 0) + 1
+    return category
+
+def release_ticket_category(category: discord.CategoryChannel, channel: Optional[discord.abc.GuildChannel] = None):
+    """Gibt eine Reservierung frei und zählt den erstellten Kanal sofort mit."""
+    category_reservations[category.id] -= 1
+    if not category_reservations[category.id]:
+        del category_reservations[category.id]
+    if channel is not None:
+        get_category_channel_ids(category).add(channel.id)
+
+async def release_ticket_channel(guild: discord.Guild, channel: discord.abc.GuildChannel):
+    """Zählt einen gelöschten Ticket-Kanal aus und löscht eine dadurch leere Überlauf-Kategorie."""
+    category_id = channel.category_id
+    ids = category_channel_ids.get(category_id)
+    if ids is not None:
+        ids.discard(channel.id)
+    if not category_id or ids or category_reservations.get(category_id):
+        return
+
+    for panel_key, panel_data in config["servers"].get(str(guild.id), {}).get("panels", {}).items():
+        overflow_ids = panel_data.get("overflow_category_ids", [])
+        if category_id not in overflow_ids:
+            continue
+        category = guild.get_channel(category_id)
+        if category is not None and len(get_category_channel_ids(category)):
+            return
+        # Erst austragen, damit keine neue Ticket-Erstellung die Kategorie mehr wählt
+        overflow_ids.remove(category_id)
+        category_channel_ids.pop(category_id, None)
+        save_config(config)
+        if category is not None:
+            try:
+                await category.delete(reason=f"Überlauf-Kategorie für Panel {panel_key} ist leer")
+                print(f"📂 Leere Überlauf-Kategorie {category.name} für Panel {panel_key} gelöscht")
+            except discord.NotFound:
+                pass
+        return
+
+def category_utilisation(guild: discord.Guild) -> Dict[str, dict]:
+    """Belegung der Ticket-Kategorien pro Panel (Kanäle, Kapazität, Anteil)."""
+    report = {}
+    # Direkt lesen: get_server_config würde jeden Server in der LRU als benutzt markieren
+    for panel_key, panel_data in config["servers"].get(str(guild.id), {}).get("panels", {}).items():
+        categories = get_panel_categories(guild, panel_data)
+        used = sum(len(get_category_channel_ids(category)) for category in categories)
+        capacity = len(categories) * CATEGORY_CHANNEL_LIMIT
+        report[panel_key] = {
+            "categories": len(categories),
+            "channels": used,
+            "capacity": capacity,
+            "utilisation": round(used / capacity, 3) if capacity else None
+        }
+    return report
+
+async def handle_categories(request: web.Request):
+    """GET /admin/categories - Belegung der Ticket-Kategorien aller verbundenen Server (nur mit Admin-Token)."""
+    return web.json_response({str(guild.id): category_utilisation(guild) for guild in bot.guilds if str(guild.id) in config["servers"]})
+
+@bot.listen("on_guild_channel_create")
+async def count_category_create(channel: discord.abc.GuildChannel):
+    ids = category_channel_ids.get(channel.category_id)
+    if ids is not None:
+        ids.add(channel.id)
+
+@bot.listen("on_guild_channel_delete")
+async def count_category_delete(channel: discord.abc.GuildChannel):
+    ids = category_channel_ids.get(channel.category_id)
+    if ids is not None:
+        ids.discard(channel.id)
+    category_channel_ids.pop(channel.id, None)
+
+@bot.listen("on_guild_channel_update")
+async def count_category_move(before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+    if before.category_id != after.category_id:
+        await count_category_delete(before)
+        await count_category_create(after)
+
+@tasks.loop(seconds=30)
+async def ticket_scheduler():
+    """Weist wartende Tickets automatisch zu und eskaliert bei überschrittener SLA."""
+    now = datetime.now().timestamp()
+    for guild_id, queue in list(ticket_queues.items()):
+        guild = bot.get_guild(guild_id)
+        if not guild or not len(queue):
+            continue
+
+        server_config = get_server_config(guild_id)
+        open_tickets = server_config.get("open_tickets", {})
+        panels = server_config.get("panels", {})
+        changed = False
+
+        for channel_id in queue.pop_expired(now):
+            ticket_data = open_tickets.get(str(channel_id))
+            channel = guild.get_channel(channel_id)
+            if not ticket_data or not channel:
+                queue.discard(channel_id)
+                continue
+
+            staff_role = guild.get_role(ticket_data.get("staff_role_id", 0))
+            waiting_minutes = int((now - ticket_data.get("created_at", now)) / 60)
+            escalate_embed = discord.Embed(
+                description=f"<:8649warning:1459953895689162842> **Dieses Ticket wartet seit {waiting_minutes} Minuten auf ein Teammitglied!**",
+                color=get_color(guild_id, "warning")
+            )
+            try:
+                await channel.send(content=staff_role.mention if staff_role else None, embed=escalate_embed)
+            except Exception as e:
+                print(f"Fehler beim Eskalieren von Ticket {channel_id}: {e}")
+            ticket_data["escalated"] = True
+            changed = True
+
+        loads = {}
+        for ticket_data in open_tickets.values():
+            staff_id = ticket_data.get("claimed_by") or ticket_data.get("assigned_to")
+            if staff_id:
+                loads[staff_id] = loads.get(staff_id, 0) + 1
+
+        skipped = []
+        while (channel_id := queue.peek_unassigned()) is not None:
+            ticket_data = open_tickets.get(str(channel_id))
+            channel = guild.get_channel(channel_id)
+            if not ticket_data or not channel:
+                queue.discard(channel_id)
+                continue
+
+            queue.mark_assigned(channel_id)
+            mode = panels.get(ticket_data.get("panel_key"), {}).get("assign_mode", "off")
+            if mode == "off":
+                continue
+
+            staff_role = guild.get_role(ticket_data.get("staff_role_id", 0))
+            member = pick_staff_member(guild, ticket_data.get("panel_key"), staff_role, mode, loads) if staff_role else None
+            if not member:
+                skipped.append(channel_id)
+                continue
+
+            ticket_data["assigned_to"] = member.id
+            loads[member.id] = loads.get(member.id, 0) + 1
+            changed = True
+
+            assign_embed = discord.Embed(
+                description=f"<:9081settings:1459954085464772799> {member.mention} wurde diesem Ticket automatisch zugewiesen.",
+                color=get_color(guild_id, "info")
+            )
+            try:
+                await channel.send(content=member.mention, embed=assign_embed)
+            except Exception as e:
+                print(f"Fehler beim Zuweisen von Ticket {channel_id}: {e}")
+
+        # Ohne verfügbares Teammitglied bleibt das Ticket für den nächsten Durchlauf offen
+        for channel_id in skipped:
+            queue.requeue(channel_id)
+
+        if changed:
+            mark_config_dirty()
+
+@tasks.loop(seconds=60)
+async def inactivity_checker():
+    """Warnt bei inaktiven Tickets und schließt sie nach Ablauf der Frist."""
+    now = datetime.now().timestamp()
+    for channel_id in inactivity_tracker.pop_due(now):
+        guild_id = inactivity_tracker.guilds.get(channel_id)
+        guild = bot.get_guild(guild_id) if guild_id else None
+        channel = guild.get_channel(channel_id) if guild else None
+        ticket_data = get_open_ticket(guild_id, channel_id) if guild_id else None
+        if not channel or not ticket_data:
+            inactivity_tracker.forget(channel_id)
+            continue
+
+        warn_after, close_after = get_inactivity_limits(guild_id, ticket_data.get("panel_key"))
+        idle = now - inactivity_tracker.last_activity.get(channel_id, now)
+        warned_at = inactivity_tracker.warned_at.get(channel_id)
+        if warned_at and warned_at < inactivity_tracker.last_activity.get(channel_id, 0):
+            warned_at = None
+
+        if close_after and idle >= close_after:
+            reason = f"Automatisch geschlossen nach {close_after // 3600} Stunden Inaktivität."
+            view = TicketControlView.from_ticket_data(guild_id, ticket_data)
+            try:
+                await view.close_ticket(channel, guild.me, reason)
+            except Exception as e:
+                # Erneut versuchen, mit wachsendem Abstand, statt das Ticket nie wieder zu prüfen
+                failures = inactivity_tracker.close_failures.get(channel_id, 0) + 1
+                inactivity_tracker.close_failures[channel_id] = failures
+                delay = min(INACTIVITY_RETRY_BACKOFF * 2 ** (failures - 1), INACTIVITY_RETRY_MAX_BACKOFF)
+                print(f"Fehler beim automatischen Schließen von Ticket {channel_id} (Versuch {failures}, nächster in {delay}s): {e}")
+                inactivity_tracker.schedule(channel_id, now + delay)
+            continue
+
+        if warn_after and idle >= warn_after and not warned_at:
+            warn_embed = discord.Embed(
+                description=f"<:8649cooldown:1459953871572046133> **Dieses Ticket ist seit {int(idle // 3600)} Stunden inaktiv.**\nOhne neue Nachricht wird es in {int((close_after - idle) // 3600)} Stunden automatisch geschlossen.",
+                color=get_color(guild_id, "warning")
+            )
+            try:
+                await channel.send(content=f"<@{ticket_data['creator_id']}>", embed=warn_embed)
+            except Exception as e:
+                print(f"Fehler beim Senden der Inaktivitätswarnung: {e}")
+            inactivity_tracker.warned_at[channel_id] = now
+
+        schedule_inactivity_check(guild_id, channel_id, ticket_data.get("panel_key"))
+
+@tasks.loop(hours=1)
+async def training_compactor():
+    """Räumt stündlich abgelaufene Trainings-Anfragen aller Server auf."""
+    for guild in bot.guilds:
+        if str(guild.id) not in ai_training["servers"]:
+            continue
+        result = await compact_pending_training(guild)
+        if result["expired"] or result["compacted"]:
+            print(f"🧹 KI-Training {guild.name}: {result['expired']} abgelaufen, {result['compacted']} kompaktiert, {result['messages']} Nachrichten deaktiviert")
+            await log_action(
+                guild,
+                f"**KI-Training aufgeräumt**\n"
+                f"**Abgelaufen:** {result['expired']}\n"
+                f"**Kompaktiert:** {result['compacted']}\n"
+                f"**Nachrichten deaktiviert:** {result['messages']}",
+                "info"
+            )
+    await flush_ai_training()
+
+@tasks.loop(seconds=10)
+async def ai_training_saver():
+    """Speichert geänderte KI-Trainingsdaten gesammelt."""
+    await flush_ai_training()
+
+@tasks.loop(seconds=CONFIG_SAVE_INTERVAL)
+async def config_saver():
+    """Speichert gesammelte Änderungen an der Konfiguration."""
+    await flush_config()
+
+@tasks.loop(seconds=5)
+async def transcript_flusher():
+    """Schreibt gepufferte Live-Transkripte regelmäßig auf die Platte."""
+    await flush_transcript_buffers()
+
+@tasks.loop(seconds=5)
+async def span_exporter():
+    """Exportiert gesammelte Lifecycle-Spans gebündelt."""
+    await export_spans()
+
+@bot.listen("on_message")
+async def capture_ticket_message(message: discord.Message):
+    """Schreibt neue Nachrichten in Ticket-Kanälen live mit."""
+    if message.guild and get_open_ticket(message.guild.id, message.channel.id) and uses_live_transcripts(message.guild.id):
+        append_transcript_record(message.guild.id, message.channel.id, message_to_record(message))
+        if message.attachments:
+            asyncio.create_task(capture_attachments(message.guild.id, message.channel.id, message))
+
+@bot.listen("on_raw_message_edit")
+async def capture_ticket_edit(payload: discord.RawMessageUpdateEvent):
+    """Schreibt Bearbeitungen in Ticket-Kanälen live mit."""
+    if payload.guild_id and get_open_ticket(payload.guild_id, payload.channel_id) and uses_live_transcripts(payload.guild_id):
+        append_transcript_record(payload.guild_id, payload.channel_id, message_to_record(payload.message, "edit"))
+
+@bot.listen("on_raw_message_delete")
+async def capture_ticket_delete(payload: discord.RawMessageDeleteEvent):
+    """Schreibt Löschungen in Ticket-Kanälen live mit."""
+    if payload.guild_id and get_open_ticket(payload.guild_id, payload.channel_id) and uses_live_transcripts(payload.guild_id):
+        append_transcript_record(payload.guild_id, payload.channel_id, {"op": "delete", "id": payload.message_id})
+
+@bot.listen("on_message")
+async def track_ticket_activity(message: discord.Message):
+    """Aktualisiert den Aktivitätszeitstempel eines Ticket-Kanals."""
+    if message.guild and not message.author.bot:
+        inactivity_tracker.touch(message.channel.id, message.created_at.timestamp())
+
+@bot.tree.command(name="panel_inactivity", description="⏳ Setzt die Inaktivitäts-Fristen eines Panels")
+@app_commands.describe(
+    panel_id="Die ID des Panels",
+    warn_hours="Stunden ohne Nachricht bis zur Warnung (0 = keine Warnung)",
+    close_hours="Stunden ohne Nachricht bis zum Schließen (0 = aus)"
+)
+@check_permission("panel_inactivity")
+async def panel_inactivity(interaction: discord.Interaction, panel_id: str, warn_hours: int = 0, close_hours: int = 0):
+    """Konfiguriert das automatische Schließen inaktiver Tickets."""
+    server_config = get_server_config(interaction.guild.id)
+    panel_data = server_config.get("panels", {}).get(panel_id)
+    if not panel_data:
+        await interaction.response.send_message(f"<:4934error:1459953806870708388> Panel `{panel_id}` nicht gefunden.", ephemeral=True)
+        return
+
+    panel_data["inactivity_warn_hours"] = max(warn_hours, 0)
+    panel_data["inactivity_close_hours"] = max(close_hours, 0)
+    save_config(config)
+
+    for channel_id_str, ticket_data in server_config.get("open_tickets", {}).items():
+        if ticket_data.get("panel_key") == panel_id:
+            channel_id = int(channel_id_str)
+            if channel_id not in inactivity_tracker.last_activity:
+                inactivity_tracker.track(interaction.guild.id, channel_id, ticket_data.get("created_at", datetime.now().timestamp()))
+            schedule_inactivity_check(interaction.guild.id, channel_id, panel_id)
+
+    await interaction.response.send_message(
+        f"<:4569ok:1459953782556463250> Panel `{panel_id}`: Warnung nach `{panel_data['inactivity_warn_hours']}` h, Schließen nach `{panel_data['inactivity_close_hours']}` h.",
+        ephemeral=True
+    )
+
+@bot.tree.command(name="training_compact", description="🧹 Räumt abgelaufene KI-Trainings-Anfragen auf")
+@check_permission("training_compact")
+async def training_compact(interaction: discord.Interaction):
+    """Führt die Kompaktierung der Trainings-Anfragen sofort aus."""
+    await interaction.response.defer(ephemeral=True)
+    result = await compact_pending_training(interaction.guild)
+    await flush_ai_training()
+    await interaction.followup.send(
+        f"<:4569ok:1459953782556463250> **{result['expired']}** abgelaufen, **{result['compacted']}** kompaktiert, **{result['messages']}** Nachrichten deaktiviert.",
+        ephemeral=True
+    )
+
+@bot.tree.command(name="panel_queue", description="⏱️ Setzt Priorität, Zuweisung und SLA eines Panels")
+@app_commands.describe(
+    panel_id="Die ID des Panels",
+    priority="Priorität in der Warteschlange (höher = zuerst, leer = unverändert)",
+    assign_mode="Automatische Zuweisung an Teammitglieder (leer = unverändert)",
+    sla_minutes="Minuten bis zur Eskalation ungeclaimter Tickets (0 = aus, leer = unverändert)"
+)
+@app_commands.choices(assign_mode=[
+    app_commands.Choice(name="Aus", value="off"),
+    app_commands.Choice(name="Round-Robin", value="round_robin"),
+    app_commands.Choice(name="Geringste Auslastung", value="least_loaded"),
+])
+@check_permission("panel_queue")
+async def panel_queue(interaction: discord.Interaction, panel_id: str, priority: Optional[int] = None, assign_mode: Optional[str] = None, sla_minutes: Optional[int] = None):
+    """Konfiguriert die Warteschlange eines Panels."""
+    server_config = get_server_config(interaction.guild.id)
+    panel_data = server_config.get("panels", {}).get(panel_id)
+    if not panel_data:
+        await interaction.response.send_message(f"<:4934error:1459953806870708388> Panel `{panel_id}` nicht gefunden.", ephemeral=True)
+        return
+
+    # Nur übergebene Felder ändern, damit z.B. eine neue SLA nicht die Zuweisung zurücksetzt
+    if priority is not None:
+        panel_data["priority"] = priority
+    if assign_mode is not None:
+        panel_data["assign_mode"] = assign_mode
+    if sla_minutes is not None:
+        panel_data["sla_minutes"] = max(sla_minutes, 0)
+    save_config(config)
+    rebuild_ticket_queues()
+
+    await interaction.response.send_message(
+        f"<:4569ok:1459953782556463250> Panel `{panel_id}`: Priorität `{panel_data.get('priority', 0)}`, Zuweisung `{panel_data.get('assign_mode', 'off')}`, SLA `{panel_data.get('sla_minutes', 0)}` Minuten.",
+        ephemeral=True
+    )
+
+@bot.tree.command(name="queue_show", description="⏱️ Zeigt die Warteschlange ungeclaimter Tickets")
+@check_permission("queue_show")
+async def queue_show(interaction: discord.Interaction):
+    """Zeigt die wartenden Tickets in Abarbeitungsreihenfolge."""
+    queue = ticket_queues.get(interaction.guild.id)
+    if not queue or not len(queue):
+        await interaction.response.send_message("<:4569ok:1459953782556463250> Keine ungeclaimten Tickets.", ephemeral=True)
+        return
+
+    now = datetime.now().timestamp()
+    open_tickets = get_server_config(interaction.guild.id).get("open_tickets", {})
+    lines = []
+    for channel_id, entry in queue.ordered()[:20]:
+        ticket_data = open_tickets.get(str(channel_id), {})
+        waiting_minutes = int((now - entry["created_at"]) / 60)
+        assigned = f" → <@{ticket_data['assigned_to']}>" if ticket_data.get("assigned_to") else ""
+        lines.append(f"`P{entry['priority']}` <#{channel_id}> – {waiting_minutes} Min.{assigned}")
+
+    embed = discord.Embed(
+        title=f"⏱️ Warteschlange ({len(queue)} Tickets)",
+        description="\n".join(lines),
+        color=get_color(interaction.guild.id, "info")
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+# --- Hintergrund-Jobs ---
+BULK_JOB_WORKERS = 3
+BULK_JOB_DELAY = 1.0
+JOB_STATUS_INTERVAL = 5
+EXPORT_BATCH_SIZE = 50
+running_jobs: Dict[str, asyncio.Task] = {}
+job_status_updates: Dict[str, float] = {}
+
+def build_job_embed(job: dict) -> discord.Embed:
+    """Erstellt das Fortschritts-Embed eines Hintergrund-Jobs."""
+    total = len(job["items"])
+    processed = len(job["done"]) + len(job["failed"])
+    finished = job["status"] == "done"
+    aborted = job["status"] == "failed"
+    title = "Massen-Schließung" if job["type"] == "bulk_close" else "Transkript-Export"
+    if finished:
+        icon, color = "<:4569ok:1459953782556463250>", "success"
+    elif aborted:
+        icon, color = "<:8649warning:1459953895689162842>", "error"
+    else:
+        icon, color = "<:8649cooldown:1459953871572046133>", "info"
+
+    description = f"**Fortschritt:** {processed}/{total}\n**Erfolgreich:** {len(job['done'])}\n**Fehlgeschlagen:** {len(job['failed'])}"
+    if aborted:
+        description += f"\n**Abgebrochen:** {job.get('error', 'Unbekannter Fehler')}"
+    embed = discord.Embed(
+        title=f"{icon} {title}",
+        description=description,
+        color=get_color(job["guild_id"], color),
+        timestamp=datetime.now()
+    )
+    embed.set_footer(text=f"Job: {job['id']}")
+    return embed
+
+async def update_job_status(job: dict, status_message: discord.PartialMessage, force: bool = False):
+    """Bearbeitet die Statusnachricht eines Jobs, höchstens alle paar Sekunden."""
+    now = datetime.now().timestamp()
+    if not force and now - job_status_updates.get(job["id"], 0) < JOB_STATUS_INTERVAL:
+        return
+    job_status_updates[job["id"]] = now
+    try:
+        await queue_message_edit(status_message, embed=build_job_embed(job))
+    except Exception as e:
+        print(f"Fehler beim Aktualisieren des Job-Status {job['id']}: {e}")
+
+def create_job(job_type: str, guild_id: int, channel_id: int, message_id: int, requested_by: int, items: list, **params) -> dict:
+    """Legt einen neuen, persistenten Hintergrund-Job an."""
+    base_id = f"{job_type}_{guild_id}_{int(datetime.now().timestamp())}"
+    job_id, suffix = base_id, 1
+    # Mehrere Jobs desselben Typs in derselben Sekunde dürfen sich nicht überschreiben
+    while job_id in jobs["jobs"]:
+        suffix += 1
+        job_id = f"{base_id}_{suffix}"
+    job = {
+        "id": job_id,
+        "type": job_type,
+        "guild_id": guild_id,
+        "channel_id": channel_id,
+        "message_id": message_id,
+        "requested_by": requested_by,
+        "items": items,
+        "done": [],
+        "failed": [],
+        "status": "running",
+        "params": params
+    }
+    jobs["jobs"][job_id] = job
+    save_jobs(jobs)
+    return job
+
+def start_job(job_id: str):
+    """Startet einen Job, falls er nicht bereits läuft."""
+    if job_id in running_jobs:
+        return
+    task = asyncio.create_task(run_job(job_id))
+    running_jobs[job_id] = task
+    task.add_done_callback(lambda _: running_jobs.pop(job_id, None))
+
+def resume_jobs():
+    """Setzt nach einem Neustart alle unvollständigen Jobs fort."""
+    for job_id, job in jobs["jobs"].items():
+        if job["status"] == "running":
+            print(f"🔄 Setze Job fort: {job_id}")
+            start_job(job_id)
+
+async def run_job(job_id: str):
+    """Führt einen Hintergrund-Job bis zum Ende aus."""
+    job = jobs["jobs"][job_id]
+    guild = bot.get_guild(job["guild_id"])
+    status_channel = guild.get_channel(job["channel_id"]) if guild else None
+    if not status_channel:
+        return
+
+    status_message = status_channel.get_partial_message(job["message_id"])
+    try:
+        if job["type"] == "bulk_close":
+            await run_bulk_close(job, guild, status_message)
+        else:
+            await run_transcript_export(job, guild, status_channel, status_message)
+    except Exception as e:
+        print(f"Fehler im Job {job_id}: {e}")
+        traceback.print_exc()
+        job["status"] = "failed"
+        job["error"] = str(e)[:200] or type(e).__name__
+        save_jobs(jobs)
+        await update_job_status(job, status_message, force=True)
+        return
+
+    job["status"] = "done"
+    save_jobs(jobs)
+    await update_job_status(job, status_message, force=True)
+
+async def run_bulk_close(job: dict, guild: discord.Guild, status_message: discord.PartialMessage):
+    """Schließt die Tickets eines Jobs mit begrenzter Parallelität."""
+    closer = guild.get_member(job["requested_by"]) or guild.me
+    reason = job["params"].get("reason") or "Massen-Schließung"
+    queue = asyncio.Queue()
+    for channel_id in job["items"]:
+        if channel_id not in job["done"] and channel_id not in job["failed"]:
+            queue.put_nowait(channel_id)
+
+    async def worker():
+        while not queue.empty():
+            channel_id = queue.get_nowait()
+            channel = guild.get_channel(channel_id)
+            ticket_data = get_open_ticket(guild.id, channel_id)
+            if channel and ticket_data:
+                try:
+                    await TicketControlView.from_ticket_data(guild.id, ticket_data).close_ticket(channel, closer, reason)
+                    job["done"].append(channel_id)
+                except Exception as e:
+                    print(f"Fehler beim Schließen von Ticket {channel_id}: {e}")
+                    job["failed"].append(channel_id)
+            else:
+                unregister_open_ticket(guild.id, channel_id)
+                job["failed"].append(channel_id)
+
+            save_jobs(jobs)
+            await update_job_status(job, status_message)
+            await asyncio.sleep(BULK_JOB_DELAY)
+
+    await asyncio.gather(*(worker() for _ in range(BULK_JOB_WORKERS)))
+
+def append_to_zip(zip_path: str, files: List[str]) -> List[str]:
+    """Fügt Dateien einem ZIP-Archiv hinzu und gibt die erfolgreich gepackten zurück."""
+    import zipfile
+    added = []
+    with zipfile.ZipFile(zip_path, "a", compression=zipfile.ZIP_DEFLATED) as archive:
+        existing = set(archive.namelist())
+        for path in files:
+            name = os.path.basename(path)
+            if name in existing:
+                # Bereits bei einem früheren Lauf gepackt
+                added.append(path)
+            elif os.path.exists(path):
+                archive.write(path, arcname=name)
+                added.append(path)
+    return added
+
+async def run_transcript_export(job: dict, guild: discord.Guild, status_channel: discord.TextChannel, status_message: discord.PartialMessage):
+    """Packt die Transkripte eines Jobs stapelweise in ein ZIP-Archiv."""
+    import zipfile
+    os.makedirs("transcripts/exports", exist_ok=True)
+    zip_path = f"transcripts/exports/{job['id']}.zip"
+    pending = [path for path in job["items"] if path not in job["done"] and path not in job["failed"]]
+
+    for start in range(0, len(pending), EXPORT_BATCH_SIZE):
+        batch = pending[start:start + EXPORT_BATCH_SIZE]
+        try:
+            added = await asyncio.to_thread(append_to_zip, zip_path, batch)
+        except zipfile.BadZipFile:
+            # Archiv wurde bei einem Absturz beschädigt, von vorne beginnen
+            os.remove(zip_path)
+            job["done"].clear()
+            job["failed"].clear()
+            save_jobs(jobs)
+            return await run_transcript_export(job, guild, status_channel, status_message)
+        job["done"].extend(added)
+        job["failed"].extend(path for path in batch if path not in added)
+        save_jobs(jobs)
+        await update_job_status(job, status_message)
+
+    if os.path.getsize(zip_path) <= guild.filesize_limit:
+        await status_channel.send(
+            content=f"<:4569ok:1459953782556463250> Transkript-Export für <@{job['requested_by']}> abgeschlossen.",
+            file=discord.File(zip_path)
+        )
+    else:
+        await status_channel.send(f"<:8649warning:1459953895689162842> Export zu groß für Discord. Gespeichert unter `{zip_path}`.")
+
+def parse_transcript_filename(filename: str) -> Optional[tuple]:
+    """Liest Panel und Ticketnummer aus einem Transkript-Dateinamen."""
+    if not filename.startswith("ticket-") or not filename.endswith(".txt"):
+        return None
+    parts = filename[len("ticket-"):-len(".txt")].rsplit("-", 2)
+    if len(parts) != 3 or not parts[1].isdigit():
+        return None
+    return parts[0], int(parts[1])
+
+# --- Close-Jobs ---
+# Nebenwirkungen beim Schließen laufen als persistente Jobs mit Wiederholungen. Jede Änderung wird
+# als eine Zeile an close_jobs.jsonl angehängt, statt bei jedem Schritt die ganze Datei neu zu schreiben
+CLOSE_JOB_WORKERS = 3
+CLOSE_JOB_MAX_ATTEMPTS = 8
+CLOSE_JOB_BACKOFF = 5
+CLOSE_JOB_MAX_BACKOFF = 900
+CLOSE_JOB_STEPS = ["html", "log", "dm", "delete"]
+CLOSE_JOB_JOURNAL_COMPACT = 5000
+close_job_queue: Optional[asyncio.Queue] = None
+close_job_workers: List[asyncio.Task] = []
+running_close_jobs: set = set()
+close_job_journal_lines = len(close_jobs)
+
+def journal_close_job(job_id: str):
+    """Hängt den aktuellen Stand eines Close-Jobs (oder seine Entfernung) an das Journal an."""
+    global close_job_journal_lines
+    job = close_jobs.get(job_id)
+    entry = {"op": "put", "job": job} if job else {"op": "remove", "id": job_id}
+    with open(CLOSE_JOBS_FILE, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    close_job_journal_lines += 1
+    # Leeres oder stark gewachsenes Journal kompakt neu schreiben
+    if not close_jobs or close_job_journal_lines > CLOSE_JOB_JOURNAL_COMPACT + len(close_jobs):
+        compact_close_jobs(close_jobs)
+        close_job_journal_lines = len(close_jobs)
+
+def enqueue_close_job(job: dict):
+    """Speichert einen Close-Job und reiht ihn ein; die Schritte werden nacheinander abgearbeitet."""
+    job.update({
+        "steps": list(CLOSE_JOB_STEPS),
+        "attempts": 0,
+        "next_attempt": 0,
+        "errors": [],
+        "status": "pending",
+        "created_at": datetime.now().timestamp()
+    })
+    close_jobs[job["id"]] = job
+    journal_close_job(job["id"])
+    schedule_close_job(job["id"])
+
+def schedule_close_job(job_id: str, delay: float = 0):
+    """Reiht einen Close-Job (optional verzögert) in die Warteschlange ein."""
+    if close_job_queue is None:
+        # Worker noch nicht gestartet, start_close_job_workers holt den Job nach
+        return
+    if delay > 0:
+        asyncio.get_running_loop().call_later(delay, close_job_queue.put_nowait, job_id)
+    else:
+        close_job_queue.put_nowait(job_id)
+
+async def run_close_step(job: dict, guild: discord.Guild, step: str):
+    """Führt einen Schritt eines Close-Jobs aus. Jeder Schritt darf gefahrlos wiederholt werden."""
+    if step == "html":
+        if not job.get("html") or os.path.exists(job["html"]) or not job.get("records") or not os.path.exists(job["records"]):
+            return
+        records = await asyncio.to_thread(read_transcript_log, job["records"])
+        blob_map = await download_attachments(records)
+        await asyncio.to_thread(render_transcript_html, job["html"], job["html_title"], job["html_header"], records, blob_map)
+    elif step == "log":
+        log_channel = guild.get_channel(get_server_config(guild.id).get("log_channel_id", 0))
+        if log_channel:
+            await log_channel.send(embed=discord.Embed.from_dict(job["embed"]))
+    elif step == "dm":
+        opener = guild.get_member(job["opener_id"]) if job.get("opener_id") else None
+        if opener:
+            try:
+                await opener.send(embed=discord.Embed.from_dict(job["embed"]))
+            except discord.Forbidden:
+                pass
+    elif step == "delete":
+        channel = guild.get_channel(job["channel_id"])
+        if channel:
+            try:
+                await channel.delete(reason=job["delete_reason"])
+            except discord.NotFound:
+                pass
+            await release_ticket_channel(guild, channel)
+
+async def process_close_job(job_id: str):
+    """Arbeitet die offenen Schritte eines Close-Jobs ab; bei Fehlern mit exponentiellem Backoff erneut."""
+    job = close_jobs.get(job_id)
+    if not job or job["status"] != "pending":
+        return
+    guild = bot.get_guild(job["guild_id"])
+    if not guild:
+        # Server nicht (mehr) erreichbar, nichts mehr zu tun
+        close_jobs.pop(job_id, None)
+        journal_close_job(job_id)
+        return
+
+    flow_runs["ticket.close_job"] = flow_runs.get("ticket.close_job", 0) + 1
+    flow_token = current_flow.set("ticket.close_job")
+    try:
+        while job["steps"]:
+            step = job["steps"][0]
+            try:
+                await run_close_step(job, guild, step)
+            except Exception as e:
+                job["attempts"] += 1
+                job["errors"] = (job["errors"] + [f"{step}: {e}"])[-5:]
+                if job["attempts"] >= CLOSE_JOB_MAX_ATTEMPTS:
+                    job["status"] = "failed"
+                    print(f"<:4934error:1459953806870708388> Close-Job {job_id} aufgegeben bei Schritt {step}: {e}")
+                    journal_close_job(job_id)
+                    await report_failed_close_job(guild, job)
+                    return
+                delay = min(CLOSE_JOB_BACKOFF * 2 ** (job["attempts"] - 1), CLOSE_JOB_MAX_BACKOFF)
+                job["next_attempt"] = datetime.now().timestamp() + delay
+                print(f"Fehler im Close-Job {job_id} bei Schritt {step}: {e} (neuer Versuch in {delay}s)")
+                journal_close_job(job_id)
+                schedule_close_job(job_id, delay)
+                return
+            job["steps"].pop(0)
+            journal_close_job(job_id)
+    finally:
+        current_flow.reset(flow_token)
+
+    close_jobs.pop(job_id, None)
+    journal_close_job(job_id)
+
+async def report_failed_close_job(guild: discord.Guild, job: dict):
+    """Meldet einen aufgegebenen Close-Job im Log-Kanal; der Ticket-Kanal ist sonst unverwaltet."""
+    await log_action(
+        guild,
+        f"<:4934error:1459953806870708388> **Ticket-Abschluss fehlgeschlagen**\n"
+        f"**Kanal:** <#{job['channel_id']}>\n"
+        f"**Offene Schritte:** {', '.join(job['steps'])}\n"
+        f"**Letzter Fehler:** {job['errors'][-1] if job['errors'] else '-'}\n"
+        f"Mit `/close_jobs` wiederholen oder verwerfen.",
+        "error"
+    )
+
+async def close_job_worker():
+    """Holt Close-Jobs aus der Warteschlange; ein Job läuft nie doppelt."""
+    while True:
+        job_id = await close_job_queue.get()
+        if job_id in running_close_jobs:
+            continue
+        running_close_jobs.add(job_id)
+        try:
+            await process_close_job(job_id)
+        except Exception as e:
+            print(f"Fehler im Close-Job {job_id}: {e}")
+        finally:
+            running_close_jobs.discard(job_id)
+
+def start_close_job_workers():
+    """Startet die Worker und reiht nach einem Neustart alle offenen Close-Jobs wieder ein."""
+    global close_job_queue
+    if close_job_queue is not None:
+        return
+    close_job_queue = asyncio.Queue()
+    for _ in range(CLOSE_JOB_WORKERS):
+        close_job_workers.append(asyncio.create_task(close_job_worker()))
+
+    now = datetime.now().timestamp()
+    for job_id, job in close_jobs.items():
+        if job["status"] == "pending":
+            print(f"🔄 Setze Close-Job fort: {job_id}")
+            schedule_close_job(job_id, max(0, job["next_attempt"] - now))
+
+@bot.tree.command(name="close_jobs", description="🧾 Zeigt, wiederholt oder verwirft fehlgeschlagene Ticket-Abschlüsse")
+@app_commands.describe(action="Was mit den fehlgeschlagenen Close-Jobs passieren soll")
+@app_commands.choices(action=[
+    app_commands.Choice(name="Anzeigen", value="list"),
+    app_commands.Choice(name="Wiederholen", value="retry"),
+    app_commands.Choice(name="Verwerfen", value="clear"),
+])
+@check_permission("close_jobs")
+async def close_jobs_command(interaction: discord.Interaction, action: str = "list"):
+    """Verwaltet die aufgegebenen Close-Jobs dieses Servers."""
+    failed = [job for job in close_jobs.values() if job["guild_id"] == interaction.guild.id and job["status"] == "failed"]
+    if not failed:
+        await interaction.response.send_message("<:4569ok:1459953782556463250> Keine fehlgeschlagenen Ticket-Abschlüsse.", ephemeral=True)
+        return
+
+    if action == "retry":
+        for job in failed:
+            job.update({"status": "pending", "attempts": 0, "next_attempt": 0})
+            journal_close_job(job["id"])
+            schedule_close_job(job["id"])
+        await interaction.response.send_message(f"<:4569ok:1459953782556463250> {len(failed)} Close-Jobs werden erneut ausgeführt.", ephemeral=True)
+        return
+
+    if action == "clear":
+        for job in failed:
+            close_jobs.pop(job["id"], None)
+            journal_close_job(job["id"])
+        await interaction.response.send_message(f"<:4569ok:1459953782556463250> {len(failed)} Close-Jobs verworfen. Übrig gebliebene Kanäle bitte von Hand löschen.", ephemeral=True)
+        await log_action(interaction.guild, f"🧾 **{len(failed)} fehlgeschlagene Close-Jobs verworfen**\n**Durch:** {interaction.user.mention}", "warning")
+        return
+
+    embed = discord.Embed(title="🧾 Fehlgeschlagene Ticket-Abschlüsse", color=get_color(interaction.guild.id, "error"))
+    for job in failed[:25]:
+        channel = interaction.guild.get_channel(job["channel_id"])
+        embed.add_field(
+            name=f"#{channel.name}" if channel else f"Kanal {job['channel_id']}",
+            value=f"**Offen:** {', '.join(job['steps'])}\n**Fehler:** {(job['errors'][-1] if job['errors'] else '-')[:200]}",
+            inline=False
+        )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="ticket_bulk_close", description="🧹 Schließt mehrere Tickets auf einmal")
+@app_commands.describe(
+    panel_id="Nur Tickets dieses Panels",
+    older_than_hours="Nur Tickets, die älter als so viele Stunden sind",
+    unclaimed_only="Nur ungeclaimte Tickets",
+    creator="Nur Tickets dieses Users",
+    reason="Grund für das Schließen"
+)
+@check_permission("ticket_bulk_close")
+async def ticket_bulk_close(interaction: discord.Interaction, panel_id: str = None, older_than_hours: int = 0, unclaimed_only: bool = False, creator: discord.Member = None, reason: str = None):
+    """Schließt alle offenen Tickets, die den Filtern entsprechen, als Hintergrund-Job."""
+    server_config = get_server_config(interaction.guild.id)
+    now = datetime.now().timestamp()
+
+    items = []
+    for channel_id_str, ticket_data in server_config.get("open_tickets", {}).items():
+        if panel_id and ticket_data.get("panel_key") != panel_id:
+            continue
+        if older_than_hours and now - ticket_data.get("created_at", now) < older_than_hours * 3600:
+            continue
+        if unclaimed_only and ticket_data.get("claimed_by"):
+            continue
+        if creator and ticket_data.get("creator_id") != creator.id:
+            continue
+        items.append(int(channel_id_str))
+
+    if not items:
+        await interaction.response.send_message("<:4934error:1459953806870708388> Keine passenden Tickets gefunden.", ephemeral=True)
+        return
+
+    status_message = await interaction.channel.send(embed=discord.Embed(description="<:8649cooldown:1459953871572046133> Job wird gestartet...", color=get_color(interaction.guild.id, "info")))
+    job = create_job("bulk_close", interaction.guild.id, interaction.channel.id, status_message.id, interaction.user.id, items, reason=reason)
+    start_job(job["id"])
+    await interaction.response.send_message(f"<:4569ok:1459953782556463250> {len(items)} Tickets werden geschlossen.", ephemeral=True)
+
+@bot.tree.command(name="transcript_export", description="📦 Exportiert Transkripte als ZIP")
+@app_commands.describe(
+    from_number="Erste Ticketnummer",
+    to_number="Letzte Ticketnummer",
+    panel_id="Nur Transkripte dieses Panels"
+)
+@check_permission("transcript_export")
+async def transcript_export(interaction: discord.Interaction, from_number: int = 0, to_number: int = 0, panel_id: str = None):
+    """Exportiert einen Bereich von Transkripten als Hintergrund-Job."""
+    transcript_dir = get_transcript_dir(interaction.guild.id)
+    filenames = await asyncio.to_thread(lambda: sorted(os.listdir(transcript_dir)) if os.path.isdir(transcript_dir) else [])
+
+    items = []
+    for filename in filenames:
+        parsed = parse_transcript_filename(filename)
+        if not parsed:
+            continue
+        panel_key, ticket_number = parsed
+        if panel_id and panel_key != panel_id:
+            continue
+        if ticket_number < from_number or (to_number and ticket_number > to_number):
+            continue
+        items.append(f"{transcript_dir}/{filename}")
+
+    if not items:
+        await interaction.response.send_message("<:4934error:1459953806870708388> Keine passenden Transkripte gefunden.", ephemeral=True)
+        return
+
+    status_message = await interaction.channel.send(embed=discord.Embed(description="<:8649cooldown:1459953871572046133> Job wird gestartet...", color=get_color(interaction.guild.id, "info")))
+    job = create_job("transcript_export", interaction.guild.id, interaction.channel.id, status_message.id, interaction.user.id, items)
+    start_job(job["id"])
+    await interaction.response.send_message(f"<:4569ok:1459953782556463250> {len(items)} Transkripte werden exportiert.", ephemeral=True)
+
+# --- Command-Sync ---
+command_tree_synced = False
+first_interaction_seen = False
+
+def get_command_tree_hash() -> str:
+    """Hash über die serialisierte Definition aller Slash Commands."""
+    payload = [command.to_dict(bot.tree) for command in bot.tree.get_commands()]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+async def sync_command_tree():
+    """Synchronisiert die Slash Commands nur, wenn sich der Command-Baum geändert hat."""
+    global command_tree_synced
+    if command_tree_synced:
+        return
+
+    tree_hash = get_command_tree_hash()
+    last_sync = config.get("command_sync", {})
+    force = os.environ.get("FORCE_COMMAND_SYNC") == "1"
+    if not force and last_sync.get("hash") == tree_hash and last_sync.get("application_id") == bot.application_id:
+        print("✅ Slash Commands unverändert, Synchronisation übersprungen")
+        command_tree_synced = True
+        mark_startup_phase("Commands geprüft")
+        return
+
+    try:
+        synced = await bot.tree.sync()
+        config["command_sync"] = {"hash": tree_hash, "application_id": bot.application_id}
+        save_config(config)
+        command_tree_synced = True
+        print(f"✅ {len(synced)} Slash Commands synchronisiert")
+        print("═" * 50)
+        mark_startup_phase("Commands synchronisiert")
+    except Exception as e:
+        print(f"<:4934error:1459953806870708388> Fehler beim Synchronisieren: {e}")
+
+@bot.listen("on_interaction")
+async def measure_first_interaction(interaction: discord.Interaction):
+    """Misst die Zeit bis zur ersten Interaktion nach dem Start."""
+    global first_interaction_seen
+    if not first_interaction_seen:
+        first_interaction_seen = True
+        mark_startup_phase("Erste Interaktion", always=True)
+
+# --- Debug: Event-Loop-Überwachung ---
+# Mit TICKETS_DEBUG_SLOW=1 werden Slash Commands, View-Callbacks und Modals gemessen und
+# Blockaden der Event-Loop mit dem Stack des Haupt-Threads protokolliert
+DEBUG_SLOW = os.environ.get("TICKETS_DEBUG_SLOW") == "1"
+SLOW_CALLBACK_THRESHOLD = float(os.environ.get("TICKETS_SLOW_CALLBACK_MS", 500)) / 1000
+LOOP_STALL_THRESHOLD = float(os.environ.get("TICKETS_LOOP_STALL_MS", 250)) / 1000
+WATCHDOG_INTERVAL = 0.05
+callback_timings: Dict[str, dict] = {}
+active_callbacks: Dict[object, tuple] = {}
+loop_stalls = deque(maxlen=50)
+slow_tracing_enabled = False
+
+def record_callback_timing(name: str, duration: float):
+    """Zählt die Laufzeit eines Callbacks und loggt ihn, wenn er über der Schwelle liegt."""
+    stats = callback_timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "slow": 0})
+    stats["count"] += 1
+    stats["total"] += duration
+    stats["max"] = max(stats["max"], duration)
+    if duration >= SLOW_CALLBACK_THRESHOLD:
+        stats["slow"] += 1
+        print("🐢 Langsamer Callback: " + json.dumps({"callback": name, "duration_ms": round(duration * 1000, 1)}, ensure_ascii=False))
+
+def timed_callback(name_of):
+    """Umschließt eine Coroutine-Funktion mit einer Zeitmessung; name_of bildet den Namen aus den Argumenten."""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = object()
+            start = time.perf_counter()
+            active_callbacks[key] = (name_of(*args), start)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                name, _ = active_callbacks.pop(key)
+                record_callback_timing(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+class LoopWatchdog:
+    """Erkennt aus einem eigenen Thread, wenn die Event-Loop länger als die Schwelle blockiert."""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.last_beat = time.monotonic()
+        self.loop_thread_id = threading.get_ident()
+        self.current_stall = None
+        self.lock = threading.Lock()
+
+    def beat(self):
+        """Wird regelmäßig von der Event-Loop aufgerufen; schließt eine erkannte Blockade ab."""
+        now = time.monotonic()
+        with self.lock:
+            stall, self.current_stall = self.current_stall, None
+            blocked = now - self.last_beat - WATCHDOG_INTERVAL
+            self.last_beat = now
+        if stall:
+            stall["duration_ms"] = round(blocked * 1000, 1)
+            loop_stalls.append(stall)
+            print("🐢 Event-Loop blockiert: " + json.dumps(
+                {k: v for k, v in stall.items() if k != "stack"} | {"frame": stall["stack"][-1].strip() if stall["stack"] else None},
+                ensure_ascii=False
+            ))
+
+    def watch(self):
+        while True:
+            time.sleep(WATCHDOG_INTERVAL)
+            with self.lock:
+                if self.current_stall or time.monotonic() - self.last_beat - WATCHDOG_INTERVAL < self.threshold:
+                    continue
+                frame = sys._current_frames().get(self.loop_thread_id)
+                self.current_stall = {
+                    "at": datetime.now().isoformat(timespec="seconds"),
+                    "callbacks": [name for name, _ in list(active_callbacks.values())],
+                    "stack": traceback.format_stack(frame)[-8:] if frame else []
+                }
+
+    def start(self):
+        threading.Thread(target=self.watch, name="loop-watchdog", daemon=True).start()
+
+loop_watchdog: Optional[LoopWatchdog] = None
+
+@tasks.loop(seconds=WATCHDOG_INTERVAL)
+async def loop_heartbeat():
+    loop_watchdog.beat()
+
+def enable_slow_callback_tracing():
+    """Instrumentiert Commands, Views, Modals und dynamische Buttons und startet den Watchdog."""
+    global slow_tracing_enabled, loop_watchdog
+    if slow_tracing_enabled:
+        return
+
+    for command in bot.tree.walk_commands():
+        if isinstance(command, app_commands.Command):
+            command._callback = timed_callback(lambda *args, name=f"/{command.qualified_name}": name)(command._callback)
+    ui.View._scheduled_task = timed_callback(
+        lambda view, item, interaction: f"{type(view).__name__}:{getattr(item, 'custom_id', None) or type(item).__name__}"
+    )(ui.View._scheduled_task)
+    ui.Modal._scheduled_task = timed_callback(lambda modal, *args: f"{type(modal).__name__}.on_submit")(ui.Modal._scheduled_task)
+    discord.ui.view.ViewStore.schedule_dynamic_item_call = timed_callback(
+        lambda store, component_type, factory, *args: factory.__name__
+    )(discord.ui.view.ViewStore.schedule_dynamic_item_call)
+
+    loop_watchdog = LoopWatchdog(LOOP_STALL_THRESHOLD)
+    loop_watchdog.start()
+    loop_heartbeat.start()
+    slow_tracing_enabled = True
+    print(f"🐢 Debug-Modus aktiv: Callbacks ab {SLOW_CALLBACK_THRESHOLD * 1000:.0f} ms, Blockaden ab {LOOP_STALL_THRESHOLD * 1000:.0f} ms")
+
+@bot.tree.command(name="debug_slow", description="🐢 Zeigt die langsamsten Callbacks und Event-Loop-Blockaden")
+@check_permission("debug_slow")
+async def debug_slow(interaction: discord.Interaction):
+    """Zusammenfassung der Messungen aus dem Debug-Modus."""
+    if not slow_tracing_enabled:
+        await interaction.response.send_message(
+            "<:4934error:1459953806870708388> Der Debug-Modus ist nicht aktiv. Starte den Bot mit `TICKETS_DEBUG_SLOW=1`.",
+            ephemeral=True
+        )
+        return
+
+    worst = sorted(callback_timings.items(), key=lambda item: -item[1]["max"])[:10]
+    callback_lines = [
+        f"`{name}` – max {stats['max'] * 1000:.0f} ms, Ø {stats['total'] / stats['count'] * 1000:.0f} ms, {stats['slow']}/{stats['count']} langsam"
+        for name, stats in worst
+    ]
+    stall_lines = []
+    for stall in list(loop_stalls)[-5:][::-1]:
+        frame = stall["stack"][-1].strip().splitlines()[0] if stall["stack"] else "unbekannt"
+        callbacks = ", ".join(stall["callbacks"]) or "keiner"
+        stall_lines.append(f"`{stall['at']}` {stall['duration_ms']:.0f} ms – {callbacks}\n`{frame[:150]}`")
+
+    embed = discord.Embed(title="🐢 Langsame Callbacks", color=get_color(interaction.guild.id, "info"))
+    embed.add_field(name="Callbacks (nach Maximum)", value="\n".join(callback_lines)[:1024] or "Noch keine Messungen.", inline=False)
+    embed.add_field(name=f"Event-Loop-Blockaden ({len(loop_stalls)})", value="\n".join(stall_lines)[:1024] or "Keine Blockaden erkannt.", inline=False)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="rest_budget", description="📡 Zeigt die REST-Aufrufe pro Ticket-Ablauf")
+@check_permission("rest_budget")
+async def rest_budget(interaction: discord.Interaction):
+    """Durchschnittliche REST-Aufrufe je Ablauf seit dem Start, verglichen mit dem Budget."""
+    lines = []
+    for row in rest_budget_report():
+        per_run = f"{row['per_run']:.1f}/Lauf" if row["per_run"] is not None else f"{row['calls']} gesamt"
+        budget = f" (Budget {row['budget']})" if row["budget"] is not None else ""
+        marker = "⚠️ " if row["over_budget"] else ""
+        top_routes = ", ".join(f"`{route}` ×{n}" for route, n in row["routes"][:3])
+        lines.append(f"{marker}**{row['flow']}** – {row['runs']} Läufe, {per_run}{budget}\n{top_routes}")
+
+    embed = discord.Embed(
+        title="📡 REST-Budget",
+        description="\n\n".join(lines)[:4000] or "Noch keine REST-Aufrufe gezählt.",
+        color=get_color(interaction.guild.id, "info")
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+# --- Graceful Shutdown ---
+SHUTDOWN_DRAIN_TIMEOUT = float(os.environ.get("TICKETS_SHUTDOWN_TIMEOUT", 20))
+shutting_down = False
+
+async def reject_interaction(interaction: discord.Interaction):
+    """Beantwortet Interaktionen während des Herunterfahrens mit einem Hinweis."""
+    if interaction.type == discord.InteractionType.autocomplete:
+        return
+    try:
+        await interaction.response.send_message(
+            "<:8649cooldown:1459953871572046133> Der Bot wird gerade neu gestartet. Bitte versuche es in einer Minute erneut.",
+            ephemeral=True
+        )
+    except Exception:
+        pass
+
+def stop_accepting_interactions():
+    """Ersetzt den INTERACTION_CREATE-Parser, damit keine neuen Abläufe mehr starten."""
+    state = bot._connection
+
+    def reject(data):
+        asyncio.create_task(reject_interaction(discord.Interaction(data=data, state=state)))
+
+    state.parsers["INTERACTION_CREATE"] = reject
+
+async def graceful_shutdown(reason: str):
+    """Nimmt keine Interaktionen mehr an, wartet auf laufende Abläufe, speichert alles und trennt die Verbindung."""
+    global shutting_down
+    if shutting_down:
+        return
+    shutting_down = True
+    start = time.perf_counter()
+    print(f"🛑 {reason} empfangen, fahre herunter...")
+    stop_accepting_interactions()
+
+    # Hintergrund- und Close-Jobs sind persistent und werden nach dem Neustart fortgesetzt
+    for task in list(running_jobs.values()) + close_job_workers:
+        task.cancel()
+
+    flows = {task for name, task in inflight_flows.values() if task is not None and not task.done()}
+    pending = set()
+    if flows:
+        print(f"⏳ Warte auf {len(flows)} laufende Ticket-Abläufe (max. {SHUTDOWN_DRAIN_TIMEOUT:.0f}s)...")
+        _, pending = await asyncio.wait(flows, timeout=SHUTDOWN_DRAIN_TIMEOUT)
+        for task in pending:
+            task.cancel()
+        if pending:
+            aborted = [name for name, task in inflight_flows.values() if task in pending]
+            print(f"⚠️ {len(pending)} Abläufe abgebrochen: {', '.join(aborted)}")
+
+    # Zusammengefasste Bearbeitungen nicht verlieren
+    edits = [future for _, future in pending_message_edits.values()]
+    if edits:
+        await asyncio.wait(edits, timeout=MESSAGE_EDIT_WINDOW * 2)
+
+    # Konfiguration in jedem Fall einmal vollständig schreiben
+    mark_config_dirty()
+    for name, flush in (
+        ("Konfiguration", flush_config),
+        ("Jobs", lambda: asyncio.to_thread(save_jobs, jobs)),
+        ("KI-Training", flush_ai_training),
+        ("Live-Transkripte", flush_transcript_buffers),
+        ("Spans", export_spans),
+    ):
+        try:
+            await flush()
+        except Exception as e:
+            print(f"<:4934error:1459953806870708388> Fehler beim Speichern ({name}): {e}")
+
+    print(f"✅ Heruntergefahren in {time.perf_counter() - start:.2f}s ({len(flows) - len(pending)} Abläufe abgeschlossen, {len(pending)} abgebrochen)")
+    await bot.close()
+
+def install_signal_handlers():
+    """SIGTERM/SIGINT lösen das geordnete Herunterfahren aus (unter Windows nicht verfügbar)."""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, lambda sig=sig: asyncio.create_task(graceful_shutdown(sig.name)))
+        except (NotImplementedError, RuntimeError):
+            pass
+
 # --- Bot Events ---
 
 @bot.event
@@ -1299,35 +4870,87 @@ async def on_ready():
     print(f"📊 Discord.py Version: {discord.__version__}")
     print(f"🔗 Verbunden mit {len(bot.guilds)} Server(n)")
 
+    # Serverkonfigurationen werden erst beim ersten Zugriff angelegt
     for guild in bot.guilds:
-        get_server_config(guild.id)
         print(f"   ├─ {guild.name} (ID: {guild.id})")
 
     print("═" * 50)
+    if not startup_phases or startup_phases[-1][0] != "on_ready":
+        mark_startup_phase("on_ready")
 
     # Persistente Views registrieren
     await setup_persistent_views()
+    if DEBUG_SLOW:
+        enable_slow_callback_tracing()
+
+    # Ticket-Warteschlange aufbauen
+    rebuild_ticket_queues()
+    if not ticket_scheduler.is_running():
+        ticket_scheduler.start()
+
+    # Inaktivitäts-Timer aufbauen
+    rebuild_inactivity_tracker()
+    if not inactivity_checker.is_running():
+        inactivity_checker.start()
+
+    # Unterbrochene Hintergrund-Jobs fortsetzen
+    resume_jobs()
+    start_close_job_workers()
+
+    # Server, die der Bot offline verlassen hat, für die Archivierung vormerken
+    # Server, die den Bot offline wieder eingeladen haben, nicht mehr archivieren
+    current_guilds = {str(guild.id) for guild in bot.guilds}
+    removed_guilds = config.setdefault("removed_guilds", {})
+    missing = (set(config["servers"]) | evicted_guilds) - current_guilds - set(removed_guilds)
+    returned = current_guilds & set(removed_guilds)
+    if missing or returned:
+        removed_guilds.update(dict.fromkeys(missing, datetime.now().timestamp()))
+        for guild_id_str in returned:
+            del removed_guilds[guild_id_str]
+        save_config(config)
+    if not guild_state_janitor.is_running():
+        guild_state_janitor.start()
+
+    # Gesammeltes Speichern der Konfiguration
+    if not config_saver.is_running():
+        config_saver.start()
+
+    # Gesammeltes Speichern und Aufräumen der KI-Trainingsdaten
+    if not ai_training_saver.is_running():
+        ai_training_saver.start()
+    if not training_compactor.is_running():
+        training_compactor.start()
+
+    # Live-Transkripte nachholen und Schreib-Task starten
+    if not transcript_flusher.is_running():
+        transcript_flusher.start()
+    if TRACE_SAMPLE_RATE > 0 and not span_exporter.is_running():
+        span_exporter.start()
+    asyncio.create_task(backfill_transcript_logs())
 
     print("═" * 50)
-    try:
-        synced = await bot.tree.sync()
-        print(f"✅ {len(synced)} Slash Commands synchronisiert")
-        print("═" * 50)
-    except Exception as e:
-        print(f"<:4934error:1459953806870708388> Fehler beim Synchronisieren: {e}")
+    await sync_command_tree()
 
 @bot.event
 async def on_guild_join(guild: discord.Guild):
     print(f"✅ Bot beigetreten: {guild.name} (ID: {guild.id})")
+    unmark_guild_removed(guild.id)
     get_server_config(guild.id)
 
+@bot.event
+async def on_guild_available(guild: discord.Guild):
+    unmark_guild_removed(guild.id)
+
 @bot.event
 async def on_guild_remove(guild: discord.Guild):
     print(f"⚠️ Bot entfernt: {guild.name} (ID: {guild.id})")
+    # Daten bleiben für die Frist erhalten, falls der Server den Bot wieder einlädt
+    mark_guild_removed(guild.id)
 
 # --- Error Handlers ---
 @ticket_setup.error
 @panel_create.error
+@panel_edit.error
 @panel_delete.error
 @panel_list.error
 @multipanel_create.error
@@ -1341,12 +4964,27 @@ async def on_guild_remove(guild: discord.Guild):
 @permission_grant.error
 @permission_revoke.error
 @permission_list.error
+@panel_queue.error
+@queue_show.error
+@panel_inactivity.error
+@ticket_bulk_close.error
+@transcript_export.error
+@training_compact.error
+@debug_slow.error
+@rest_budget.error
+@config_export.error
+@config_import.error
+@close_jobs_command.error
 async def command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
     if isinstance(error, app_commands.MissingPermissions) or isinstance(error, app_commands.CheckFailure):
         await interaction.response.send_message("<:4934error:1459953806870708388> Keine Berechtigung!", ephemeral=True)
     else:
         await interaction.response.send_message(f"<:4934error:1459953806870708388> Fehler: {str(error)}", ephemeral=True)
 
+mark_startup_phase("Modul geladen")
+if PROFILE_STARTUP:
+    print_import_profile()
+
 # --- Bot Start ---
 if __name__ == "__main__":
     bot_token = os.environ.get("DISCORD_BOT_TOKEN") or config.get("bot_token", "")
@@ -1369,7 +5007,9 @@ if __name__ == "__main__":
     try:
         port = int(os.environ.get("PORT", 5000))
         async def run_bot():
+            install_signal_handlers()
             await start_health_server()
+            mark_startup_phase("Health-Server gestartet")
             async with bot:
                 await bot.start(bot_token)
         asyncio.run(run_bot())